@@ -0,0 +1,78 @@
+"""
+Overhead of `TracingASGIMiddleware` over bare ASGI application, called by in-process client
+(no server and no sockets, so only the application and the middleware are measured)
+
+Run from repository root::
+
+    python -m benchmarks.asgi
+"""
+import time
+import asyncio
+import logging
+
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import TracingASGIMiddleware
+
+
+REQUESTS = 20000
+
+# Typical browser request headers, none of them is used for propagation
+HEADERS = [(b'host', b'localhost:8000'), (b'user-agent', b'Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101'),
+           (b'accept', b'text/html,application/xhtml+xml'), (b'accept-language', b'en-US,en;q=0.5'),
+           (b'accept-encoding', b'gzip, deflate'), (b'connection', b'keep-alive'),
+           (b'cookie', b'session=0123456789abcdef; theme=dark')]
+
+PROPAGATION_HEADERS = [(b'ot-tracer-traceid', b'4bf92f3577b34da6'), (b'ot-tracer-spanid', b'00f067aa0ba902b7'),
+                       (b'ot-baggage-user', b'logsense')]
+
+
+class NullSender:  # pylint: disable=too-few-public-methods
+    def emit_with_time(self, label, timestamp, data):  # pylint: disable=missing-docstring
+        pass
+
+    def close(self):  # pylint: disable=missing-docstring
+        pass
+
+
+async def bare_app(scope, receive, send):  # pylint: disable=unused-argument
+    await receive()
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': b'Hello'})
+
+
+async def measure(application, headers, requests=REQUESTS):
+    """
+    Send `requests` requests to `application` and return average time of request in microseconds
+    """
+    request = {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def receive():
+        return request
+
+    async def send(message):  # pylint: disable=unused-argument
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                 'scheme': 'http', 'path': '/hello', 'raw_path': b'/hello', 'query_string': b'', 'root_path': '',
+                 'headers': headers, 'client': ('127.0.0.1', 12345), 'server': ('127.0.0.1', 8000)}
+        await application(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main():
+    traced_app = TracingASGIMiddleware(bare_app)
+
+    bare = await measure(bare_app, HEADERS)
+    print('bare application:               {:6.2f}us'.format(bare))
+    for name, headers in [('without context', HEADERS), ('with context', HEADERS + PROPAGATION_HEADERS)]:
+        traced = await measure(traced_app, headers)
+        print('middleware {:20} {:6.2f}us  overhead: {:6.2f}us'.format(name + ':', traced, traced - bare))
+
+
+if __name__ == '__main__':
+    tracer = setup_tracer('benchmark', sender=NullSender())  # pylint: disable=invalid-name
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main())
+    tracer.finish()
@@ -0,0 +1,68 @@
+"""
+Per-call cost of functions decorated by patched async decorator
+
+Patched decorator should cost the same as single instrumentation wrapper, because instrumentation
+is done once per decoration and reused by every call.
+
+Run from repository root::
+
+    python -m benchmarks.async_decorator
+"""
+import time
+import asyncio
+import logging
+
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import coroutine_instrumentation, patch_async_decorator
+
+
+CALLS = 2000
+
+
+class NullSender:  # pylint: disable=too-few-public-methods
+    def emit_with_time(self, label, timestamp, data):  # pylint: disable=missing-docstring
+        pass
+
+    def close(self):  # pylint: disable=missing-docstring
+        pass
+
+
+def decorator(function):
+    async def decorated_function(*args, **kwargs):
+        return await function(*args, **kwargs)
+
+    return decorated_function
+
+
+async def hello(name):
+    return name
+
+
+async def measure(function, calls=CALLS):
+    start = time.perf_counter()
+    for _ in range(calls):
+        await function('logsense')
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def main():
+    plain = decorator(hello)
+    single_wrapper = decorator(coroutine_instrumentation(hello))
+
+    patch_async_decorator('{}.decorator'.format(__name__), flat=True, only_decorated=True)
+    patched = decorator(hello)
+
+    # Warm up
+    for function in (plain, single_wrapper, patched):
+        await measure(function, calls=100)
+
+    print('plain decorator:        {:8.2f}us per call'.format(await measure(plain)))
+    print('single wrapper:         {:8.2f}us per call'.format(await measure(single_wrapper)))
+    print('patched decorator:      {:8.2f}us per call'.format(await measure(patched)))
+
+
+if __name__ == '__main__':
+    tracer = setup_tracer('benchmark', sender=NullSender())  # pylint: disable=invalid-name
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main())
+    tracer.finish()
@@ -0,0 +1,61 @@
+"""
+Per-record cost of logging with `OpentracingLogsenseHandler`
+
+Records below handler's level are rejected before active span is searched, and records attached
+to spans are formatted on the processing thread.
+
+Run from repository root::
+
+    python -m benchmarks.handler
+"""
+import time
+import logging
+
+import opentracing
+
+from logsense_opentracing.utils import setup_tracer
+
+
+CALLS = 20000
+
+
+class NullSender:  # pylint: disable=too-few-public-methods
+    def emit_with_time(self, label, timestamp, data):  # pylint: disable=missing-docstring
+        pass
+
+    def close(self):  # pylint: disable=missing-docstring
+        pass
+
+
+def measure(function, calls=CALLS):
+    start = time.perf_counter()
+    for number in range(calls):
+        function('Request %s took %d ms', 'index', number)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def spans(calls=CALLS // 10):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with opentracing.tracer.start_active_span('benchmark'):
+            pass
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    logger = logging.getLogger('benchmark')
+    logger.propagate = False
+
+    print('start_active_span:      {:8.2f}us per span'.format(spans()))
+    print('no active span:         {:8.2f}us per record'.format(measure(logger.info)))
+    with opentracing.tracer.start_active_span('benchmark'):
+        print('below handler level:    {:8.2f}us per record'.format(measure(logger.debug)))
+        print('attached to span:       {:8.2f}us per record'.format(measure(logger.info)))
+
+
+if __name__ == '__main__':
+    tracer = setup_tracer('benchmark', logger='benchmark', sender=NullSender(), level=logging.INFO,  # pylint: disable=invalid-name
+                          max_logs_per_span=1000)
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
+    tracer.finish()
@@ -0,0 +1,73 @@
+"""
+Wrapper-based instrumentation (`patch_module`) compared with profiler hook (`install_profile_hook`)
+on `tests.module` fixtures
+
+Both engines trace `tests.module.calls`. Calls of not traced function show how much every engine costs
+the rest of application.
+
+Run from repository root::
+
+    python -m benchmarks.profile_hook
+"""
+import sys
+import time
+import logging
+
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_module, unpatch_all
+from logsense_opentracing.instrumentation.profile_hook import install_profile_hook, uninstall_profile_hook
+from tests.module import calls
+
+
+TRACED_CALLS = 500
+UNTRACED_CALLS = 200000
+
+
+class NullSender:  # pylint: disable=too-few-public-methods
+    def emit_with_time(self, label, timestamp, data):  # pylint: disable=missing-docstring
+        pass
+
+    def close(self):  # pylint: disable=missing-docstring
+        pass
+
+
+def untraced(value):
+    return value
+
+
+def measure(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function(1)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def report(name):
+    # Module attribute is looked up on every call, so patched wrapper is used
+    traced = measure(lambda value: calls.outer(value), TRACED_CALLS)  # pylint: disable=unnecessary-lambda
+    print('{:<26} traced: {:10.2f}us per call, untraced: {:6.3f}us per call'.format(
+        name, traced, measure(untraced, UNTRACED_CALLS)
+        ))
+
+
+def main():
+    report('no tracing')
+
+    patch_module('tests.module.calls')
+    report('patch_module')
+    unpatch_all()
+
+    # sys.monitoring is available since Python 3.12
+    for use_monitoring in (True, False):
+        if use_monitoring and not hasattr(sys, 'monitoring'):
+            continue
+        engine = install_profile_hook('tests.module.calls', use_monitoring=use_monitoring)
+        report('profile hook ({})'.format('monitoring' if use_monitoring else 'setprofile'))
+        uninstall_profile_hook(engine)
+
+
+if __name__ == '__main__':
+    tracer = setup_tracer('benchmark', sender=NullSender())  # pylint: disable=invalid-name
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
+    tracer.finish()
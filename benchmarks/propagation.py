@@ -0,0 +1,65 @@
+"""
+Throughput of span context propagation formats and HTTP propagators (W3C Trace Context, B3, ot-*)
+
+Run from repository root::
+
+    python -m benchmarks.propagation
+"""
+import time
+import logging
+
+from opentracing.propagation import Format
+
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.span_context import SpanContext
+from logsense_opentracing.propagation import HTTP_PROPAGATORS, http_propagator
+
+
+CALLS = 100000
+
+
+class NullSender:  # pylint: disable=too-few-public-methods
+    def emit_with_time(self, label, timestamp, data):  # pylint: disable=missing-docstring
+        pass
+
+    def close(self):  # pylint: disable=missing-docstring
+        pass
+
+
+def measure(function, calls=CALLS):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(tracer):
+    context = SpanContext(trace_id=tracer.random.getrandbits(64), span_id=tracer.random.getrandbits(64),
+                          baggage={'user': 'logsense', 'request': 'index'})
+    carriers = {Format.TEXT_MAP: dict, Format.HTTP_HEADERS: dict, Format.BINARY: bytearray}
+
+    for format, carrier_type in carriers.items():
+        carrier = carrier_type()
+        tracer.inject(context, format, carrier)
+        propagator = tracer._propagators[format]  # pylint: disable=protected-access
+
+        inject = measure(lambda: tracer.inject(context, format, carrier_type()))  # pylint: disable=cell-var-from-loop
+        extract = measure(lambda: propagator.extract(carrier))  # pylint: disable=cell-var-from-loop
+        print('{:20} inject: {:6.2f}us  extract: {:6.2f}us'.format(format, inject, extract))
+
+    propagators = {name: http_propagator([name]) for name in HTTP_PROPAGATORS}
+    propagators['composite'] = http_propagator(['tracecontext', 'b3', 'ot'])
+    for name, propagator in propagators.items():
+        carrier = {}
+        propagator.inject(context, carrier)
+
+        inject = measure(lambda: propagator.inject(context, {}))  # pylint: disable=cell-var-from-loop
+        extract = measure(lambda: propagator.extract(carrier))  # pylint: disable=cell-var-from-loop
+        print('http {:15} inject: {:6.2f}us  extract: {:6.2f}us'.format(name, inject, extract))
+
+
+if __name__ == '__main__':
+    tracer = setup_tracer('benchmark', sender=NullSender())  # pylint: disable=invalid-name
+    logging.getLogger().setLevel(logging.WARNING)
+    main(tracer)
+    tracer.finish()
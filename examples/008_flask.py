@@ -1,10 +1,10 @@
 """
-Extract information from flask request and put into opentracing scope
+Trace every request of flask application (including `before_request` hooks and streamed responses)
 """
 import logging
 from flask import Flask
 
-from logsense_opentracing.instrumentation import patch_decorator, flask_route
+from logsense_opentracing.instrumentation import FlaskTracing
 from logsense_opentracing.utils import setup_tracer
 
 
@@ -12,9 +12,7 @@ app = Flask('hello-flask')
 
 # Initialize tracer
 setup_tracer(component='flask')
-
-# Decorator should be patched before using it.
-patch_decorator('flask.Flask.route', before=flask_route, flat=False, only_decorated=True)
+FlaskTracing(app)
 
 # Define routing
 @app.route("/sayHello/<name>")
@@ -4,7 +4,7 @@ import tornado.ioloop
 import tornado.web
 
 from logsense_opentracing.utils import setup_tracer
-from logsense_opentracing.instrumentation import patch_single, tornado_route, requests_baggage, patch_module
+from logsense_opentracing.instrumentation import patch_single, requests_baggage, patch_module, TornadoTracing
 
 # Initialize tracer
 setup_tracer(component='Main server')
@@ -18,14 +18,15 @@ class MainHandler(tornado.web.RequestHandler):
         requests.get('http://localhost:8889/')
 
 
-patch_single('__main__.MainHandler.get', before=tornado_route)
 patch_single('requests.api.request', before=requests_baggage)
 patch_module('requests.models.PreparedRequest', recursive=True)
 
 def make_app():
-    return tornado.web.Application([
+    app = tornado.web.Application([
         (r"/", MainHandler)
     ])
+    TornadoTracing(app)
+    return app
 
 if __name__ == "__main__":
     app = make_app()
@@ -6,7 +6,7 @@ import tornado.ioloop
 import tornado.web
 
 from logsense_opentracing.utils import setup_tracer
-from logsense_opentracing.instrumentation import patch_single, tornado_route
+from logsense_opentracing.instrumentation import TornadoTracing
 
 
 # Initialize tracer
@@ -15,7 +15,7 @@ setup_tracer(component='tornado server')
 
 class MainHandler(tornado.web.RequestHandler):  # pylint: disable=missing-docstring, abstract-method
 
-    def get(self):
+    async def get(self):
         """
         Just log and send welcome message
         """
@@ -23,13 +23,10 @@ class MainHandler(tornado.web.RequestHandler):  # pylint: disable=missing-docstr
         self.write('Hello, world')
 
 
-# Patch handler
-patch_single('__main__.MainHandler.get', before=tornado_route)
-
-
 if __name__ == "__main__":
     app = tornado.web.Application([  # pylint: disable=invalid-name
         (r"/", MainHandler),
     ])
+    TornadoTracing(app)
     app.listen(8889)
     tornado.ioloop.IOLoop.current().start()
@@ -0,0 +1,178 @@
+"""
+Lightweight exception capture
+
+Failed instrumented functions and logs with `exc_info` report exceptions. Keeping exception objects until export
+keeps their tracebacks and all referenced frames alive, and formatting tracebacks on the request thread is slow.
+Instead, only exception type, message and code locations (file, line, function) are captured.
+Traceback text is formatted on the tracer's processing thread (see `logsense_opentracing.lazy`)::
+
+    from logsense_opentracing.exception_capture import log_exception
+
+    with opentracing.tracer.start_active_span('hello') as scope:
+        try:
+            ...
+        except Exception as exception:
+            log_exception(scope.span, exception)
+            raise
+
+Only `max_depth` innermost frames are captured. Formatted tracebacks are cached by their signature
+(type and code locations), so repeated errors are formatted once and share captured locations.
+Both limits can be changed by `configure_exception_capture`
+"""
+import linecache
+import threading
+import collections
+
+from .lazy import Lazy
+
+
+DEFAULT_MAX_DEPTH = 32
+DEFAULT_CACHE_SIZE = 256
+
+
+class ExceptionCaptureConfig:  # pylint: disable=too-few-public-methods
+    """
+    Exception capture configuration. See `configure_exception_capture` for details
+    """
+    def __init__(self):
+        self.max_depth = DEFAULT_MAX_DEPTH
+        self.cache_size = DEFAULT_CACHE_SIZE
+
+
+CONFIG = ExceptionCaptureConfig()
+
+# Signature -> [signature, formatted traceback or None until it's formatted]
+_CACHE = collections.OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _kind(exception):
+    kind = type(exception)
+    if kind.__module__ == 'builtins':
+        return kind.__qualname__
+    return '{}.{}'.format(kind.__module__, kind.__qualname__)
+
+
+class CapturedException(Lazy):
+    """
+    Exception type, message and code locations. Resolved to formatted traceback
+    """
+    __slots__ = ['kind', 'message', '_entry']
+
+    def __init__(self, kind, message, entry):
+        self.kind = kind
+        self.message = message
+        # Cache entry shared by all exceptions with the same signature
+        self._entry = entry
+
+    @classmethod
+    def capture(cls, exception, max_depth=None):
+        """
+        Capture exception without keeping reference to it
+
+        :param exception: Exception to capture
+        :type exception: ``BaseException``
+        :param max_depth: Maximal number of captured frames. `CONFIG.max_depth` is used if None
+        :type max_depth: ``int``
+        """
+        max_depth = CONFIG.max_depth if max_depth is None else max_depth
+        locations = collections.deque(maxlen=max_depth)
+        total = 0
+
+        trace = exception.__traceback__
+        while trace is not None:
+            code = trace.tb_frame.f_code
+            locations.append((code.co_filename, trace.tb_lineno, code.co_name))
+            total += 1
+            trace = trace.tb_next
+
+        kind = _kind(exception)
+        try:
+            message = str(exception)
+        except Exception:  # pylint: disable=broad-except
+            message = '<unprintable {}>'.format(kind)
+
+        signature = (kind, total - len(locations), tuple(locations))
+
+        # Share signature and formatted traceback with already captured exceptions
+        with _LOCK:
+            entry = _CACHE.get(signature)
+            if entry is None:
+                entry = _CACHE[signature] = [signature, None]
+                while len(_CACHE) > CONFIG.cache_size:
+                    _CACHE.popitem(last=False)
+            else:
+                _CACHE.move_to_end(signature)
+
+        return cls(kind, message, entry)
+
+    @property
+    def signature(self):
+        """
+        Tuple of type, number of omitted frames and code locations
+        """
+        return self._entry[0]
+
+    @property
+    def locations(self):
+        """
+        Captured code locations (filename, line number, function name), innermost last
+        """
+        return self._entry[0][2]
+
+    def resolve(self):
+        formatted = self._entry[1]
+        if formatted is None:
+            formatted = self._entry[1] = _format_traceback(self._entry[0])
+
+        return '{}{}: {}'.format(formatted, self.kind, self.message)
+
+
+def _format_traceback(signature):
+    _, omitted, locations = signature
+
+    lines = ['Traceback (most recent call last):\n']
+    if omitted:
+        lines.append('  ... {} frames omitted\n'.format(omitted))
+
+    for filename, lineno, name in locations:
+        lines.append('  File "{}", line {}, in {}\n'.format(filename, lineno, name))
+        line = linecache.getline(filename, lineno).strip()
+        if line:
+            lines.append('    {}\n'.format(line))
+
+    return ''.join(lines)
+
+
+def log_exception(span, exception):
+    """
+    Mark span as failed and log captured exception as its `error` event
+
+    :param span: Span which failed
+    :type span: ``opentracing.Span``
+    :param exception: Exception to capture
+    :type exception: ``BaseException``
+    """
+    captured = CapturedException.capture(exception)
+    span.set_tag('error', True)
+    span.log_kv({
+        'event': 'error',
+        'error.kind': captured.kind,
+        'message': captured.message,
+        'stack': captured
+    })
+
+
+def configure_exception_capture(max_depth=None, cache_size=None):
+    """
+    Configure exception capture. Parameters which are None are not changed
+
+    :param max_depth: Maximal number of captured frames (the innermost ones)
+    :type max_depth: ``int``
+    :param cache_size: Maximal number of cached traceback signatures
+    :type cache_size: ``int``
+    """
+    if max_depth is not None:
+        CONFIG.max_depth = max_depth
+    if cache_size is not None:
+        CONFIG.cache_size = cache_size
@@ -2,45 +2,340 @@
 Logging handler for logsense opentracing.
 It is quite different from used in logsense-logger,
 because responsibility for sending data to the collector is moved to the tracer
+
+Handler runs on the thread which logs, so it does as little as possible:
+
+    * handler has its own level (see `setup_tracer`), records below it are rejected
+      before active span is searched
+    * records are not formatted. Only attributes which are sent are copied and the message
+      is formatted on the tracer's processing thread. Arguments which can change (e.g. lists) are formatted
+      immediately, so the log shows their value from the time of logging
+    * handler's lock isn't taken, adding log to the span is thread safe
+
+Number of logs per span is limited by the tracer, see `Tracer.set_log_limit`.
+
+Hot loops can log the same message thousands of times in single span. Handler can reduce them per span
+and per message template (logger, level and unformatted message):
+
+    * coalescing keeps only the first record of every template. It's sent with `logger.count`,
+      `logger.first_timestamp` and `logger.last_timestamp` if the template was logged more than once
+    * rate limiting allows `log_burst` records of every template and then `log_rate` records per second
+      (token bucket). Suppressed records are counted in span's `logs_suppressed` tag
+
+Structured (dictionary) records and records with exceptions are never coalesced::
+
+    setup_tracer(coalesce_logs=True, log_rate=10, log_burst=100)
+
+Debug logs are usually needed only for traces which failed or were slow. Records below `buffer_level`
+are held in bounded buffer of their trace (the newest `buffer_size` records are kept)::
+
+    setup_tracer(level=logging.DEBUG, buffer_level=logging.INFO, keep_duration_us=500000)
+
+When span finishes with `error` tag or takes at least `keep_duration_us`, its trace is kept.
+All buffered records of the trace are attached to their spans and further records of the trace are attached
+immediately. Spans which finished before their trace was kept are already queued, their records are sent
+afterwards (such spans have `logs_buffered` tag and they are never collapsed). Records of traces which
+aren't kept are dropped without being formatted when their root span finishes. Buffering requires
+`OpentracingLogsenseHandler.on_finish` to be registered by `Tracer.add_finish_callback`,
+which is done by `setup_tracer`
 """
 import logging
+import threading
+import weakref
+import collections
+
 import opentracing
 
+from .lazy import Lazy, IMMUTABLE_TYPES
+from .exception_capture import CapturedException
+
 
 log = logging.getLogger('logsense.opentracing')  # pylint: disable=invalid-name
 
 
-class OpentracingLogsenseHandler(logging.Handler):
+def _format_message(msg, args):
+    """
+    Format message in the same way as `logging.LogRecord.getMessage`
+    """
+    msg = str(msg)
+    if args:
+        try:
+            msg = msg % args
+        except Exception as exception:  # pylint: disable=broad-except
+            msg = '{} (formatting with {!r} failed: {})'.format(msg, args, exception)
+    return msg
+
+
+class LazyRecord(Lazy):
+    """
+    Log record attributes, resolved to structured log on the processing thread
+    """
+    __slots__ = ['name', 'levelname', 'pathname', 'lineno', 'func', 'exc_info', 'msg', 'args',
+                 'created', 'last_created', 'count']
+
+    def __init__(self, record):
+        self.created = self.last_created = record.created
+        self.count = 1
+        self.name = record.name
+        self.levelname = record.levelname
+        self.pathname = record.pathname
+        self.lineno = record.lineno
+        self.func = record.funcName
+        # Exception is captured without its traceback objects, it's formatted on the processing thread
+        self.exc_info = CapturedException.capture(record.exc_info[1]) \
+            if record.exc_info and record.exc_info[1] is not None else None
+
+        msg, args = record.msg, record.args
+        if isinstance(msg, dict):
+            msg = dict(msg)
+        elif type(msg) not in IMMUTABLE_TYPES or \
+                (args and any(type(arg) not in IMMUTABLE_TYPES for arg in _iter_args(args))):
+            msg, args = _format_message(msg, args), None
+        self.msg = msg
+        self.args = args
+
+    def resolve(self):
+        dict_to_log = {
+            'logger.name': self.name,
+            'logger.level': self.levelname,
+            'logger.pathname': self.pathname,
+            'logger.lineno': self.lineno,
+            'logger.exc_info': self.exc_info.resolve() if self.exc_info is not None else None,
+            'logger.func': self.func
+        }
+
+        if self.count > 1:
+            dict_to_log['logger.count'] = self.count
+            dict_to_log['logger.first_timestamp'] = self.created
+            dict_to_log['logger.last_timestamp'] = self.last_created
+
+        if isinstance(self.msg, dict):
+            dict_to_log.update(self.msg)
+        else:
+            dict_to_log['message'] = _format_message(self.msg, self.args)
+
+        return dict_to_log
+
+
+def _iter_args(args):
+    # Single dictionary argument is used for named placeholders
+    return args.values() if isinstance(args, dict) else args
+
+
+class _TemplateState:  # pylint: disable=too-few-public-methods
+    """
+    Coalesced record and token bucket of single template in single span
+    """
+    __slots__ = ['record', 'tokens', 'updated']
+
+    def __init__(self, tokens, updated):
+        self.record = None
+        self.tokens = tokens
+        self.updated = updated
+
+
+class _TraceBuffer:  # pylint: disable=too-few-public-methods
+    """
+    Buffered records of single trace
+    """
+    __slots__ = ['records', 'kept']
+
+    def __init__(self, size, kept=False):
+        # (span, record) pairs, the oldest ones are dropped
+        self.records = collections.deque(maxlen=size)
+        self.kept = kept
+
+
+class _LateRecords:  # pylint: disable=too-few-public-methods
+    """
+    Buffered records of span which was queued before its trace was kept. It's queued instead of the span
+    """
+    __slots__ = ['span', 'records']
+
+    def __init__(self, span, records):
+        self.span = span
+        self.records = records
+
+    def get_data(self):
+        """
+        Records as logs of the span
+        """
+        return self.span.get_data(logs=[{'timestamp': record.created, 'log': record} for record in self.records])
+
+
+class OpentracingLogsenseHandler(logging.Handler):  # pylint: disable=too-many-instance-attributes
     """
     Logging Handler for logsense  opentracing.
+
+    :param level: Minimal level of records attached to spans
+    :type level: ``int``
+    :param coalesce: Attach only the first record of every template per span and count the others
+    :type coalesce: ``bool``
+    :param rate: Records of single template per second allowed per span. None disables rate limiting
+    :type rate: ``float``
+    :param burst: Records of single template allowed at once. `rate` (at least 1) is used if None
+    :type burst: ``float``
+    :param buffer_level: Records below this level are buffered until their trace is kept. None disables buffering
+    :type buffer_level: ``int``
+    :param buffer_size: Maximal number of buffered records per trace
+    :type buffer_size: ``int``
+    :param keep_duration_us: Traces with span which took at least this number of microseconds are kept.
+        None keeps only traces with errors
+    :type keep_duration_us: ``int``
     """
+    MAX_BUFFERED_TRACES = 1000
+
+    def __init__(self, level=logging.NOTSET, coalesce=False,  # pylint: disable=too-many-arguments
+                 rate=None, burst=None, buffer_level=None, buffer_size=1000, keep_duration_us=None):
+        super().__init__(level=level)
+        self.buffer_level = buffer_level
+        self.buffer_size = buffer_size
+        self.keep_duration_us = keep_duration_us
+        # Trace identifier -> `_TraceBuffer`, the least recently used traces are dropped
+        self._traces = collections.OrderedDict()
+
+        self.coalesce = coalesce
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 0, 1)
+
+        # Span -> template -> `_TemplateState`
+        self._spans = weakref.WeakKeyDictionary()
+        self._state_lock = threading.Lock()
+
+    def handle(self, record):
+        if record.levelno < self.level:
+            return False
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        if self.filters:
+            result = self.filter(record)
+            if not result:
+                return False
+            if isinstance(result, logging.LogRecord):
+                record = result
+
+        self.emit(record)
+        return True
 
     def emit(self, record):
         active_span = opentracing.tracer.active_span
         if active_span is None:
-            log.debug('No active span for log: %s', record.getMessage())
             return None
 
-        dict_to_log = {
-            'logger.name': record.name,
-            'logger.level': record.levelname,
-            'logger.pathname': record.pathname,
-            'logger.lineno': record.lineno,
-            'logger.exc_info': record.exc_info,
-            'logger.func': record.funcName
-        }
+        if self.buffer_level is not None and record.levelno < self.buffer_level:
+            self._buffer(active_span, record)
+            return None
 
-        if isinstance(record.msg, dict):
-            dict_to_log.update(record.msg)
-        else:
-            dict_to_log['message'] = record.getMessage()
+        if (self.coalesce or self.rate is not None) and isinstance(record.msg, str) and not record.exc_info:
+            self._emit_template(active_span, record)
+            return None
 
-        active_span.log_kv(dict_to_log)
+        active_span.log_kv(LazyRecord(record), timestamp=record.created)
         return None
 
+    def _emit_template(self, span, record):
+        """
+        Attach, coalesce or suppress record according to the state of its template in `span`
+        """
+        template = (record.name, record.levelno, record.msg)
+        with self._state_lock:
+            templates = self._spans.get(span)
+            if templates is None:
+                templates = self._spans[span] = {}
+
+            state = templates.get(template)
+            if state is None:
+                state = templates[template] = _TemplateState(self.burst, record.created)
+
+            if self.rate is not None:
+                state.tokens = min(self.burst, state.tokens + (record.created - state.updated) * self.rate)
+                state.updated = record.created
+                if state.tokens < 1:
+                    suppressed = span._tags.get('logs_suppressed', 0)  # pylint: disable=protected-access
+                    span.set_tag('logs_suppressed', suppressed + 1)
+                    return
+                state.tokens -= 1
+
+            if self.coalesce and state.record is not None:
+                state.record.count += 1
+                state.record.last_created = record.created
+                return
+
+            lazy_record = LazyRecord(record)
+            if self.coalesce:
+                state.record = lazy_record
+
+        span.log_kv(lazy_record, timestamp=record.created)
+
+    def _buffer(self, span, record):
+        """
+        Buffer record in its trace or attach it if the trace is already kept
+        """
+        lazy_record = LazyRecord(record)
+        trace_id = span.context.trace_id
+        with self._state_lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                trace = self._traces[trace_id] = _TraceBuffer(self.buffer_size)
+                if len(self._traces) > self.MAX_BUFFERED_TRACES:
+                    self._traces.popitem(last=False)
+            else:
+                self._traces.move_to_end(trace_id)
+
+            if not trace.kept:
+                trace.records.append((span, lazy_record))
+                return
+
+        span.log_kv(lazy_record, timestamp=lazy_record.created)
+
+    def _is_kept(self, span):
+        # pylint: disable=protected-access
+        if span._tags.get('error'):
+            return True
+        return self.keep_duration_us is not None and span._duration_us >= self.keep_duration_us
+
+    def on_finish(self, span):
+        """
+        Keep trace of finished span if it failed or was slow and release buffered records of kept traces.
+        Records of not kept traces are dropped with their root span. It should be registered
+        by `Tracer.add_finish_callback`
+
+        :param span: Finished span
+        :type span: ``Span``
+        """
+        if self.buffer_level is None:
+            return
+
+        trace_id = span.context.trace_id
+        is_root = span.context.parent_span is None
+        kept = self._is_kept(span)
+        with self._state_lock:
+            trace = self._traces.pop(trace_id, None) if is_root else self._traces.get(trace_id)
+            if trace is None:
+                if kept and not is_root:
+                    self._traces[trace_id] = _TraceBuffer(self.buffer_size, kept=True)
+                return
+
+            trace.kept = trace.kept or kept
+            if trace.kept:
+                released, trace.records = trace.records, collections.deque(maxlen=self.buffer_size)
+            else:
+                released = ()
+                # Records may be needed when the trace is kept later, so the span can't be collapsed
+                buffered = sum(1 for owner, _ in trace.records if owner is span)
+                if buffered:
+                    span.set_tag('logs_buffered', buffered)
+
+        late = collections.OrderedDict()
+        for owner, record in released:
+            # pylint: disable=protected-access
+            if owner is span or owner._end_timestamp is None:
+                owner.log_kv(record, timestamp=record.created)
+            else:
+                late.setdefault(owner, []).append(record)
+
+        for owner, records in late.items():
+            span.tracer.put_to_queue(_LateRecords(owner, records))
+
     def __enter__(self):
         return self
 
@@ -1,12 +1,23 @@
 """
 `Instrumentation` takes together everything needed to automatic and manual instrumentation of python application
 """
-from .general import instrumentation, remove_instrumentation, async_instrumentation
+from .general import instrumentation, remove_instrumentation, async_instrumentation, coroutine_instrumentation, \
+    generator_instrumentation, async_generator_instrumentation
 from .utils import ALL_ARGS
 from .modules import patch_module
-from .functions import patch_single, patch_async_single
+from .functions import patch_single, patch_async_single, patch_coroutine_single, patch_generator_single, \
+    patch_async_generator_single
 from .decorators import patch_decorator, patch_async_decorator
+from .registry import enable_tracing, disable_tracing, is_tracing_enabled, unpatch_all, repatch_all
 
 from .flask.route import flask_route
+from .flask.extension import FlaskTracing
 from .tornado.route import tornado_route
+from .tornado.application import TornadoTracing, TracingRequestHandlerMixin
 from .requests.baggage import requests_baggage
+from .requests.session import patch_requests_session, unpatch_requests_session, requests_send_before, \
+    requests_send_after
+from .aiohttp.client import aiohttp_trace_config
+from .httpx.transport import TracingAsyncTransport
+from .wsgi import TracingMiddleware
+from .asgi import TracingASGIMiddleware
@@ -0,0 +1,270 @@
+"""
+Adaptive de-instrumentation
+
+Automatic instrumentation wraps every function, including small helpers which can be called millions of times.
+For them tracing costs more than executing the function itself. Adaptive mode measures call rate, mean duration
+and wrapper overhead of every function instrumented after enabling it. When the function is called often enough
+and the ratio of wrapper overhead to function duration crosses configured limit, the function is either unpatched
+(restored to `_logsense_original_function`) or switched to sampled tracing::
+
+    from logsense_opentracing.instrumentation import patch_module
+    from logsense_opentracing.instrumentation.adaptive import configure_adaptive, get_decisions, SAMPLE
+
+    # It should be configured before patching
+    configure_adaptive(max_overhead_ratio=0.5, action=SAMPLE, sample_every=100)
+    patch_module('my_application')
+
+    ...
+
+    for decision in get_decisions():
+        print(decision.operation_name, decision.action, decision.overhead_ratio)
+
+Every decision is logged as well. For `logsense-tracer` adaptive mode is enabled by `LOGSENSE_ADAPTIVE`
+environmental variable. Set it to `unpatch` or `sample`
+"""
+import logging
+import threading
+import time
+import collections
+
+from .registry import unpatch_function
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+UNPATCH = 'unpatch'
+SAMPLE = 'sample'
+
+# Function tracing modes
+TRACE = 'trace'
+BYPASS = 'bypass'
+
+MAX_DECISIONS = 1000
+
+
+class AdaptiveConfig:  # pylint: disable=too-few-public-methods
+    """
+    Adaptive instrumentation configuration. See `configure_adaptive` for details
+    """
+    def __init__(self):
+        self.enabled = False
+        self.max_overhead_ratio = 1.0
+        self.min_calls = 1000
+        self.min_call_rate = 100.0
+        self.action = UNPATCH
+        self.sample_every = 100
+
+
+CONFIG = AdaptiveConfig()
+
+Decision = collections.namedtuple('Decision', [
+    'operation_name',
+    'action',
+    'calls',
+    'call_rate',
+    'mean_duration_us',
+    'overhead_ratio',
+    'timestamp'
+])
+
+_DECISIONS = collections.deque(maxlen=MAX_DECISIONS)
+_STATS = []
+_LOCK = threading.Lock()
+
+
+class FunctionStats:
+    """
+    Call statistics of single instrumented function. Wrappers check `mode` on every call
+    and report timings using `record`
+    """
+    perf_counter = staticmethod(time.perf_counter)
+
+    __slots__ = ['operation_name', 'wrapper', 'mode', 'calls', 'total_calls', 'body_time', 'overhead_time',
+                 'window_start', 'sampled']
+
+    def __init__(self, operation_name):
+        self.operation_name = operation_name
+        self.wrapper = None
+        self.mode = TRACE
+        self.calls = 0
+        self.total_calls = 0
+        self.body_time = 0.0
+        self.overhead_time = 0.0
+        self.window_start = time.perf_counter()
+        self.sampled = 0
+
+    def should_trace(self):
+        """
+        Check if current call should be traced. It's called only if mode is not `TRACE`
+        """
+        if self.mode == BYPASS:
+            return False
+
+        self.sampled += 1
+        return self.sampled % CONFIG.sample_every == 0
+
+    def record(self, entered, called, returned, finished):
+        """
+        Record timings of single traced call
+
+        :param entered: Time of entering the wrapper
+        :param called: Time of calling the function
+        :param returned: Time of function return
+        :param finished: Time of leaving the wrapper
+        """
+        self.calls += 1
+        self.body_time += returned - called
+        self.overhead_time += (called - entered) + (finished - returned)
+
+        if self.calls >= CONFIG.min_calls and self.mode == TRACE:
+            self._evaluate(finished)
+
+    @property
+    def mean_duration_us(self):
+        """
+        Mean duration of function in current window, in microseconds
+        """
+        return self.body_time / self.calls * 1e6 if self.calls else 0.0
+
+    @property
+    def overhead_ratio(self):
+        """
+        Ratio of wrapper overhead to function duration in current window
+        """
+        if not self.body_time:
+            return float('inf') if self.overhead_time else 0.0
+        return self.overhead_time / self.body_time
+
+    def call_rate(self, now=None):
+        """
+        Calls per second in current window
+        """
+        elapsed = (time.perf_counter() if now is None else now) - self.window_start
+        return self.calls / elapsed if elapsed > 0 else float('inf')
+
+    def _evaluate(self, now):
+        with _LOCK:
+            if self.mode != TRACE:
+                return
+
+            call_rate = self.call_rate(now)
+            overhead_ratio = self.overhead_ratio
+
+            if call_rate >= CONFIG.min_call_rate and overhead_ratio >= CONFIG.max_overhead_ratio:
+                self._decide(call_rate, overhead_ratio)
+
+            # Start new window, so decisions are based on recent calls only
+            self.total_calls += self.calls
+            self.calls = 0
+            self.body_time = 0.0
+            self.overhead_time = 0.0
+            self.window_start = now
+
+    def _decide(self, call_rate, overhead_ratio):
+        action = CONFIG.action
+        if action == UNPATCH:
+            # Wrapper is left in place if something still references it, so it should cost as little as possible
+            self.mode = BYPASS
+            # Decision is made in the wrapper, failed restore mustn't break the instrumented call
+            try:
+                restored = unpatch_function(self.wrapper)
+            except Exception as exception:  # pylint: disable=broad-except
+                log.warning('Cannot unpatch %s, it is bypassed instead: %s', self.operation_name, exception)
+            else:
+                if not restored:
+                    log.info('%s is not registered patch, it is bypassed instead', self.operation_name)
+        else:
+            self.mode = SAMPLE
+
+        decision = Decision(
+            operation_name=self.operation_name,
+            action=action,
+            calls=self.calls,
+            call_rate=call_rate,
+            mean_duration_us=self.mean_duration_us,
+            overhead_ratio=overhead_ratio,
+            timestamp=time.time()
+            )
+        _DECISIONS.append(decision)
+        log.info(
+            'Adaptive instrumentation: %s %s (%.0f calls/s, mean duration %.2fus, overhead ratio %.2f)',
+            action, self.operation_name, call_rate, decision.mean_duration_us, overhead_ratio
+            )
+
+
+def configure_adaptive(enabled=True, max_overhead_ratio=None, min_calls=None,  # pylint: disable=too-many-arguments
+                       min_call_rate=None, action=None, sample_every=None):
+    """
+    Configure adaptive instrumentation. Only functions instrumented after enabling it are tracked
+
+    :param enabled: Enable or disable tracking of newly instrumented functions
+    :type enabled: ``bool``
+    :param max_overhead_ratio: Maximal accepted ratio of wrapper overhead to function duration
+    :type max_overhead_ratio: ``float``
+    :param min_calls: Number of calls in the window before making decision
+    :type min_calls: ``int``
+    :param min_call_rate: Minimal number of calls per second. Rarely called functions are always traced
+    :type min_call_rate: ``float``
+    :param action: `UNPATCH` to restore original function or `SAMPLE` to trace every `sample_every` call
+    :type action: ``str``
+    :param sample_every: Sampling interval for `SAMPLE` action
+    :type sample_every: ``int``
+    """
+    if action not in (None, UNPATCH, SAMPLE):
+        raise ValueError('Unknown adaptive action: {}'.format(action))
+
+    CONFIG.enabled = enabled
+    if max_overhead_ratio is not None:
+        CONFIG.max_overhead_ratio = max_overhead_ratio
+    if min_calls is not None:
+        CONFIG.min_calls = min_calls
+    if min_call_rate is not None:
+        CONFIG.min_call_rate = min_call_rate
+    if action is not None:
+        CONFIG.action = action
+    if sample_every is not None:
+        CONFIG.sample_every = max(1, sample_every)
+
+
+def track(operation_name):
+    """
+    Create statistics for function which is being instrumented
+
+    :param operation_name: Operation name of instrumented function
+    :type operation_name: ``str``
+
+    :returns: `FunctionStats` or None if adaptive instrumentation is disabled
+    """
+    if not CONFIG.enabled:
+        return None
+
+    stats = FunctionStats(operation_name)
+    with _LOCK:
+        _STATS.append(stats)
+    return stats
+
+
+def get_decisions():
+    """
+    :returns: List of `Decision` made so far (at most `MAX_DECISIONS` latest)
+    """
+    return list(_DECISIONS)
+
+
+def get_stats():
+    """
+    :returns: Dictionary of operation name and its statistics: mode, calls, call rate, mean duration
+        and overhead ratio in current window
+    """
+    with _LOCK:
+        stats = list(_STATS)
+
+    return {
+        item.operation_name: {
+            'mode': item.mode,
+            'calls': item.total_calls + item.calls,
+            'call_rate': item.call_rate(),
+            'mean_duration_us': item.mean_duration_us,
+            'overhead_ratio': item.overhead_ratio
+        } for item in stats
+    }
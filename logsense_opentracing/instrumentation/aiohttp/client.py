@@ -0,0 +1,111 @@
+"""
+`aiohttp <https://docs.aiohttp.org/>`_ client integration
+
+Requests of `aiohttp.ClientSession` are traced by its trace config hooks, which are run on the event loop
+and don't block it::
+
+    import aiohttp
+    import opentracing
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation import aiohttp_trace_config
+
+    setup_tracer(component='aiohttp client')
+
+    async def main():
+        async with aiohttp.ClientSession(trace_configs=[aiohttp_trace_config()]) as session:
+            with opentracing.tracer.start_active_span('parent-span'):
+                async with session.get('http://localhost:8888/') as response:
+                    await response.text()
+
+Every request gets client span (see `http_client`), redirects are logged as `redirect` events
+"""
+from ..http_client import start_client_span, finish_client_span, ClientTimings
+
+
+async def _on_request_start(session, context, params):  # pylint: disable=unused-argument
+    # Headers are passed to the request after this hook, so span context is injected in place
+    span = start_client_span(params.method, str(params.url), params.headers)
+    context.logsense_timings = ClientTimings(span)
+
+
+def _timings(context):
+    return getattr(context, 'logsense_timings', None)
+
+
+async def _on_connection_create_end(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        timings.connection_ready(reused=False)
+
+
+async def _on_connection_reuseconn(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        timings.connection_ready(reused=True)
+
+
+async def _on_dns_resolvehost_start(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        timings.dns_start()
+
+
+async def _on_dns_resolvehost_end(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        timings.dns_end()
+
+
+async def _on_request_headers_sent(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        timings.request_headers_sent()
+
+
+async def _on_request_redirect(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        timings.span.log_kv({'event': 'redirect', 'http.status_code': params.response.status,
+                             'location': params.response.headers.get('Location')})
+
+
+async def _on_request_end(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        timings.response_headers_received()
+        finish_client_span(timings.span, status_code=params.response.status)
+
+
+async def _on_request_exception(session, context, params):  # pylint: disable=unused-argument
+    timings = _timings(context)
+    if timings is not None:
+        finish_client_span(timings.span, exception=params.exception)
+
+
+def aiohttp_trace_config(trace_config=None):
+    """
+    Add tracing hooks to aiohttp trace config
+
+    :param trace_config: Trace config to extend. New one is created if None
+    :type trace_config: ``aiohttp.TraceConfig``
+
+    :returns: Trace config, which should be passed to `aiohttp.ClientSession(trace_configs=[...])`
+    """
+    if trace_config is None:
+        import aiohttp  # Optional import, not everyone is going to install aiohttp module
+        trace_config = aiohttp.TraceConfig()
+
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_request_redirect.append(_on_request_redirect)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    # Older aiohttp versions don't report sending headers
+    if hasattr(trace_config, 'on_request_headers_sent'):
+        trace_config.on_request_headers_sent.append(_on_request_headers_sent)
+
+    return trace_config
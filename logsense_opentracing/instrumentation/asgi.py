@@ -0,0 +1,167 @@
+"""
+`ASGI <https://asgi.readthedocs.io/>`_ middleware
+
+Every HTTP request and WebSocket connection gets one server span::
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation import TracingASGIMiddleware
+
+    setup_tracer(component='asgi')
+    application = TracingASGIMiddleware(application)
+
+Span context is extracted from raw header pairs of the ASGI scope. Only headers with names
+of `PROPAGATION_HEADERS` prefixes are decoded, the other ones are skipped without conversion.
+HTTP span is finished when the final ``http.response.body`` message is sent, WebSocket span when the
+application returns. Span gets `span.kind`, `http.method`, `http.url`, `peer.ipv4`, `http.status_code`
+and `http.response_bytes` (or `websocket.close_code`) tags. It's active while the application is awaited
+and it's kept in the ASGI scope under `ENVIRON_SPAN` key. Other scope types (e.g. ``lifespan``) aren't traced
+"""
+import logging
+
+import opentracing
+
+from ..propagation import HTTP_BAGGAGE_PREFIX, HTTP_SPAN_ID, HTTP_TRACE_ID, TRACEPARENT, TRACESTATE, B3_SINGLE
+from ..scope import Scope
+from .wsgi import ENVIRON_SPAN, finish_server_span
+
+
+# Names (or prefixes of names) of headers used by HTTP propagators, ASGI header names are lower case.
+# `x-b3-` covers all headers of multi header B3 format
+PROPAGATION_HEADERS = tuple(name.encode('latin-1') for name in (
+    HTTP_TRACE_ID, HTTP_SPAN_ID, HTTP_BAGGAGE_PREFIX, TRACEPARENT, TRACESTATE, B3_SINGLE, 'x-b3-'))
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+
+def scope_headers(headers):
+    """
+    Decode headers of the request needed to extract span context and its host
+
+    :param headers: Raw headers of ASGI scope
+    :type headers: ``list`` of ``(bytes, bytes)``
+
+    :returns: Tuple of propagation headers dictionary (None if there are no such headers) and host (or None)
+    """
+    carrier = None
+    host = None
+    for name, value in headers:
+        if name.startswith(PROPAGATION_HEADERS):
+            if carrier is None:
+                carrier = {}
+            carrier[name.decode('latin-1')] = value.decode('latin-1')
+        elif name == b'host':
+            host = value.decode('latin-1')
+    return carrier, host
+
+
+def _url(scope, host):
+    if host is None:
+        server = scope.get('server')
+        host = '{}:{}'.format(*server) if server else ''
+    query = scope.get('query_string')
+    return '{}://{}{}{}{}'.format(scope.get('scheme', 'http'), host, scope.get('root_path', ''), scope['path'],
+                                  '?' + query.decode('latin-1') if query else '')
+
+
+def start_server_span(scope):
+    """
+    Start (not activated) server span of HTTP request or WebSocket connection
+
+    :param scope: ASGI scope
+    :type scope: ``dict``
+
+    :returns: Started span
+    """
+    carrier, host = scope_headers(scope.get('headers', ()))
+    context = None
+    if carrier is not None:
+        try:
+            context = opentracing.tracer.extract(opentracing.propagation.Format.HTTP_HEADERS, carrier)
+        except Exception as exception:  # pylint: disable=broad-except
+            log.warning(exception)
+
+    method = scope.get('method', 'GET')
+    client = scope.get('client')
+    span = opentracing.tracer.start_span(
+        'HTTP {}'.format(method) if scope['type'] == 'http' else 'WebSocket',
+        child_of=context, ignore_active_span=True, tags={
+            'span.kind': 'server',
+            'http.method': method,
+            'http.url': _url(scope, host),
+            'peer.ipv4': client[0] if client else None
+        })
+    span.set_tag('error', False)
+    scope[ENVIRON_SPAN] = span
+    return span
+
+
+class _TracedSend:
+    """
+    `send` callable of the application, which tags span with sent messages and finishes HTTP span
+    after the final response body
+    """
+    __slots__ = ['_send', 'span', 'status_code', 'response_bytes', 'finished']
+
+    def __init__(self, send, span):
+        self._send = send
+        self.span = span
+        self.status_code = None
+        self.response_bytes = 0
+        self.finished = False
+
+    async def __call__(self, message):
+        message_type = message['type']
+        if message_type == 'http.response.body':
+            self.response_bytes += len(message.get('body', b''))
+            await self._send(message)
+            if not message.get('more_body', False):
+                self.finish()
+            return
+        if message_type == 'http.response.start':
+            self.status_code = message['status']
+        elif message_type == 'websocket.close':
+            self.span.set_tag('websocket.close_code', message.get('code', 1000))
+        await self._send(message)
+
+    def finish(self, exception=None):
+        """
+        Finish span, only the first call has effect
+        """
+        if self.finished:
+            return
+        self.finished = True
+        finish_server_span(self.span, self.status_code,
+                           self.response_bytes if self.status_code is not None else None, exception)
+
+
+class TracingASGIMiddleware:
+    """
+    ASGI middleware which traces every HTTP request and WebSocket connection of wrapped application
+
+    :param application: ASGI 3 application
+    :type application: ``callable``
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] not in ('http', 'websocket'):
+            await self.application(scope, receive, send)
+            return
+
+        span = start_server_span(scope)
+        traced_send = _TracedSend(send, span)
+
+        # Local variable with name of `SCOPE_VARIABLE` makes span active for the awaited application
+        logsense_opentracing_scope = Scope(opentracing.tracer.scope_manager, span)  # pylint: disable=unused-variable
+        try:
+            await self.application(scope, receive, traced_send)
+        except Exception as exception:
+            traced_send.finish(exception)
+            raise
+        finally:
+            # Application returned without the final body (e.g. client disconnected), was cancelled
+            # or it's WebSocket connection
+            traced_send.finish()
@@ -2,6 +2,9 @@ import os
 import sys
 from logsense_opentracing.utils import setup_tracer
 from logsense_opentracing.instrumentation import patch_module, ALL_ARGS
+from logsense_opentracing.instrumentation.adaptive import configure_adaptive
+from logsense_opentracing.instrumentation.import_hook import install_import_hook
+from logsense_opentracing.instrumentation.profile_hook import install_profile_hook
 
 
 def process():
@@ -15,7 +18,21 @@ def process():
     sys.path.append(os.getcwd())
 
     setup_tracer()
-    patch_module(app)
+
+    # Adaptive instrumentation: `unpatch` or `sample`
+    if os.getenv('LOGSENSE_ADAPTIVE'):
+        configure_adaptive(action=os.getenv('LOGSENSE_ADAPTIVE').lower())
+
+    # Trace application using profiler hook instead of patching it
+    if os.getenv('LOGSENSE_PROFILE_HOOK'):
+        install_profile_hook(app, plan_cache=os.getenv('LOGSENSE_PATCH_PLAN_CACHE'))
+    # Patch application modules when they are imported instead of walking them all at startup
+    elif os.getenv('LOGSENSE_LAZY_PATCHING'):
+        # Modules from current working directory are patched as well, like by eager `patch_module`
+        install_import_hook(include_paths=(app.split('.')[0],), local_modules=True)
+        patch_module(app, recursive=False)
+    else:
+        patch_module(app, plan_cache=os.getenv('LOGSENSE_PATCH_PLAN_CACHE'))
 
 
 if hasattr(sys, 'argv'):
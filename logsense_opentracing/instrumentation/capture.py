@@ -0,0 +1,279 @@
+"""
+Argument capture policies
+
+Arguments listed in `arguments` (or all of them for `ALL_ARGS`) are reported as `kwarg.<name>` tags.
+Formatting big objects (data frames, large dictionaries, ORM objects) on the request thread can cost more
+than the instrumented function, so capture is bounded:
+
+    * every value is truncated to `max_length` characters
+    * containers with more than `max_items` items and array-like objects (with tuple `shape` attribute)
+      are summarized, e.g. ``<dict len=10000>`` or ``<DataFrame shape=(100, 3) dtype=...>``.
+      Smaller containers are formatted with bounded `reprlib` representation
+    * immutable values (numbers, strings, bytes, None) are formatted on the export thread
+      (see `logsense_opentracing.lazy`)
+    * all captured arguments of single span can take at most `max_bytes` characters.
+      Arguments which don't fit are dropped and counted in `dropped_arguments` tag
+
+Default policy is used by all instrumented functions and can be changed by `configure_capture`.
+Custom summarizers are registered per type::
+
+    from logsense_opentracing.instrumentation.capture import configure_capture, register_summarizer
+
+    configure_capture(max_length=128, max_bytes=1024)
+    register_summarizer(User, lambda user: '<User id={}>'.format(user.id))
+
+Custom policy can be also passed to single function::
+
+    from logsense_opentracing.instrumentation import patch_single, ALL_ARGS
+    from logsense_opentracing.instrumentation.capture import CapturePolicy
+
+    patch_single('my_application.views.index', arguments=ALL_ARGS, capture=CapturePolicy(max_length=32))
+"""
+import logging
+import reprlib
+
+from ..lazy import Lazy, IMMUTABLE_TYPES
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+DEFAULT_MAX_LENGTH = 1024
+DEFAULT_MAX_ITEMS = 100
+DEFAULT_MAX_BYTES = 8192
+
+TRUNCATION_MARK = '...'
+
+# Size of deferred value which length isn't known before formatting (e.g. numbers)
+_ESTIMATED_SIZE = 32
+
+_CONTAINER_TYPES = (list, tuple, set, frozenset, dict)
+
+
+def truncate(text, max_length):
+    """
+    Truncate `text` to `max_length` characters
+
+    :param text: Text to truncate
+    :type text: ``str``
+    :param max_length: Maximal length. None disables truncation
+    :type max_length: ``int``
+    """
+    if max_length is None or len(text) <= max_length:
+        return text
+    return text[:max_length] + TRUNCATION_MARK
+
+
+def _format(value, max_length):
+    try:
+        return truncate(str(value), max_length)
+    except Exception:  # pylint: disable=broad-except
+        return '<unprintable {}>'.format(type(value).__name__)
+
+
+class LazyString(Lazy):
+    """
+    Immutable value formatted and truncated on the export thread
+    """
+    __slots__ = ['value', 'max_length']
+
+    def __init__(self, value, max_length):
+        self.value = value
+        self.max_length = max_length
+
+    @property
+    def size(self):
+        """
+        Estimated number of characters of formatted value
+        """
+        if isinstance(self.value, (str, bytes)):
+            length = len(self.value)
+        else:
+            length = _ESTIMATED_SIZE
+        return length if self.max_length is None else min(length, self.max_length)
+
+    def resolve(self):
+        return _format(self.value, self.max_length)
+
+
+def array_shape(value):
+    """
+    Get shape of array-like object
+
+    :returns: Shape or None if `value` isn't array-like, i.e. its `shape` isn't tuple or list
+    """
+    try:
+        shape = getattr(value, 'shape', None)
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return shape if isinstance(shape, (tuple, list)) else None
+
+
+def summarize_array(value, shape):
+    """
+    Summarize array-like object (numpy array, pandas data frame) by its shape and data type
+    """
+    dtype = getattr(value, 'dtype', None)
+    if dtype is None:
+        dtypes = getattr(value, 'dtypes', None)
+        # Data frames have type per column, report unique ones
+        dtype = ','.join(sorted({str(item) for item in dtypes})) if dtypes is not None else None
+
+    return '<{} shape={} dtype={}>'.format(type(value).__name__, tuple(shape), dtype)
+
+
+def summarize_container(value):
+    """
+    Summarize container by its length
+    """
+    return '<{} len={}>'.format(type(value).__name__, len(value))
+
+
+class CapturePolicy:
+    """
+    Argument capture policy
+
+    :param max_length: Maximal length of single formatted value. None disables truncation
+    :type max_length: ``int``
+    :param max_items: Containers with more items are summarized by their length
+    :type max_items: ``int``
+    :param max_bytes: Maximal total length of captured arguments of single span. None disables the budget
+    :type max_bytes: ``int``
+    :param defer: Format immutable values on the export thread
+    :type defer: ``bool``
+    :param summarizers: Dictionary of type and function, which returns summary of value of this type
+    :type summarizers: ``dict``
+    """
+
+    def __init__(self, max_length=DEFAULT_MAX_LENGTH, max_items=DEFAULT_MAX_ITEMS,  # pylint: disable=too-many-arguments
+                 max_bytes=DEFAULT_MAX_BYTES, defer=True, summarizers=None):
+        self.max_length = max_length
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.defer = defer
+        self.summarizers = dict(summarizers or {})
+
+    @property
+    def max_length(self):
+        """
+        Maximal length of single formatted value
+        """
+        return self._max_length
+
+    @max_length.setter
+    def max_length(self, value):
+        self._max_length = value
+        limit = value if value is not None else 1 << 30
+
+        # Bounded representation of small containers, so nested objects don't have to be formatted in full
+        self._repr = reprlib.Repr()
+        self._repr.maxlevel = 3
+        self._repr.maxstring = limit
+        self._repr.maxother = limit
+        self._repr.maxlong = limit
+
+    def register_summarizer(self, kind, summarizer):
+        """
+        Register summarizer for `kind` and its subclasses
+
+        :param kind: Type of summarized values
+        :type kind: ``type``
+        :param summarizer: Function which takes value and returns its summary
+        :type summarizer: ``callable``
+        """
+        self.summarizers[kind] = summarizer
+
+    def format(self, value):
+        """
+        Format value according to the policy. It's called before the instrumented function,
+        so it never raises, values which can't be formatted are reported as ``<unprintable type>``
+
+        :returns: Formatted value or `LazyString` if formatting is deferred
+        """
+        kind = type(value)
+
+        if self.summarizers:
+            for base in kind.__mro__:
+                summarizer = self.summarizers.get(base)
+                if summarizer is not None:
+                    try:
+                        return _format(summarizer(value), self.max_length)
+                    except Exception:  # pylint: disable=broad-except
+                        return '<unprintable {}>'.format(kind.__name__)
+
+        if kind in IMMUTABLE_TYPES:
+            if self.defer:
+                return LazyString(value, self.max_length)
+            return _format(value, self.max_length)
+
+        shape = array_shape(value)
+        if shape is not None:
+            try:
+                return _format(summarize_array(value, shape), self.max_length)
+            except Exception:  # pylint: disable=broad-except
+                return '<unprintable {}>'.format(kind.__name__)
+
+        if isinstance(value, _CONTAINER_TYPES):
+            if self.max_items is not None and len(value) > self.max_items:
+                return summarize_container(value)
+            try:
+                return truncate(self._repr.repr(value), self.max_length)
+            except Exception:  # pylint: disable=broad-except
+                return '<unprintable {}>'.format(kind.__name__)
+
+        return _format(value, self.max_length)
+
+    def capture(self, span, arguments):
+        """
+        Set captured arguments as `kwarg.<name>` tags of `span`
+
+        :param span: Span of instrumented function
+        :type span: ``opentracing.Span``
+        :param arguments: Dictionary of argument name and value
+        :type arguments: ``dict``
+        """
+        budget = self.max_bytes
+        dropped = 0
+
+        for name, value in arguments.items():
+            if budget is not None and budget <= 0:
+                dropped += 1
+                continue
+
+            formatted = self.format(value)
+            size = formatted.size if isinstance(formatted, LazyString) else len(formatted)
+
+            if budget is not None:
+                if size > budget:
+                    dropped += 1
+                    continue
+                budget -= size
+
+            span.set_tag('kwarg.{0}'.format(name), formatted)
+
+        if dropped:
+            span.set_tag('dropped_arguments', dropped)
+
+
+POLICY = CapturePolicy()
+
+
+def configure_capture(max_length=None, max_items=None, max_bytes=None, defer=None):
+    """
+    Configure default capture policy. It affects already instrumented functions as well.
+    See `CapturePolicy` for details about parameters. Parameters which are None are not changed
+    """
+    if max_length is not None:
+        POLICY.max_length = max_length
+    if max_items is not None:
+        POLICY.max_items = max_items
+    if max_bytes is not None:
+        POLICY.max_bytes = max_bytes
+    if defer is not None:
+        POLICY.defer = defer
+
+
+def register_summarizer(kind, summarizer):
+    """
+    Register summarizer in default capture policy. See `CapturePolicy.register_summarizer`
+    """
+    POLICY.register_summarizer(kind, summarizer)
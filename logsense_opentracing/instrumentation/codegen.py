@@ -0,0 +1,277 @@
+"""
+Signature-exact wrappers
+
+Wrappers built by `instrumentation` accept ``*args, **kwargs`` and on every call they map positional arguments back
+to their names using `inspect`. Wrappers built here are generated from source and compiled, so they have exactly the
+same signature as the wrapped function. Captured arguments are plain local reads and the call is forwarded
+without repacking arguments. It also works correctly for static and class methods.
+
+Signature-exact wrappers are opt-in::
+
+    from logsense_opentracing.instrumentation import patch_single, ALL_ARGS
+
+    patch_single('tests.resources.regular_function', arguments=ALL_ARGS, exact_signature=True)
+
+Generated code is cached per code object, so patching the same function again (e.g. by subsequent `patch_module`
+calls) reuses already compiled wrapper
+"""
+import logging
+import inspect
+import functools
+import weakref
+
+import opentracing
+
+from .utils import ALL_ARGS
+from .registry import STATE
+from .capture import POLICY as CAPTURE_POLICY
+from ..exception_capture import log_exception
+from . import adaptive
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+# Names used by generated code. Functions which have parameters with this prefix are not supported
+RESERVED_PREFIX = '_logsense_'
+
+# Compiled wrapper factories: code object -> {variant: factory}
+_FACTORIES = weakref.WeakKeyDictionary()
+
+_FACTORY_TEMPLATE = '''\
+def _logsense_factory(_logsense_function, _logsense_before, _logsense_after, _logsense_operation_name,
+                      _logsense_opentracing, _logsense_log, _logsense_state, _logsense_stats, _logsense_policy,
+                      _logsense_log_exception):
+    {async_}def _logsense_wrapper({signature}):
+        if not _logsense_state.enabled{skip}:
+            return {await_}_logsense_function({direct_call})
+{entered}\
+        with _logsense_opentracing.tracer.start_active_span(_logsense_operation_name) as _logsense_scope:
+            _logsense_span = _logsense_scope.span
+{body}
+{record}\
+        return _logsense_result
+    return _logsense_wrapper
+'''
+
+# Adaptive instrumentation (see `adaptive` module)
+_ADAPTIVE_SKIP = ' or (_logsense_stats.mode != {trace!r} and not _logsense_stats.should_trace())'.format(
+    trace=adaptive.TRACE
+    )
+_ADAPTIVE_ENTERED = '        _logsense_entered = _logsense_stats.perf_counter()\n'
+_ADAPTIVE_CALLED = '            _logsense_called = _logsense_stats.perf_counter()\n'
+_ADAPTIVE_RETURNED = '            _logsense_returned = _logsense_stats.perf_counter()\n'
+_ADAPTIVE_RECORD = '''\
+        _logsense_stats.record(_logsense_entered, _logsense_called, _logsense_returned, _logsense_stats.perf_counter())
+'''
+
+_BEFORE_TEMPLATE = '''\
+            _logsense_args, _logsense_kwargs = ({positional}), {{{keywords}}}
+            try:
+                _logsense_args, _logsense_kwargs = _logsense_before(_logsense_scope, *_logsense_args, **_logsense_kwargs)
+            except Exception as _logsense_exception:  # pylint: disable=broad-except
+                _logsense_log.warning(_logsense_exception)
+'''
+
+_CALL_TEMPLATE = '''\
+            _logsense_span.set_tag('error', False)
+{called}\
+            try:
+                _logsense_result = {await_}_logsense_function({call})
+            except Exception as _logsense_exception:
+                _logsense_log_exception(_logsense_span, _logsense_exception)
+{after_error}\
+                raise
+{returned}\
+{after_success}\
+'''
+
+_CAPTURE_TEMPLATE = '''\
+            _logsense_policy.capture(_logsense_span, {{{arguments}}})
+'''
+
+_AFTER_ERROR_TEMPLATE = '''\
+                _logsense_after(_logsense_scope, None{call}, error=True)
+'''
+
+_AFTER_SUCCESS_TEMPLATE = '''\
+            _logsense_after(_logsense_scope, _logsense_result{call}, error=False)
+'''
+
+
+def supports_exact_signature(function):
+    """
+    Check if signature-exact wrapper can be generated for `function`
+
+    :param function: Function to check
+    :type function: ``callable``
+
+    :returns: True if `function` is plain python function (not a generator) and doesn't use reserved names
+    """
+    if not inspect.isfunction(function):
+        return False
+
+    # Generators need wrappers which follow iteration, see `generator_instrumentation`
+    if inspect.isgeneratorfunction(function) or inspect.isasyncgenfunction(function):
+        return False
+
+    return not any(name.startswith(RESERVED_PREFIX) for name in _parameters(function.__code__))
+
+
+def exact_instrumentation(function, before=None, after=None, arguments=None, capture=None):
+    """
+    Wraps `function` as opentracing span using generated wrapper with the same signature as `function`.
+    See `_instrumentation` for details about parameters
+
+    :param function: Function which is going to be patched
+    :type function: ``callable``
+
+    :returns: Wrapped function
+    """
+    arguments = arguments if arguments is not None else []
+    code = function.__code__
+
+    named = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+    captured = tuple(name for name in named if arguments is ALL_ARGS or name in arguments)
+    # True captures all keyword arguments, tuple only the listed ones
+    capture_keywords = False
+    if code.co_flags & inspect.CO_VARKEYWORDS:
+        capture_keywords = True if arguments is ALL_ARGS else tuple(name for name in arguments if name not in named)
+    variant = (
+        captured,
+        capture_keywords,
+        before is not None,
+        after is not None,
+        inspect.iscoroutinefunction(function),
+        adaptive.CONFIG.enabled
+    )
+
+    factories = _FACTORIES.get(code)
+    if factories is None:
+        factories = _FACTORIES[code] = {}
+
+    factory = factories.get(variant)
+    if factory is None:
+        log.debug('Generating wrapper for %s', function)
+        factory = factories[variant] = _compile_factory(code, *variant)
+
+    operation_name = '{0}.{1}'.format(function.__module__, function.__name__)
+    stats = adaptive.track(operation_name)
+    wrapper = factory(
+        function,
+        before,
+        after,
+        operation_name,
+        opentracing,
+        log,
+        STATE,
+        stats,
+        capture if capture is not None else CAPTURE_POLICY,
+        log_exception
+        )
+
+    if stats is not None:
+        stats.wrapper = wrapper
+
+    # Wrapper is generated with placeholders, so defaults are always taken from wrapped function
+    wrapper.__defaults__ = function.__defaults__
+    wrapper.__kwdefaults__ = function.__kwdefaults__
+    return functools.update_wrapper(wrapper, function)
+
+
+def _parameters(code):
+    """
+    Names of all parameters declared by code object, including ``*args`` and ``**kwargs``
+    """
+    count = code.co_argcount + code.co_kwonlyargcount
+    count += bool(code.co_flags & inspect.CO_VARARGS)
+    count += bool(code.co_flags & inspect.CO_VARKEYWORDS)
+    return code.co_varnames[:count]
+
+
+def _compile_factory(code, captured, capture_keywords, before, after,  # pylint: disable=too-many-arguments,too-many-locals
+                     is_async, is_adaptive):
+    """
+    Generate and compile wrapper factory for given code object and wrapper variant
+    """
+    names = code.co_varnames
+    positional = list(names[:code.co_argcount])
+    kwonly = list(names[code.co_argcount:code.co_argcount + code.co_kwonlyargcount])
+    index = code.co_argcount + code.co_kwonlyargcount
+
+    varargs = None
+    if code.co_flags & inspect.CO_VARARGS:
+        varargs = names[index]
+        index += 1
+
+    varkw = names[index] if code.co_flags & inspect.CO_VARKEYWORDS else None
+
+    # Every parameter gets `None` placeholder as default value. Real defaults are assigned to the wrapper later,
+    # so parameters without defaults are still required
+    signature = ['{}=None'.format(name) for name in positional]
+    # Positional-only parameters exist since Python 3.8
+    posonly = getattr(code, 'co_posonlyargcount', 0)
+    if posonly:
+        signature.insert(posonly, '/')
+
+    if varargs is not None:
+        signature.append('*{}'.format(varargs))
+    elif kwonly:
+        signature.append('*')
+
+    signature.extend('{}=None'.format(name) for name in kwonly)
+
+    if varkw is not None:
+        signature.append('**{}'.format(varkw))
+
+    call_positional = positional + (['*{}'.format(varargs)] if varargs is not None else [])
+    call_keywords = ['{0}={0}'.format(name) for name in kwonly] + (['**{}'.format(varkw)] if varkw is not None else [])
+
+    body = []
+    if before:
+        body.append(_BEFORE_TEMPLATE.format(
+            positional=''.join('{}, '.format(name) for name in call_positional),
+            keywords=', '.join(
+                ["'{0}': {0}".format(name) for name in kwonly] +
+                (['**{}'.format(varkw)] if varkw is not None else [])
+                )
+            ))
+        call = ['*_logsense_args', '**_logsense_kwargs']
+    else:
+        call = call_positional + call_keywords
+
+    # All captured arguments are formatted at once by capture policy
+    captured_arguments = ["'{0}': {0}".format(name) for name in captured]
+    if capture_keywords is True:
+        captured_arguments.append('**{}'.format(varkw))
+    elif capture_keywords:
+        captured_arguments.append(
+            '**{{_logsense_name: {0}[_logsense_name] for _logsense_name in {1!r} if _logsense_name in {0}}}'.format(
+                varkw, capture_keywords
+                )
+            )
+    if captured_arguments:
+        body.append(_CAPTURE_TEMPLATE.format(arguments=', '.join(captured_arguments)))
+
+    body.append(_CALL_TEMPLATE.format(
+        await_='await ' if is_async else '',
+        call=', '.join(call),
+        called=_ADAPTIVE_CALLED if is_adaptive else '',
+        returned=_ADAPTIVE_RETURNED if is_adaptive else '',
+        after_error=_AFTER_ERROR_TEMPLATE.format(call=''.join(', ' + item for item in call)) if after else '',
+        after_success=_AFTER_SUCCESS_TEMPLATE.format(call=''.join(', ' + item for item in call)) if after else ''
+        ))
+
+    source = _FACTORY_TEMPLATE.format(
+        async_='async ' if is_async else '',
+        await_='await ' if is_async else '',
+        direct_call=', '.join(call_positional + call_keywords),
+        skip=_ADAPTIVE_SKIP if is_adaptive else '',
+        entered=_ADAPTIVE_ENTERED if is_adaptive else '',
+        record=_ADAPTIVE_RECORD if is_adaptive else '',
+        signature=', '.join(signature),
+        body=''.join(body)
+        )
+
+    namespace = {}
+    exec(compile(source, '<logsense wrapper {}>'.format(code.co_name), 'exec'), namespace)  # pylint: disable=exec-used
+    return namespace['_logsense_factory']
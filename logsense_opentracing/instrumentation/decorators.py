@@ -179,10 +179,10 @@ Async non-flat decorator example::
         wait_on_tracer()
 """
 import logging
-import functools
 
 from .utils import get_obj_from_path
-from .general import instrumentation, async_instrumentation
+from .registry import apply_patch
+from .general import instrumentation, coroutine_instrumentation
 
 
 log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
@@ -214,31 +214,26 @@ def _build_decorator(decorator, only_decorated, **kwargs):
 
 def _build_async_decorator(decorator, only_decorated, **kwargs):
     """
-    Build async decorator
+    Build async decorator. Instrumentation is done once per decoration, as in `_build_decorator`
 
     :param decorator: Decorator which is base for returned decorator
     :type decorator: ``callable`
     :param only_decorated: Decorate only function if True, otherwise decorator which function
     :type only_decorated: ``bool``
     """
-    def flat_decorator(decorated_function):
-
-        @functools.wraps(flat_decorator)
-        async def new_decorator(*argz, **kwargz):
-            if only_decorated is True:
-                return await decorator(await async_instrumentation(
-                    decorated_function,
-                    **kwargs
-                    ))(*argz, **kwargz)
-
-            return await (await async_instrumentation(
-                decorator(decorated_function),
+    def new_decorator(decorated_function):
+        if only_decorated is True:
+            return decorator(coroutine_instrumentation(
+                decorated_function,
                 **kwargs
-                ))(*argz, **kwargz)
+                ))
 
-        return new_decorator
+        return coroutine_instrumentation(
+            decorator(decorated_function),
+            **kwargs
+            )
 
-    return flat_decorator
+    return new_decorator
 
 
 def _decorator_instrumentation(decorator, flat=False, **kwargs):
@@ -300,7 +295,7 @@ def patch_decorator(module, **kwargs):
     """
     path, name, old_function = get_obj_from_path(module)
 
-    setattr(path, name, _decorator_instrumentation(
+    apply_patch(path, name, _decorator_instrumentation(
         old_function,
         **kwargs
         ))
@@ -319,7 +314,7 @@ def patch_async_decorator(decorator, **kwargs):
     """
     path, name, old_function = get_obj_from_path(decorator)
 
-    setattr(path, name, _async_decorator_instrumentation(
+    apply_patch(path, name, _async_decorator_instrumentation(
         old_function,
         **kwargs
         ))
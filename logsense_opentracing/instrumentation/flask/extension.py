@@ -0,0 +1,61 @@
+"""
+`Flask <https://palletsprojects.com/p/flask/>`_ extension
+
+It wraps `Flask.wsgi_app` with `TracingMiddleware`, so unlike `flask_route` it doesn't need
+`Flask.route` to be patched before routes are defined, and the span covers `before_request` hooks,
+response serialization and streaming as well::
+
+    import logging
+    from flask import Flask
+
+    from logsense_opentracing.instrumentation import FlaskTracing
+    from logsense_opentracing.utils import setup_tracer
+
+
+    app = Flask('hello-flask')
+
+    # Initialize tracer
+    setup_tracer(component='flask')
+    FlaskTracing(app)
+
+    @app.route("/sayHello/<name>")
+    def say_hello(name):
+        logging.info('User %s entered', name)
+        return 'Hello {}'.format(name)
+
+Operation name of the span is request method with matched URL rule, e.g. ``GET /sayHello/<name>``
+"""
+from ..wsgi import ENVIRON_SPAN, TracingMiddleware
+
+
+class FlaskTracing:
+    """
+    Trace every request of Flask application
+
+    :param app: Flask application, it can be also passed later to `init_app`
+    :type app: ``flask.Flask``
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Wrap WSGI application of `app` with `TracingMiddleware`
+
+        :param app: Flask application
+        :type app: ``flask.Flask``
+        """
+        app.wsgi_app = TracingMiddleware(app.wsgi_app)
+        # The first hook, so the span is named before other hooks log anything
+        app.before_request_funcs.setdefault(None, []).insert(0, self._name_span)
+
+    @staticmethod
+    def _name_span():
+        from flask import request  # Optional import, not everyone is going to install flask module
+
+        span = request.environ.get(ENVIRON_SPAN)
+        if span is not None and request.url_rule is not None:
+            span.set_tag('operation_name', '{} {}'.format(request.method, request.url_rule.rule))
+            span.set_tag('http.route', request.url_rule.rule)
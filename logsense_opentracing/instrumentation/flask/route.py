@@ -6,7 +6,8 @@ from ..utils import extract_http_carrier
 
 def flask_route(scope, *args, **kwargs):  # pylint: disable=unused-argument
     """
-    Extract information from flask request and put into opentracing scope
+    Extract information from flask request and put into opentracing scope.
+    `FlaskTracing` extension, which measures whole request, is preferred
 
     ::
 
@@ -44,7 +45,7 @@ def flask_route(scope, *args, **kwargs):  # pylint: disable=unused-argument
     """
     from flask import request  # Optional import, not everyone is going to install flask module
 
-    extract_http_carrier(request.headers)
+    extract_http_carrier(request.headers, scope.span)
 
     # Extract request information
     scope.span.set_tag('http.url', request.url)
@@ -1,5 +1,6 @@
 """
-Patching function is an easy as just using patch_single and patch_async_single functions
+Patching function is an easy as just using patch_single, patch_coroutine_single, patch_generator_single
+and patch_async_generator_single functions. None of them needs an event loop
 
 Synchronous example::
 
@@ -27,7 +28,7 @@ Asynchronous example::
 
         from asyncio import get_event_loop
         from logsense_opentracing.tracer import Tracer
-        from logsense_opentracing.instrumentation import patch_async_single
+        from logsense_opentracing.instrumentation import patch_coroutine_single
 
         async def foo():
             print('bar')
@@ -38,57 +39,117 @@ Asynchronous example::
             opentracing.tracer = tracer
 
             # Patch functions to use opentracing
-            patch_async_single('__main__.foo')
+            patch_coroutine_single('__main__.foo')
 
             # Run application
             get_event_loop().run_until_complete(foo())
 
+`patch_async_single` is a coroutine doing the same as `patch_coroutine_single`. It's kept for backward compatibility.
+
 Be aware that for decorators, you should use decorators module
 
 """
 import logging
+import inspect
 
 from .utils import get_obj_from_path
-from .general import instrumentation, async_instrumentation
+from .registry import apply_patch
+from .general import instrumentation, coroutine_instrumentation, generator_instrumentation, \
+    async_generator_instrumentation
 
 
 log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
 
 
-def patch_single(module, **kwargs):
+def patch_single(module, exact_signature=False, **kwargs):
     """
     Automatically override target module to use instrumentation.
     See `instrumentation` function for details about `kwargs`
 
     :param module: Module path to patch
     :type module: `str`
+    :param exact_signature: Use generated wrapper with the same signature as patched function.
+        Static and class methods are wrapped inside their descriptors
+    :type exact_signature: ``bool``
     """
     log.info('Patching function %s', module)
+    return _patch(module, instrumentation, exact_signature, kwargs)
 
-    path, name, old_function = get_obj_from_path(module)
 
-    patched_function = instrumentation(
-        old_function,
-        **kwargs
-        )
+def patch_coroutine_single(module, exact_signature=False, **kwargs):
+    """
+    Automatically override target coroutine function to use instrumentation.
+    See `coroutine_instrumentation` function for details about `kwargs`
 
-    setattr(path, name, patched_function)
-    return patched_function
+    :param module: Module path to patch
+    :type module: `str`
+    :param exact_signature: Use generated wrapper with the same signature as patched function.
+        Static and class methods are wrapped inside their descriptors
+    :type exact_signature: ``bool``
+    """
+    log.info('Patching async function %s', module)
+    return _patch(module, coroutine_instrumentation, exact_signature, kwargs)
+
+
+def patch_generator_single(module, exact_signature=False, **kwargs):
+    """
+    Automatically override target generator function to use instrumentation.
+    See `generator_instrumentation` function for details about `kwargs`
+
+    :param module: Module path to patch
+    :type module: `str`
+    :param exact_signature: Ignored, signature-exact wrappers aren't generated for generators
+    :type exact_signature: ``bool``
+    """
+    log.info('Patching generator %s', module)
+    return _patch(module, generator_instrumentation, exact_signature, kwargs)
+
+
+def patch_async_generator_single(module, exact_signature=False, **kwargs):
+    """
+    Automatically override target async generator function to use instrumentation.
+    See `async_generator_instrumentation` function for details about `kwargs`
+
+    :param module: Module path to patch
+    :type module: `str`
+    :param exact_signature: Ignored, signature-exact wrappers aren't generated for generators
+    :type exact_signature: ``bool``
+    """
+    log.info('Patching async generator %s', module)
+    return _patch(module, async_generator_instrumentation, exact_signature, kwargs)
 
 
 async def patch_async_single(module, **kwargs):
     """
     Automatically override target module to use instrumentation.
-    See `instrumentation` function for details about `kwargs` params
+    The same as `patch_coroutine_single`, kept for backward compatibility
 
     :param module: Module path to patch
     :type module: `str`
     """
-    log.info('Patching async function %s', module)
+    return patch_coroutine_single(module, **kwargs)
+
 
+def _patch(module, instrument, exact_signature, kwargs):
+    """
+    Wrap function at `module` path using `instrument` and register the patch
+    """
     path, name, old_function = get_obj_from_path(module)
 
-    setattr(path, name, await async_instrumentation(
+    descriptor = inspect.getattr_static(path, name, None) if exact_signature and inspect.isclass(path) else None
+    if isinstance(descriptor, (staticmethod, classmethod)):
+        apply_patch(path, name, type(descriptor)(instrument(
+            descriptor.__func__,
+            exact_signature=exact_signature,
+            **kwargs
+            )))
+        return getattr(path, name)
+
+    patched_function = instrument(
         old_function,
+        exact_signature=exact_signature,
         **kwargs
-        ))
+        )
+
+    apply_patch(path, name, patched_function)
+    return patched_function
@@ -3,22 +3,33 @@ General instrumentation functions
 """
 import logging
 import inspect
+import functools
+from time import perf_counter
 
 import opentracing
 
 from .utils import get_obj_from_path
 from .utils import ALL_ARGS
+from .codegen import exact_instrumentation, supports_exact_signature
+from .registry import STATE, forget_patch
+from .capture import POLICY as CAPTURE_POLICY
+from ..exception_capture import log_exception
+from . import adaptive
 
 
 log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
 
 
-def instrumentation(function, **kwargs):
+def instrumentation(function, exact_signature=False, **kwargs):
     """
-    Instrument given function
+    Instrument given function. Generator and async generator functions are instrumented
+    by `generator_instrumentation` and `async_generator_instrumentation`
 
     :param function: Function to instrument
     :type function: ``callable``
+    :param exact_signature: Use generated wrapper with the same signature as `function`.
+        See `codegen` module for details
+    :type exact_signature: ``bool``
 
     :returns: Wrapped function
 
@@ -28,8 +39,17 @@ def instrumentation(function, **kwargs):
         log.debug('%s already patched', function)
         return function
 
+    # Span of generator should cover iteration, not only creating generator object
+    if inspect.isgeneratorfunction(function):
+        return generator_instrumentation(function, **kwargs)
+    if inspect.isasyncgenfunction(function):
+        return async_generator_instrumentation(function, **kwargs)
+
     # Patch function and set atributes
-    result_function = _instrumentation(function=function, **kwargs)
+    if exact_signature and supports_exact_signature(function):
+        result_function = exact_instrumentation(function=function, **kwargs)
+    else:
+        result_function = _instrumentation(function=function, **kwargs)
     setattr(result_function, '_logsense_original_function', function)
     setattr(result_function, '_logsense_patched', True)
     return result_function
@@ -50,12 +70,19 @@ def remove_instrumentation(module):
         return current_function
 
     original_function = getattr(current_function, '_logsense_original_function')
-    setattr(path, name, original_function)
+
+    # Static and class methods patched with exact signature keep their descriptors
+    descriptor = inspect.getattr_static(path, name, None) if inspect.isclass(path) else None
+    if isinstance(descriptor, (staticmethod, classmethod)):
+        setattr(path, name, type(descriptor)(original_function))
+    else:
+        setattr(path, name, original_function)
+    forget_patch(path, name)
 
     return original_function
 
 
-def _instrumentation(function, before=None, after=None, arguments=None):
+def _instrumentation(function, before=None, after=None, arguments=None, capture=None):
     """
     Wraps `function` as opentracing span
 
@@ -69,84 +96,148 @@ def _instrumentation(function, before=None, after=None, arguments=None):
     :param arguments: Arguments which are going to be reported to the opentracing server.
         ALL_ARGS for reporting all arguments
     :type arguments: ``list``
+    :param capture: Policy of formatting reported arguments. Default policy is used if None
+    :type capture: ``CapturePolicy``
 
     This function is internal and shouldn't be call outside of the module
 
     """
     arguments = arguments if arguments is not None else []
-    def new_func(*args, **kwargs):
-        operation_name = '{0}.{1}'.format(
-            function.__module__,
-            function.__name__
-        )
+    policy = capture if capture is not None else CAPTURE_POLICY
+    operation_name = '{0}.{1}'.format(
+        function.__module__,
+        function.__name__
+    )
+
+    # get list of and default arguments
+    function_defaults = function.__defaults__ or []
+    function_args = inspect.getfullargspec(function)[0]
+
+    def function_call_args(args, kwargs):
+        # skip self if method is static
+        # ToDo: Improve checking if method is static or not
+        if len(args) + len(kwargs) == len(function_args) + 1:
+            args = args[1:]
+
+        # Should be class method, remove first argument
+        if function_args and function_args[0] == 'cls':
+            args = args[1:]
+
+        return args
+
+    # Call statistics for adaptive instrumentation (None if it's disabled)
+    stats = adaptive.track(operation_name)
+
+    def new_func(*args, **kwargs):  # pylint: disable=too-many-branches
+        # Tracing is disabled globally or for this call, just call the function
+        if not STATE.enabled or (stats is not None and stats.mode != adaptive.TRACE and not stats.should_trace()):
+            return function(*function_call_args(args, kwargs), **kwargs)
+
+        entered = called = returned = perf_counter() if stats is not None else None
+        try:
+            with opentracing.tracer.start_active_span(operation_name) as scope:
+
+                # Run `before` hook
+                if before is not None:
+                    try:
+                        args, kwargs = before(scope, *args, **kwargs)
+                    except Exception as exception:  # pylint: disable=broad-except
+                        log.warning(exception)
+
+                # Match args from end, because it works incorrectly for static method
+                _capture_arguments(scope.span, policy, function_args, function_defaults, arguments, args, kwargs,
+                                   from_end=True)
+
+                # execute function
+                scope.span.set_tag('error', False)
+                args = function_call_args(args, kwargs)
 
-        with opentracing.tracer.start_active_span(operation_name) as scope:
-
-            # Run `before` hook
-            if before is not None:
                 try:
-                    args, kwargs = before(scope, *args, **kwargs)
-                except Exception as exception:  # pylint: disable=broad-except
-                    log.warning(exception)
-
-            # get list of and default arguments
-            function_defaults = function.__defaults__ or []
-            function_args = inspect.getfullargspec(function)[0]
-
-            # set default arguments
-            for name, value in zip(reversed(function_args), reversed(function_defaults)):
-                if arguments is ALL_ARGS or name in arguments:
-                    scope.span.set_tag('kwarg.{0}'.format(name), str(value))
-
-            # override arguments by args
-            # Iterate from end, because it works incorrectly for static method
-            for name, value in zip(reversed(function_args), reversed(args)):
-                if arguments is ALL_ARGS or name in arguments:
-                    scope.span.set_tag('kwarg.{0}'.format(name), str(value))
-
-            # override arguments by kwargs
-            for name, value in kwargs.items():
-                if arguments is ALL_ARGS or name in arguments:
-                    scope.span.set_tag('kwarg.{0}'.format(name), str(value))
+                    if stats is not None:
+                        called = perf_counter()
+                    result = function(*args, **kwargs)
+                    if stats is not None:
+                        returned = perf_counter()
+
+                    # Run `after` hook
+                    if after is not None:
+                        after(scope, result, error=False, *args, **kwargs)
+
+                    # return result
+                    return result
+                except Exception as exception:
+                    if stats is not None:
+                        returned = perf_counter()
+                    log_exception(scope.span, exception)
+
+                    # Run `after` hook, there is no result
+                    if after is not None:
+                        after(scope, None, error=True, *args, **kwargs)
+
+                    # pass function execution exception
+                    raise exception
+        finally:
+            if stats is not None:
+                stats.record(entered, called, returned, perf_counter())
+
+    if stats is not None:
+        stats.wrapper = new_func
+    return new_func
 
-            # execute function
-            scope.span.set_tag('error', False)
+def coroutine_instrumentation(function, exact_signature=False, **kwargs):
+    """
+    Instrument given coroutine function. Wrapping doesn't need an event loop
 
-            # skip self if method is static
-            # ToDo: Improve checking if method is static or not
-            if len(args) + len(kwargs) == len(function_args) + 1:
-                args = args[1:]
+    :param function: Function to instrument
+    :type function: ``coroutine``
+    :param exact_signature: Use generated wrapper with the same signature as `function`.
+        See `codegen` module for details
+    :type exact_signature: ``bool``
 
-            # Should be class method, remove first argument
-            if function_args and function_args[0] == 'cls':
-                args = args[1:]
+    :returns: Wrapped function
 
-            try:
-                result = function(*args, **kwargs)
+    """
+    # If function is already instrumented, just returns it
+    if hasattr(function, '_logsense_patched'):
+        log.debug('%s already patched', function)
+        return function
 
-                # Run `after` hook
-                if after is not None:
-                    after(scope, result, error=False, *args, **kwargs)
+    # Patch function and set atributes
+    if exact_signature and supports_exact_signature(function):
+        result_function = exact_instrumentation(function=function, **kwargs)
+    else:
+        result_function = _coroutine_instrumentation(function=function, **kwargs)
+    setattr(result_function, '_logsense_original_function', function)
+    setattr(result_function, '_logsense_patched', True)
+    return result_function
 
-                # return result
-                return result
-            except Exception as exception:
-                scope.span.set_tag('error', True)
 
-                # Run `after` hook
-                if after is not None:
-                    after(scope, result, error=True, *args, **kwargs)
+async def async_instrumentation(function, exact_signature=False, **kwargs):
+    """
+    Instrument given async function. Kept for backward compatibility, use `coroutine_instrumentation` instead
+
+    :param function: Function to instrument
+    :type function: ``coroutine``
+    :param exact_signature: Use generated wrapper with the same signature as `function`.
+        See `codegen` module for details
+    :type exact_signature: ``bool``
+
+    """
+    return coroutine_instrumentation(function, exact_signature=exact_signature, **kwargs)
 
-                # pass function execution exception
-                raise exception
-    return new_func
 
-async def async_instrumentation(function, **kwargs):
+def generator_instrumentation(function, exact_signature=False, **kwargs):  # pylint: disable=unused-argument
     """
-    Instrument given async function
+    Instrument given generator function. Span is started by the first `next()` and covers whole iteration.
+    It's finished when generator is exhausted, raises an exception or is closed. Items aren't buffered.
+    Number of yielded items and time to the first item are reported as `yield_count`
+    and `time_to_first_item_us` tags.
+    Signature-exact wrappers aren't generated for generators, so `exact_signature` is ignored
 
     :param function: Function to instrument
-    :type function: ``coroutine``
+    :type function: ``callable``
+
+    :returns: Wrapped function
 
     """
     # If function is already instrumented, just returns it
@@ -154,13 +245,74 @@ async def async_instrumentation(function, **kwargs):
         log.debug('%s already patched', function)
         return function
 
-    # Patch function and set atributes
-    result_function = await _async_instrumentation(function=function, **kwargs)
+    result_function = _generator_instrumentation(function=function, **kwargs)
+    setattr(result_function, '_logsense_original_function', function)
+    setattr(result_function, '_logsense_patched', True)
+    return result_function
+
+
+def async_generator_instrumentation(function, exact_signature=False, **kwargs):  # pylint: disable=unused-argument
+    """
+    Instrument given async generator function. The same as `generator_instrumentation`, but for async generators.
+    Signature-exact wrappers aren't generated for generators, so `exact_signature` is ignored
+
+    :param function: Function to instrument
+    :type function: ``callable``
+
+    :returns: Wrapped function
+
+    """
+    # If function is already instrumented, just returns it
+    if hasattr(function, '_logsense_patched'):
+        log.debug('%s already patched', function)
+        return function
+
+    result_function = _async_generator_instrumentation(function=function, **kwargs)
     setattr(result_function, '_logsense_original_function', function)
     setattr(result_function, '_logsense_patched', True)
     return result_function
 
-async def _async_instrumentation(function, before=None, arguments=None):
+
+def _capture_arguments(span, policy, function_args, function_defaults,  # pylint: disable=too-many-arguments
+                       arguments, args, kwargs, from_end=False):
+    """
+    Report default arguments, args and kwargs which are listed in `arguments` as span tags.
+    Every argument is formatted once, according to capture `policy`. See `capture` module for details
+
+    :param from_end: Match positional arguments with names from the end (for methods called without self)
+    :type from_end: ``bool``
+    """
+    if not arguments:
+        return
+
+    captured = {}
+
+    # set default arguments
+    for name, value in zip(function_args[len(function_args) - len(function_defaults):], function_defaults):
+        if arguments is ALL_ARGS or name in arguments:
+            captured[name] = value
+
+    # override arguments by args
+    if from_end:
+        names = function_args[max(0, len(function_args) - len(args)):]
+        args = args[max(0, len(args) - len(function_args)):]
+    else:
+        names = function_args
+
+    for name, value in zip(names, args):
+        if arguments is ALL_ARGS or name in arguments:
+            captured[name] = value
+
+    # override arguments by kwargs
+    for name, value in kwargs.items():
+        if arguments is ALL_ARGS or name in arguments:
+            captured[name] = value
+
+    if captured:
+        policy.capture(span, captured)
+
+
+def _coroutine_instrumentation(function, before=None, arguments=None, capture=None):
     """
     Wraps `function` as opentracing span
 
@@ -168,21 +320,30 @@ async def _async_instrumentation(function, before=None, arguments=None):
     :type function: ``callable``
     :param before: Function which is going to be run before executing function. It's executed in tracer scope
     :type before: ``callable``
-    :param after: Function which is going to be run after executing function.
-        It's executed in tracer scope. It's called even if function throw exception
-    :type after: ``callable``
     :param arguments: Arguments which are going to be reported to the opentracing server.
         ALL_ARGS for reporting all arguments
     :type arguments: ``list``
+    :param capture: Policy of formatting reported arguments. Default policy is used if None
+    :type capture: ``CapturePolicy``
 
     This function is internal and shouldn't be call outside of the module
     """
     arguments = arguments if arguments is not None else []
+    policy = capture if capture is not None else CAPTURE_POLICY
+    operation_name = '{0}.{1}'.format(
+        function.__module__,
+        function.__name__
+    )
+
+    # get list of and default arguments
+    function_defaults = function.__defaults__ or []
+    function_args = inspect.getfullargspec(function)[0]
+
+    @functools.wraps(function)
     async def new_func(*args, **kwargs):
-        operation_name = '{0}.{1}'.format(
-            function.__module__,
-            function.__name__
-        )
+        # Tracing is disabled globally, just call the function
+        if not STATE.enabled:
+            return await function(*args, **kwargs)
 
         with opentracing.tracer.start_active_span(operation_name) as scope:
 
@@ -190,30 +351,156 @@ async def _async_instrumentation(function, before=None, arguments=None):
             if before is not None:
                 before(scope, *args, **kwargs)
 
-            # get list of and default arguments
-            function_defaults = function.__defaults__ or []
-            function_args = inspect.getfullargspec(function)[0]
-
-            # set default arguments
-            for name, value in zip(reversed(function_args), reversed(function_defaults)):
-                if name in arguments:
-                    scope.span.set_tag('kwarg.{0}'.format(name), str(value))
-
-            # override arguments by args
-            for name, value in zip(function_args, args):
-                if name in arguments:
-                    scope.span.set_tag('kwarg.{0}'.format(name), str(value))
-
-            # override arguments by kwargs
-            for name, value in kwargs.items():
-                if name in arguments:
-                    scope.span.set_tag('kwarg.{0}'.format(name), str(value))
+            _capture_arguments(scope.span, policy, function_args, function_defaults, arguments, args, kwargs)
 
             # execute function
             scope.span.set_tag('error', False)
             try:
                 return await function(*args, **kwargs)
             except Exception as exception:
-                scope.span.set_tag('error', True)
+                log_exception(scope.span, exception)
                 raise exception
     return new_func
+
+
+def _generator_instrumentation(function, before=None, after=None, arguments=None, capture=None):
+    """
+    Wraps generator `function` as opentracing span. Span is finished when generator is exhausted,
+    raises an exception or is closed. `after` hook gets generator's return value as result
+
+    See `_instrumentation` for details about parameters.
+    This function is internal and shouldn't be call outside of the module
+    """
+    arguments = arguments if arguments is not None else []
+    policy = capture if capture is not None else CAPTURE_POLICY
+    operation_name = '{0}.{1}'.format(
+        function.__module__,
+        function.__name__
+    )
+
+    # get list of and default arguments
+    function_defaults = function.__defaults__ or []
+    function_args = inspect.getfullargspec(function)[0]
+
+    def new_func(*args, **kwargs):  # pylint: disable=too-many-branches
+        # Tracing is disabled globally, just delegate to the generator
+        if not STATE.enabled:
+            return (yield from function(*args, **kwargs))
+
+        with opentracing.tracer.start_active_span(operation_name) as scope:
+
+            # Run `before` hook
+            if before is not None:
+                before(scope, *args, **kwargs)
+
+            _capture_arguments(scope.span, policy, function_args, function_defaults, arguments, args, kwargs)
+            scope.span.set_tag('error', False)
+
+            generator = function(*args, **kwargs)
+            started = perf_counter()
+            count = 0
+            result = None
+
+            # `yield from` can't count items, so `send`, `throw` and `close` are passed manually
+            try:
+                try:
+                    value = next(generator)
+                    scope.span.set_tag('time_to_first_item_us', int((perf_counter() - started) * 1e6))
+                    while True:
+                        count += 1
+                        try:
+                            sent = yield value
+                        except GeneratorExit:
+                            generator.close()
+                            raise
+                        except BaseException as exception:  # pylint: disable=broad-except
+                            value = generator.throw(exception)
+                        else:
+                            value = generator.send(sent)
+                except StopIteration as stop:
+                    result = stop.value
+            except Exception as exception:
+                log_exception(scope.span, exception)
+
+                # Run `after` hook
+                if after is not None:
+                    after(scope, result, error=True, *args, **kwargs)
+                raise
+            finally:
+                scope.span.set_tag('yield_count', count)
+
+            # Run `after` hook
+            if after is not None:
+                after(scope, result, error=False, *args, **kwargs)
+
+            return result
+    return new_func
+
+
+def _async_generator_instrumentation(function, before=None, after=None, arguments=None, capture=None):
+    """
+    Wraps async generator `function` as opentracing span. Span is finished when generator is exhausted,
+    raises an exception or is closed. `after` hook gets None as result
+
+    See `_instrumentation` for details about parameters.
+    This function is internal and shouldn't be call outside of the module
+    """
+    arguments = arguments if arguments is not None else []
+    policy = capture if capture is not None else CAPTURE_POLICY
+    operation_name = '{0}.{1}'.format(
+        function.__module__,
+        function.__name__
+    )
+
+    # get list of and default arguments
+    function_defaults = function.__defaults__ or []
+    function_args = inspect.getfullargspec(function)[0]
+
+    async def new_func(*args, **kwargs):  # pylint: disable=too-many-branches,too-many-statements
+        generator = function(*args, **kwargs)
+        scope = None
+
+        # Trace only if tracing is enabled globally
+        if STATE.enabled:
+            scope = opentracing.tracer.start_active_span(operation_name)
+
+            # Run `before` hook
+            if before is not None:
+                before(scope, *args, **kwargs)
+
+            _capture_arguments(scope.span, policy, function_args, function_defaults, arguments, args, kwargs)
+            scope.span.set_tag('error', False)
+
+        started = perf_counter()
+        count = 0
+
+        # Async generators can't use `yield from`, so `asend`, `athrow` and `aclose` are passed manually
+        try:
+            value = await generator.__anext__()
+            if scope is not None:
+                scope.span.set_tag('time_to_first_item_us', int((perf_counter() - started) * 1e6))
+            while True:
+                count += 1
+                try:
+                    sent = yield value
+                except GeneratorExit:
+                    await generator.aclose()
+                    raise
+                except BaseException as exception:  # pylint: disable=broad-except
+                    value = await generator.athrow(exception)
+                else:
+                    value = await generator.asend(sent)
+        except StopAsyncIteration:
+            if scope is not None and after is not None:
+                after(scope, None, error=False, *args, **kwargs)
+        except Exception as exception:
+            if scope is not None:
+                log_exception(scope.span, exception)
+                if after is not None:
+                    after(scope, None, error=True, *args, **kwargs)
+            raise
+        finally:
+            if scope is not None:
+                scope.span.set_tag('yield_count', count)
+                scope.close()
+    return new_func
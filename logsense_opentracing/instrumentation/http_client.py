@@ -0,0 +1,117 @@
+"""
+Client spans of asynchronous HTTP clients (see `aiohttp` and `httpx` integrations)
+
+Client span is started when request is sent, but it isn't activated, because callbacks of HTTP clients
+aren't run in the frame of the request. It's finished when response headers are received, so reading
+the response body isn't measured. Phases of the request are logged as span logs with `duration_us`:
+
+    * ``connection_acquire`` - from the start of the request until connection is ready
+      (`reused` tells if it was taken from the pool)
+    * ``dns`` - host name resolution (aiohttp only, httpx reports it as part of connecting)
+    * ``ttfb`` - from sending request headers until response headers are received (time to first byte)
+"""
+import time
+
+import opentracing
+
+from ..exception_capture import log_exception
+
+
+def start_client_span(method, url, headers):
+    """
+    Start client span of request and inject its context into request's headers in place
+
+    :param method: HTTP method
+    :type method: ``str``
+    :param url: Requested URL
+    :type url: ``str``
+    :param headers: Mutable headers of the request
+    :type headers: ``dict``
+
+    :returns: Started span
+    """
+    span = opentracing.tracer.start_span('HTTP {}'.format(method), tags={
+        'span.kind': 'client',
+        'http.method': method,
+        'http.url': url
+    })
+    span.set_tag('error', False)
+    opentracing.tracer.inject(span, opentracing.propagation.Format.HTTP_HEADERS, headers)
+    return span
+
+
+class ClientTimings:
+    """
+    Request phases of single client span
+
+    :param span: Client span
+    :type span: ``opentracing.Span``
+    """
+    __slots__ = ['span', 'started', 'dns_started', 'headers_sent', 'connected']
+
+    def __init__(self, span):
+        self.span = span
+        self.started = time.perf_counter()
+        self.dns_started = None
+        self.headers_sent = None
+        self.connected = False
+
+    def _log(self, event, started, **kwargs):
+        now = time.perf_counter()
+        self.span.log_kv(dict(kwargs, event=event, duration_us=int((now - started) * 1e6)))
+        return now
+
+    def connection_ready(self, reused):
+        """
+        Connection was created or taken from the pool
+        """
+        if not self.connected:
+            self.connected = True
+            self._log('connection_acquire', self.started, reused=reused)
+
+    def dns_start(self):
+        """
+        Host name resolution started
+        """
+        self.dns_started = time.perf_counter()
+
+    def dns_end(self):
+        """
+        Host name resolution finished
+        """
+        if self.dns_started is not None:
+            self._log('dns', self.dns_started)
+
+    def request_headers_sent(self):
+        """
+        Request headers are going to be sent
+        """
+        # Connection wasn't reported as created, so it was reused
+        self.connection_ready(reused=True)
+        self.headers_sent = time.perf_counter()
+
+    def response_headers_received(self):
+        """
+        Response headers have been received
+        """
+        self._log('ttfb', self.headers_sent if self.headers_sent is not None else self.started)
+
+
+def finish_client_span(span, status_code=None, exception=None):
+    """
+    Tag client span with response status or exception and finish it
+
+    :param span: Client span
+    :type span: ``opentracing.Span``
+    :param status_code: Response status, None if request failed
+    :type status_code: ``int``
+    :param exception: Exception which failed the request
+    :type exception: ``BaseException``
+    """
+    if exception is not None:
+        log_exception(span, exception)
+    if status_code is not None:
+        span.set_tag('http.status_code', status_code)
+        if status_code >= 500:
+            span.set_tag('error', True)
+    span.finish()
@@ -0,0 +1,86 @@
+"""
+`HTTPX <https://www.python-httpx.org/>`_ client integration
+
+Requests of `httpx.AsyncClient` are traced by transport wrapper::
+
+    import httpx
+    import opentracing
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation import TracingAsyncTransport
+
+    setup_tracer(component='httpx client')
+
+    async def main():
+        async with httpx.AsyncClient(transport=TracingAsyncTransport()) as client:
+            with opentracing.tracer.start_active_span('parent-span'):
+                await client.get('http://localhost:8888/')
+
+Every request gets client span (see `http_client`). Timings are taken from httpcore's `trace` request extension,
+trace callback set by application is still called
+"""
+from ..http_client import start_client_span, finish_client_span, ClientTimings
+
+
+class TracingAsyncTransport:
+    """
+    Transport which traces requests sent by wrapped transport
+
+    :param transport: Wrapped transport. `httpx.AsyncHTTPTransport` is used if None
+    :type transport: ``httpx.AsyncBaseTransport``
+    """
+
+    def __init__(self, transport=None):
+        if transport is None:
+            import httpx  # Optional import, not everyone is going to install httpx module
+            transport = httpx.AsyncHTTPTransport()
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        """
+        Send request by wrapped transport in client span
+        """
+        span = start_client_span(request.method, str(request.url), request.headers)
+        timings = ClientTimings(span)
+        previous_trace = request.extensions.get('trace')
+
+        async def trace(event_name, info):
+            if event_name.endswith('.connect_tcp.complete'):
+                timings.connection_ready(reused=False)
+            elif event_name.endswith('.send_request_headers.started'):
+                timings.request_headers_sent()
+            elif event_name.endswith('.receive_response_headers.complete'):
+                timings.response_headers_received()
+
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions['trace'] = trace
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException as exception:
+            # Cancelled requests (e.g. timed out by `asyncio.wait_for`) are finished as well
+            finish_client_span(span, exception=exception)
+            raise
+        finally:
+            # Request can be sent again (e.g. by retrying application), it shouldn't be traced twice
+            if previous_trace is None:
+                request.extensions.pop('trace', None)
+            else:
+                request.extensions['trace'] = previous_trace
+
+        finish_client_span(span, status_code=response.status_code)
+        return response
+
+    async def aclose(self):
+        """
+        Close wrapped transport
+        """
+        await self.transport.aclose()
+
+    async def __aenter__(self):
+        await self.transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.transport.__aexit__(*args)
@@ -0,0 +1,192 @@
+"""
+Lazy module patching
+
+`patch_module` imports target module eagerly and walks all its submodules at once.
+For big applications it takes a lot of time during startup, even if most of submodules are never used.
+Import hook patches modules matching `include_paths` and `exclude_paths` only when they are imported
+for the first time, so startup cost is proportional to what application actually imports::
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation.import_hook import install_import_hook
+
+    setup_tracer(component='lazy')
+
+    # Patch `my_application` and its submodules when they are imported
+    install_import_hook(include_paths=('my_application',))
+
+    import my_application
+
+Modules which were imported before installing the hook are patched immediately.
+Patching time of every module is available as `LazyPatchFinder.timings`.
+
+Unlike `patch_module`, empty `include_paths` match no module, so the hook never patches the whole
+interpreter (standard library included). With `local_modules` enabled, modules located in current
+working directory are patched as well, in the same way as `patch_module` patches them.
+
+For `logsense-tracer` lazy patching is enabled by `LOGSENSE_LAZY_PATCHING` environmental variable
+"""
+import sys
+import time
+import logging
+import importlib.abc
+
+from .modules import patch_module, is_local_module
+from .matcher import PathMatcher
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+
+class _PatchingLoader(importlib.abc.Loader):
+    """
+    Loader which executes module using original loader and patches it afterwards
+    """
+
+    def __init__(self, loader, finder):
+        self._loader = loader
+        self._finder = finder
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._loader.exec_module(module)
+        self._finder.patch(module.__name__)
+
+    def __getattr__(self, name):
+        # Delegate everything else (get_data, get_source, is_package...) to original loader
+        return getattr(self._loader, name)
+
+
+class LazyPatchFinder(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder which wraps loaders of matching modules, so they are patched right after import.
+    See `patch_module` for details about parameters
+
+    :param include_paths: Paths which should be patched. Nothing matches if empty
+    :type include_paths: ``tuple``
+    :param local_modules: Patch also modules located in current working directory
+    :type local_modules: ``bool``
+    """
+
+    def __init__(self, include_paths=None, exclude_paths=None, local_modules=False, **kwargs):
+        self._include_paths = () if include_paths is None else tuple(include_paths)
+        self._exclude_paths = ('logsense_opentracing', *(exclude_paths or ()))
+        self._matcher = PathMatcher(include_paths=self._include_paths, exclude_paths=self._exclude_paths)
+        self._excluded = PathMatcher(exclude_paths=self._exclude_paths)
+        self._local_modules = local_modules
+        # Top level module name -> True if it's located in current working directory
+        self._local = {}
+        self._kwargs = kwargs
+        self._visited = set()
+
+        # Module name -> patching time in seconds
+        self.timings = {}
+
+    def matches(self, fullname):
+        """
+        Check if module should be patched
+
+        :param fullname: Module name
+        :type fullname: ``str``
+        """
+        if self._include_paths and self._matcher.allows(fullname):
+            return True
+
+        return self._local_modules and self._is_local(fullname) and self._excluded.allows(fullname)
+
+    def _is_local(self, fullname):
+        name = fullname.split('.', 1)[0]
+        local = self._local.get(name)
+        if local is None:
+            local = self._local[name] = is_local_module(name)
+        return local
+
+    def find_spec(self, fullname, path, target=None):
+        """
+        Find spec using remaining finders and wrap its loader if module should be patched
+        """
+        if fullname in self._visited or not self.matches(fullname):
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+
+        spec.loader = _PatchingLoader(spec.loader, self)
+        return spec
+
+    def patch(self, fullname):
+        """
+        Patch module (not recursively) unless it was already visited
+
+        :param fullname: Module name
+        :type fullname: ``str``
+        """
+        if fullname in self._visited:
+            return
+
+        self._visited.add(fullname)
+
+        start = time.perf_counter()
+        try:
+            patch_module(
+                fullname,
+                recursive=False,
+                # Local modules are patched whole, like by `patch_module`
+                include_paths=self._include_paths if self._matcher.allows(fullname) else (),
+                exclude_paths=self._exclude_paths,
+                **self._kwargs
+                )
+        except Exception as exception:  # pylint: disable=broad-except
+            log.warning('Cannot patch module %s: %s', fullname, exception)
+
+        self.timings[fullname] = time.perf_counter() - start
+        log.debug('Module %s patched in %.6fs', fullname, self.timings[fullname])
+
+    def patch_loaded(self):
+        """
+        Patch already imported modules which match the filters
+        """
+        for fullname in list(sys.modules):
+            if self.matches(fullname):
+                self.patch(fullname)
+
+
+def install_import_hook(include_paths=None, exclude_paths=None, local_modules=False, **kwargs):
+    """
+    Install `LazyPatchFinder` as the first meta path finder and patch matching modules which are already imported.
+    See `LazyPatchFinder` and `patch_module` for details about parameters
+
+    :returns: Installed `LazyPatchFinder`
+    """
+    if not include_paths and not local_modules:
+        log.warning('Import hook without include_paths and local_modules doesn\'t patch anything')
+
+    finder = LazyPatchFinder(include_paths=include_paths, exclude_paths=exclude_paths, local_modules=local_modules,
+                             **kwargs)
+    sys.meta_path.insert(0, finder)
+    finder.patch_loaded()
+    return finder
+
+
+def uninstall_import_hook(finder=None):
+    """
+    Remove `finder` or all `LazyPatchFinder` instances from meta path. Already patched modules stay patched
+
+    :param finder: Finder returned by `install_import_hook`
+    :type finder: ``LazyPatchFinder``
+    """
+    sys.meta_path[:] = [
+        item for item in sys.meta_path
+        if not (item is finder or (finder is None and isinstance(item, LazyPatchFinder)))
+    ]
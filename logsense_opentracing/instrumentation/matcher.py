@@ -0,0 +1,111 @@
+"""
+Path matching for `include_paths` and `exclude_paths`
+
+Filters are compiled once per `patch_module` call. Every filter can be one of:
+
+    * prefix - plain dotted path, e.g. ``'my_application.views'``. Matches all paths starting with it
+    * glob - path with ``*``, ``?`` or ``[`` characters, e.g. ``'my_application.*.views'``.
+      It has to match whole path
+    * regex - compiled regular expression (``re.compile(...)``) or string with ``re:`` prefix,
+      e.g. ``'re:my_application\\.(views|models)'``. It has to match beginning of the path
+
+Prefixes are kept in a trie, globs and regexes are combined into single regular expression,
+so checking a path doesn't depend on the number of filters::
+
+    from logsense_opentracing.instrumentation.matcher import PathMatcher
+
+    matcher = PathMatcher(include_paths=('my_application',), exclude_paths=('my_application.*.tests',))
+    matcher.allows('my_application.views.index')
+"""
+import re
+import fnmatch
+
+
+REGEX_PREFIX = 're:'
+GLOB_CHARACTERS = frozenset('*?[')
+
+# Marks the end of prefix in the trie
+_END = object()
+
+
+class PathPatterns:
+    """
+    Compiled set of prefixes, globs and regexes
+    """
+
+    def __init__(self, patterns=()):
+        self._trie = {}
+        self._empty = True
+        regexes = []
+
+        for pattern in patterns:
+            if isinstance(pattern, re.Pattern):
+                regexes.append(pattern.pattern)
+            elif pattern.startswith(REGEX_PREFIX):
+                regexes.append(pattern[len(REGEX_PREFIX):])
+            elif GLOB_CHARACTERS.intersection(pattern):
+                regexes.append(fnmatch.translate(pattern))
+            else:
+                self._add_prefix(pattern)
+                continue
+            self._empty = False
+
+        self._regex = re.compile('|'.join('(?:{})'.format(regex) for regex in regexes)) if regexes else None
+
+    def _add_prefix(self, prefix):
+        node = self._trie
+        for character in prefix:
+            node = node.setdefault(character, {})
+        node[_END] = True
+        self._empty = False
+
+    def __bool__(self):
+        return not self._empty
+
+    def matches(self, path):
+        """
+        Check if `path` matches any pattern
+
+        :param path: Dotted path
+        :type path: ``str``
+        """
+        node = self._trie
+        if node:
+            for character in path:
+                if _END in node:
+                    return True
+                node = node.get(character)
+                if node is None:
+                    break
+            else:
+                if _END in node:
+                    return True
+
+        return self._regex is not None and self._regex.match(path) is not None
+
+
+class PathMatcher:
+    """
+    Compiled `include_paths` and `exclude_paths` filters
+
+    :param include_paths: Paths which should be patched. Matches all if empty
+    :type include_paths: ``tuple``
+    :param exclude_paths: Paths which shouldn't be patched. They take precedence over `include_paths`
+    :type exclude_paths: ``tuple``
+    """
+
+    def __init__(self, include_paths=(), exclude_paths=()):
+        self._include = PathPatterns(include_paths)
+        self._exclude = PathPatterns(exclude_paths)
+
+    def allows(self, path):
+        """
+        Check if path passes filters
+
+        :param path: Dotted path
+        :type path: ``str``
+        """
+        if self._exclude and self._exclude.matches(path):
+            return False
+
+        return not self._include or self._include.matches(path)
@@ -6,16 +6,27 @@ Module patching is experimental, because it can affect all module at once and sh
 import logging
 import importlib
 import inspect
-import asyncio
 import os
+import sys
 
-from .functions import patch_single, patch_async_single
+from .functions import patch_single, patch_coroutine_single, patch_generator_single, patch_async_generator_single
+from .plan import PatchPlan, FUNCTION, COROUTINE, GENERATOR, ASYNC_GENERATOR, plan_key, load_plan, save_plan
+from .matcher import PathMatcher
 
 
 log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
 
+# Patcher of every kind of planned function. None of them needs an event loop
+PATCHERS = {
+    FUNCTION: patch_single,
+    COROUTINE: patch_coroutine_single,
+    GENERATOR: patch_generator_single,
+    ASYNC_GENERATOR: patch_async_generator_single,
+}
 
-def patch_module(module, recursive=True, include_paths=None, exclude_paths=None):
+
+def patch_module(module, recursive=True, include_paths=None, exclude_paths=None,  # pylint: disable=too-many-arguments
+                 exact_signature=False, plan_cache=None):
     """
     Experimental (patch module)
 
@@ -23,10 +34,15 @@ def patch_module(module, recursive=True, include_paths=None, exclude_paths=None)
     :type module: ``str```
     :param recursive: Patch module recursively if True, otherwise module's functions only
     :type recursive: ``bool``
-    :param include_paths: Tuple of path regexes which should be patched. Matches all if tuple is empty
-    :type include_paths: ``bool``
-    :param exclude_paths: Tuple of path regexes which shouldn't be patched
-    :typ exclude_paths: ``bool``
+    :param include_paths: Tuple of paths which should be patched. Matches all if tuple is empty.
+        Prefixes, globs and regexes are supported, see `matcher` module for details
+    :type include_paths: ``tuple``
+    :param exclude_paths: Tuple of paths which shouldn't be patched
+    :type exclude_paths: ``tuple``
+    :param exact_signature: Patch functions with signature-exact wrappers. See `codegen` module for details
+    :type exact_signature: ``bool``
+    :param plan_cache: Directory where patch plans are cached between runs. See `plan` module for details
+    :type plan_cache: ``str``
 
     """
     log.warning('Patching module is an experimental feature')
@@ -36,24 +52,82 @@ def patch_module(module, recursive=True, include_paths=None, exclude_paths=None)
     exclude_paths = () if exclude_paths is None else exclude_paths
     exclude_paths = ('logsense_opentracing', *exclude_paths)
 
-    # Import module and skip builtins
-    paths = module.split('.')
-    if paths[0] in ('builtins', ):
+    # Skip builtins
+    if module.split('.')[0] in ('builtins', ):
         return
 
-    mod = importlib.import_module(paths[0])
-    try:
-        for i in range(1, len(paths)):
+    key = plan_key(module, recursive, include_paths, exclude_paths)
+    patch_plan = load_plan(plan_cache, key) if plan_cache is not None else None
 
-            # Import submodule if it doesn't exist
-            if not hasattr(mod, paths[i]):
-                if hasattr(mod, '__module__'):
-                    importlib.import_module('.'.join([mod.__module__, mod.__name__, paths[i]]))
-                else:
-                    importlib.import_module('.'.join([mod.__name__, paths[i]]))
-            mod = getattr(mod, paths[i])
-    except Exception as exception:  # pylint: disable=broad-except
-        log.warning('Exception during importing module %s', exception)
+    if patch_plan is None:
+        patch_plan = build_plan(module, recursive=recursive, include_paths=include_paths, exclude_paths=exclude_paths)
+        if plan_cache is not None:
+            save_plan(plan_cache, key, patch_plan)
+
+    apply_plan(patch_plan, exact_signature=exact_signature)
+
+
+def is_local_module(path):
+    """
+    Check if top level module of `path` exists in current working directory. Such modules are patched
+    even if they aren't part of patched module
+
+    :param path: Dotted path
+    :type path: ``str``
+    """
+    return os.path.exists(path.split('.')[0])
+
+
+def build_plan(module, recursive=True, include_paths=(), exclude_paths=()):
+    """
+    Walk module and collect everything what should be patched. See `patch_module` for details about parameters
+
+    :returns: `PatchPlan`
+    """
+    # Filters are compiled once and shared by whole walk
+    matcher = PathMatcher(include_paths=include_paths, exclude_paths=exclude_paths)
+
+    patch_plan = PatchPlan()
+    _build_plan(module, recursive, matcher, patch_plan, set())
+    return patch_plan
+
+
+def apply_plan(patch_plan, **kwargs):
+    """
+    Patch all entries of the plan. See `patch_single` for details about `kwargs`
+
+    :param patch_plan: Plan to be applied
+    :type patch_plan: ``PatchPlan``
+    """
+    imported = set()
+    for path, kind, container in patch_plan.entries:
+        # Import modules and submodules in the same way as they were imported during planning
+        if container not in imported:
+            imported.add(container)
+            if container not in sys.modules:
+                _import(container.split('.'))
+
+        try:
+            PATCHERS[kind](path, **kwargs)
+        except Exception as exception:  # pylint: disable=broad-except
+            log.warning('Cannot patch %s: %s', path, exception)
+
+
+def _build_plan(module, recursive, matcher, patch_plan, visited):  # pylint: disable=too-many-branches
+    """
+    Recursive part of `build_plan`
+    """
+    # Skip modules and classes which were already walked
+    if module in visited:
+        return
+    visited.add(module)
+
+    # Already imported modules are taken directly (it also works for modules which are being imported)
+    mod = sys.modules.get(module)
+    if mod is None:
+        mod = _import(module.split('.'))
+
+    patch_plan.add_file(getattr(inspect.getmodule(mod), '__file__', None))
 
     # Iterate over all methods
     for function in dir(mod):
@@ -98,45 +172,56 @@ def patch_module(module, recursive=True, include_paths=None, exclude_paths=None)
         if not new_path.startswith(module):
 
             # If path doesn't start with module name but file exists in cwd, patch it anyway
-            name = new_path.split('.')[0]
-            if not os.path.exists(name):
+            if not is_local_module(new_path):
                 log.debug('%s is not in %s module. Skipping', new_path, module)
                 continue
 
-        log.debug('Trying to patch %s', new_path)
+        log.debug('Trying to plan %s', new_path)
 
-        # Allow paths if there is no allowed paths
-        allow = not include_paths
-
-        for allowed in include_paths:
-            if new_path.startswith(allowed):
-                allow = True
-                break
-
-        for denied in exclude_paths:
-            if new_path.startswith(denied):
-                allow = False
-                break
-
-        if not allow:
+        if not matcher.allows(new_path):
             log.info('Path %s is excluded from patching. Skipping', new_path)
             continue
 
-        # Patch coroutines with coroutines
-        if inspect.iscoroutinefunction(current):
-            log.debug('Patching async function %s', new_path)
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(patch_async_single(new_path))
-        # Patch function witch function patcher
+        # Plan async generators, generators and coroutines with their kinds, so they are patched properly
+        if inspect.isasyncgenfunction(current):
+            patch_plan.add(new_path, ASYNC_GENERATOR, module)
+        elif inspect.isgeneratorfunction(current):
+            patch_plan.add(new_path, GENERATOR, module)
+        elif inspect.iscoroutinefunction(current):
+            patch_plan.add(new_path, COROUTINE, module)
+        # Plan functions as functions
         elif inspect.isfunction(current):
-            log.debug('Patching function %s', new_path)
-            patch_single(new_path)
-        # Patch modules recursively, if recursive is enabled
+            patch_plan.add(new_path, FUNCTION, module)
+        # Walk modules recursively, if recursive is enabled
         elif inspect.ismodule(current):
             if recursive is True:
-                log.debug('Patching module %s', new_path)
-                patch_module(new_path, recursive=recursive, include_paths=include_paths, exclude_paths=exclude_paths)
+                log.debug('Planning module %s', new_path)
+                _build_plan(new_path, recursive, matcher, patch_plan, visited)
         # Treat classes as packages
         elif inspect.isclass(current):
-            log.info('Patching class %s', current)
-            patch_module(new_path, recursive=recursive, include_paths=include_paths, exclude_paths=exclude_paths)
+            log.info('Planning class %s', current)
+            _build_plan(new_path, recursive, matcher, patch_plan, visited)
+
+
+def _import(paths):
+    """
+    Import module, class or submodule by its path
+
+    :param paths: Splitted path
+    :type paths: ``list``
+    """
+    mod = importlib.import_module(paths[0])
+    try:
+        for i in range(1, len(paths)):
+
+            # Import submodule if it doesn't exist
+            if not hasattr(mod, paths[i]):
+                if hasattr(mod, '__module__'):
+                    importlib.import_module('.'.join([mod.__module__, mod.__name__, paths[i]]))
+                else:
+                    importlib.import_module('.'.join([mod.__name__, paths[i]]))
+            mod = getattr(mod, paths[i])
+    except Exception as exception:  # pylint: disable=broad-except
+        log.warning('Exception during importing module %s', exception)
+
+    return mod
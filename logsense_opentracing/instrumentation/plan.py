@@ -0,0 +1,167 @@
+"""
+Patch plans
+
+`patch_module` walks target module, classifies every attribute and decides if it should be patched.
+The result of this work is a patch plan: list of dotted paths to be patched together with their kind.
+Plans can be cached on disk, so next startups only apply the plan::
+
+    from logsense_opentracing.instrumentation import patch_module
+
+    patch_module('my_application', plan_cache='/var/cache/logsense')
+
+Cached plan is identified by patched module and filter configuration (`recursive`, `include_paths`
+and `exclude_paths`). It is used only if all files of walked modules still exist and have the same
+modification times as during planning, otherwise the module is walked again and the plan is replaced.
+
+For `logsense-tracer` plan cache directory can be set by `LOGSENSE_PATCH_PLAN_CACHE` environmental variable
+"""
+import os
+import sys
+import json
+import hashlib
+import logging
+import tempfile
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+FUNCTION = 'function'
+COROUTINE = 'coroutine'
+GENERATOR = 'generator'
+ASYNC_GENERATOR = 'async_generator'
+
+PLAN_VERSION = 2
+
+
+class PatchPlan:
+    """
+    List of paths to be patched and files they come from
+    """
+
+    def __init__(self, entries=None, files=None):
+        # List of (path, kind, container) tuples, where container is module or class path containing entry
+        self.entries = [tuple(entry) for entry in entries or ()]
+        # Dictionary of module file path and its modification time
+        self.files = dict(files or {})
+        self._paths = {entry[0] for entry in self.entries}
+
+    def add(self, path, kind, container):
+        """
+        Add path to the plan. Paths are added only once
+
+        :param path: Path to be patched
+        :type path: ``str``
+        :param kind: `FUNCTION`, `COROUTINE`, `GENERATOR` or `ASYNC_GENERATOR`
+        :type kind: ``str``
+        :param container: Path of module or class which contains patched path
+        :type container: ``str``
+        """
+        if path in self._paths:
+            return
+
+        self._paths.add(path)
+        self.entries.append((path, kind, container))
+
+    def add_file(self, path):
+        """
+        Add module file which plan depends on
+
+        :param path: File path. None is ignored
+        :type path: ``str``
+        """
+        if path is None or path in self.files:
+            return
+
+        try:
+            self.files[path] = os.stat(path).st_mtime
+        except OSError:
+            log.debug('Cannot stat %s', path)
+
+    def is_valid(self):
+        """
+        Check if all files plan depends on are unchanged
+        """
+        for path, mtime in self.files.items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return False
+            except OSError:
+                return False
+
+        return True
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def plan_key(module, recursive, include_paths, exclude_paths):
+    """
+    Key identifying plan of given module and configuration
+    """
+    config = json.dumps([
+        PLAN_VERSION,
+        sys.version,
+        module,
+        recursive,
+        [getattr(path, 'pattern', path) for path in include_paths],
+        [getattr(path, 'pattern', path) for path in exclude_paths]
+    ])
+    return hashlib.sha1(config.encode('utf-8')).hexdigest()
+
+
+def load_plan(cache_dir, key):
+    """
+    Load cached plan
+
+    :param cache_dir: Cache directory
+    :type cache_dir: ``str``
+    :param key: Plan key, see `plan_key`
+    :type key: ``str``
+
+    :returns: `PatchPlan` or None if there is no valid plan in the cache
+    """
+    try:
+        with open(os.path.join(cache_dir, '{}.json'.format(key))) as plan_file:
+            data = json.load(plan_file)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('version') != PLAN_VERSION or data.get('key') != key:
+        return None
+
+    patch_plan = PatchPlan(entries=data.get('entries'), files=data.get('files'))
+    if not patch_plan.is_valid():
+        log.info('Cached patch plan %s is outdated', key)
+        return None
+
+    log.info('Using cached patch plan %s (%d entries)', key, len(patch_plan))
+    return patch_plan
+
+
+def save_plan(cache_dir, key, patch_plan):
+    """
+    Save plan to the cache. Errors are logged and ignored
+
+    :param cache_dir: Cache directory
+    :type cache_dir: ``str``
+    :param key: Plan key, see `plan_key`
+    :type key: ``str``
+    :param patch_plan: Plan to be saved
+    :type patch_plan: ``PatchPlan``
+    """
+    data = {
+        'version': PLAN_VERSION,
+        'key': key,
+        'entries': patch_plan.entries,
+        'files': patch_plan.files
+    }
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to temporary file first, so concurrently starting processes never read partial plan
+        descriptor, temporary = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as plan_file:
+            json.dump(data, plan_file)
+        os.replace(temporary, os.path.join(cache_dir, '{}.json'.format(key)))
+    except OSError as exception:
+        log.warning('Cannot save patch plan: %s', exception)
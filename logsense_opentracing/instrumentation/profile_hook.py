@@ -0,0 +1,247 @@
+"""
+Profiler-hook tracing
+
+`patch_module` replaces module attributes with wrappers. Functions referenced before patching
+(e.g. imported with ``from module import function`` or registered as callbacks) are never traced,
+and every call goes through additional Python frame. Profiler hook is an alternative engine,
+which doesn't change the application at all. Functions to be traced are planned in the same way
+as by `patch_module` (see `plan` module) and their code objects are kept in a set.
+Spans are created only for calls of these code objects::
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation.profile_hook import install_profile_hook, uninstall_profile_hook
+
+    setup_tracer(component='profiled')
+
+    engine = install_profile_hook('my_application', exclude_paths=('my_application.tests',))
+    ...
+    uninstall_profile_hook(engine)
+
+On Python 3.12+ `sys.monitoring` (PEP 669) is used. Events are enabled only for planned code objects,
+so other functions run at full speed. On older versions `sys.setprofile` and `threading.setprofile`
+are used. They are called for every function call, so filtering is done by single set lookup.
+`sys.setprofile` doesn't distinguish returns from exceptions, so `error` tag is reported only with
+`sys.monitoring`. If the profiler tool of `sys.monitoring` is already used by another tool (e.g. by cProfile),
+`sys.setprofile` is used as well.
+
+Only plain functions are traced. Coroutines and generators are suspended and resumed many times,
+so they should be instrumented by `patch_module`. Arguments are not captured.
+
+For `logsense-tracer` profiler hook is enabled by `LOGSENSE_PROFILE_HOOK` environmental variable
+"""
+import sys
+import logging
+import threading
+
+import opentracing
+
+from .utils import get_obj_from_path
+from .modules import build_plan
+from .plan import FUNCTION, plan_key, load_plan, save_plan
+from .registry import STATE
+from ..exception_capture import log_exception
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+# Name of local variable which is used by `ScopeManager` to find active scope
+SCOPE_VARIABLE = 'logsense_opentracing_scope'
+
+# `sys.monitoring` tool used by the engine
+TOOL_NAME = 'logsense'
+
+_ENGINES = []
+
+
+def build_code_map(patch_plan):
+    """
+    Resolve plain functions of patch plan to their code objects
+
+    :param patch_plan: Patch plan, see `build_plan`
+    :type patch_plan: ``PatchPlan``
+
+    :returns: Dictionary of code object and operation name
+    """
+    codes = {}
+    for path, kind, _ in patch_plan.entries:
+        if kind != FUNCTION:
+            continue
+
+        try:
+            function = get_obj_from_path(path)[2]
+        except Exception as exception:  # pylint: disable=broad-except
+            log.warning('Cannot resolve %s: %s', path, exception)
+            continue
+
+        # Unwrap bound class methods and functions already patched by wrappers
+        function = getattr(function, '__func__', function)
+        function = getattr(function, '_logsense_original_function', function)
+        code = getattr(function, '__code__', None)
+        if code is None:
+            continue
+
+        codes[code] = '{0}.{1}'.format(function.__module__, function.__name__)
+
+    return codes
+
+
+class ProfileHookEngine:
+    """
+    Tracing engine based on profiler hooks
+
+    :param codes: Dictionary of traced code objects and their operation names
+    :type codes: ``dict``
+    :param use_monitoring: Use `sys.monitoring` if True, `sys.setprofile` if False.
+        None selects `sys.monitoring` if it's available
+    :type use_monitoring: ``bool``
+    """
+
+    def __init__(self, codes, use_monitoring=None):
+        self.codes = dict(codes)
+        if use_monitoring is None:
+            use_monitoring = hasattr(sys, 'monitoring')
+        self.use_monitoring = use_monitoring
+        self._tool_id = None
+        self._previous_profile = None
+        self.installed = False
+
+    def _start(self, frame, operation_name):
+        """
+        Start span for `frame` and store it as frame's local, so it's found by `ScopeManager`
+        """
+        # Parent is searched from this frame, so traced frame and its callers are checked
+        scope = opentracing.tracer.start_active_span(operation_name)
+        scope.span.set_tag('error', False)
+        frame.f_locals[SCOPE_VARIABLE] = scope
+
+    @staticmethod
+    def _finish(frame, exception=None):
+        scope = frame.f_locals.pop(SCOPE_VARIABLE, None)
+        if scope is None:
+            return
+
+        if exception is not None:
+            log_exception(scope.span, exception)
+        scope.close()
+
+    # sys.setprofile
+
+    def _profile(self, frame, event, arg):  # pylint: disable=unused-argument
+        if event == 'call':
+            operation_name = self.codes.get(frame.f_code)
+            if operation_name is not None and STATE.enabled:
+                self._start(frame, operation_name)
+        elif event == 'return' and frame.f_code in self.codes:
+            self._finish(frame)
+
+    # sys.monitoring
+
+    def _on_start(self, code, offset):  # pylint: disable=unused-argument
+        if STATE.enabled:
+            self._start(sys._getframe(1), self.codes[code])  # pylint: disable=protected-access
+
+    def _on_return(self, code, offset, retval):  # pylint: disable=unused-argument
+        self._finish(sys._getframe(1))  # pylint: disable=protected-access
+
+    def _on_unwind(self, code, offset, exception):  # pylint: disable=unused-argument
+        # Unwind events can't be enabled per code object, so they have to be filtered here
+        if code in self.codes:
+            self._finish(sys._getframe(1), exception=exception)  # pylint: disable=protected-access
+
+    def install(self):
+        """
+        Start tracing planned functions
+        """
+        if self.installed:
+            return
+
+        if self.use_monitoring:
+            monitoring = sys.monitoring  # pylint: disable=no-member
+            try:
+                monitoring.use_tool_id(monitoring.PROFILER_ID, TOOL_NAME)
+            except ValueError:
+                # Profiler tool is already used by another tool (e.g. cProfile)
+                log.warning('sys.monitoring profiler is used by %s, sys.setprofile is used instead',
+                            monitoring.get_tool(monitoring.PROFILER_ID))
+                self.use_monitoring = False
+
+        if self.use_monitoring:
+            monitoring = sys.monitoring  # pylint: disable=no-member
+            events = monitoring.events
+            self._tool_id = monitoring.PROFILER_ID
+            monitoring.register_callback(self._tool_id, events.PY_START, self._on_start)
+            monitoring.register_callback(self._tool_id, events.PY_RETURN, self._on_return)
+            monitoring.register_callback(self._tool_id, events.PY_UNWIND, self._on_unwind)
+            for code in self.codes:
+                monitoring.set_local_events(self._tool_id, code, events.PY_START | events.PY_RETURN)
+            monitoring.set_events(self._tool_id, events.PY_UNWIND)
+        else:
+            self._previous_profile = sys.getprofile()
+            sys.setprofile(self._profile)
+            threading.setprofile(self._profile)
+
+        self.installed = True
+        log.info('Profiler hook traces %d functions (%s)', len(self.codes),
+                 'sys.monitoring' if self.use_monitoring else 'sys.setprofile')
+
+    def uninstall(self):
+        """
+        Stop tracing. Spans of functions which are running are not finished
+        """
+        if not self.installed:
+            return
+
+        if self.use_monitoring:
+            monitoring = sys.monitoring  # pylint: disable=no-member
+            events = monitoring.events
+            monitoring.set_events(self._tool_id, events.NO_EVENTS)
+            for code in self.codes:
+                monitoring.set_local_events(self._tool_id, code, events.NO_EVENTS)
+            for event in (events.PY_START, events.PY_RETURN, events.PY_UNWIND):
+                monitoring.register_callback(self._tool_id, event, None)
+            monitoring.free_tool_id(self._tool_id)
+        else:
+            sys.setprofile(self._previous_profile)
+            threading.setprofile(None)
+
+        self.installed = False
+
+
+def install_profile_hook(module, recursive=True, include_paths=None,  # pylint: disable=too-many-arguments
+                         exclude_paths=None, plan_cache=None, use_monitoring=None):
+    """
+    Trace functions of `module` using profiler hook. See `patch_module` for details about parameters
+
+    :param use_monitoring: Use `sys.monitoring` if True, `sys.setprofile` if False.
+        None selects `sys.monitoring` if it's available
+    :type use_monitoring: ``bool``
+
+    :returns: Installed `ProfileHookEngine`
+    """
+    include_paths = () if include_paths is None else tuple(include_paths)
+    exclude_paths = ('logsense_opentracing', *(exclude_paths or ()))
+
+    key = plan_key(module, recursive, include_paths, exclude_paths)
+    patch_plan = load_plan(plan_cache, key) if plan_cache is not None else None
+    if patch_plan is None:
+        patch_plan = build_plan(module, recursive=recursive, include_paths=include_paths, exclude_paths=exclude_paths)
+        if plan_cache is not None:
+            save_plan(plan_cache, key, patch_plan)
+
+    engine = ProfileHookEngine(build_code_map(patch_plan), use_monitoring=use_monitoring)
+    engine.install()
+    _ENGINES.append(engine)
+    return engine
+
+
+def uninstall_profile_hook(engine=None):
+    """
+    Uninstall `engine` or all installed engines
+
+    :param engine: Engine returned by `install_profile_hook`
+    :type engine: ``ProfileHookEngine``
+    """
+    for item in list(_ENGINES):
+        if engine is None or item is engine:
+            item.uninstall()
+            _ENGINES.remove(item)
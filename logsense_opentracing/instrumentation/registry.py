@@ -0,0 +1,210 @@
+"""
+Every patch applied by `patch_single`, `patch_async_single`, `patch_decorator`, `patch_async_decorator`
+and `patch_module` is kept in the registry, so instrumentation can be removed and reapplied in bulk
+without restarting the process::
+
+    from logsense_opentracing.instrumentation import patch_module, unpatch_all, repatch_all
+
+    patch_module('my_application')
+
+    # Restore all original functions
+    unpatch_all()
+
+    # Apply all patches again
+    repatch_all()
+
+There is also global tracing switch. Wrappers check it before doing anything else,
+so disabled wrappers just call original function::
+
+    from logsense_opentracing.instrumentation import disable_tracing, enable_tracing
+
+    disable_tracing()
+    ...
+    enable_tracing()
+
+Functions instrumented directly by `instrumentation` aren't bound to any attribute,
+so they can't be unpatched, but they respect the global switch as well
+"""
+import logging
+import threading
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+# Marks attributes which didn't exist in owner's namespace before patching (e.g. inherited methods)
+_MISSING = object()
+
+
+class _State:  # pylint: disable=too-few-public-methods
+    """
+    Global instrumentation state. Wrappers read `enabled` on every call, so it should stay as cheap as possible
+    """
+    __slots__ = ['enabled']
+
+    def __init__(self):
+        self.enabled = True
+
+
+STATE = _State()
+
+
+class Patch:  # pylint: disable=too-few-public-methods
+    """
+    Single patch applied to `owner`'s `attribute`
+    """
+    __slots__ = ['owner', 'attribute', 'original', 'patched', 'applied']
+
+    def __init__(self, owner, attribute, original, patched):
+        self.owner = owner
+        self.attribute = attribute
+        self.original = original
+        self.patched = patched
+        self.applied = True
+
+    def restore(self):
+        """
+        Restore original attribute value
+        """
+        if self.original is _MISSING:
+            delattr(self.owner, self.attribute)
+        else:
+            setattr(self.owner, self.attribute, self.original)
+        self.applied = False
+
+    def apply(self):
+        """
+        Apply patched attribute value
+        """
+        setattr(self.owner, self.attribute, self.patched)
+        self.applied = True
+
+
+_PATCHES = {}
+_LOCK = threading.RLock()
+
+
+def apply_patch(owner, attribute, patched):
+    """
+    Override `owner`'s `attribute` with `patched` value and register the patch
+
+    :param owner: Module or class which attribute is going to be patched
+    :param attribute: Attribute name
+    :type attribute: ``str``
+    :param patched: New attribute value
+    """
+    key = (id(owner), attribute)
+    with _LOCK:
+        patch = _PATCHES.get(key)
+        if patch is None:
+            original = getattr(owner, '__dict__', {}).get(attribute, _MISSING)
+            _PATCHES[key] = Patch(owner, attribute, original, patched)
+        else:
+            patch.patched = patched
+            patch.applied = True
+
+        setattr(owner, attribute, patched)
+
+
+def forget_patch(owner, attribute):
+    """
+    Remove patch of `owner`'s `attribute` from the registry. Attribute itself is not changed
+
+    :param owner: Patched module or class
+    :param attribute: Attribute name
+    :type attribute: ``str``
+    """
+    with _LOCK:
+        _PATCHES.pop((id(owner), attribute), None)
+
+
+def get_patches():
+    """
+    :returns: List of all registered patches
+    """
+    with _LOCK:
+        return list(_PATCHES.values())
+
+
+def unpatch_function(function):
+    """
+    Restore original values of all attributes patched with `function`. Patches are kept in the registry
+
+    :param function: Wrapper created by instrumentation
+    :type function: ``callable``
+
+    :returns: Number of restored attributes
+    """
+    restored = 0
+    with _LOCK:
+        for patch in _PATCHES.values():
+            if patch.applied and getattr(patch.patched, '__func__', patch.patched) is function:
+                patch.restore()
+                restored += 1
+
+    return restored
+
+
+def unpatch_all():
+    """
+    Restore original values of all patched attributes. Patches are kept in the registry,
+    so they can be reapplied by `repatch_all`
+
+    :returns: Number of restored attributes
+    """
+    restored = 0
+    with _LOCK:
+        for patch in _PATCHES.values():
+            if not patch.applied:
+                continue
+            try:
+                patch.restore()
+                restored += 1
+            except Exception as exception:  # pylint: disable=broad-except
+                log.warning('Cannot restore %s.%s: %s', patch.owner, patch.attribute, exception)
+
+    log.info('Restored %d patched attributes', restored)
+    return restored
+
+
+def repatch_all():
+    """
+    Apply again all patches restored by `unpatch_all`
+
+    :returns: Number of patched attributes
+    """
+    patched = 0
+    with _LOCK:
+        for patch in _PATCHES.values():
+            if patch.applied:
+                continue
+            try:
+                patch.apply()
+                patched += 1
+            except Exception as exception:  # pylint: disable=broad-except
+                log.warning('Cannot patch %s.%s: %s', patch.owner, patch.attribute, exception)
+
+    log.info('Reapplied %d patches', patched)
+    return patched
+
+
+def enable_tracing():
+    """
+    Turn on tracing in all instrumented functions
+    """
+    STATE.enabled = True
+    log.info('Tracing enabled')
+
+
+def disable_tracing():
+    """
+    Turn off tracing in all instrumented functions. Wrappers just call original functions
+    """
+    STATE.enabled = False
+    log.info('Tracing disabled')
+
+
+def is_tracing_enabled():
+    """
+    :returns: True if tracing is enabled, False otherwise
+    """
+    return STATE.enabled
@@ -2,14 +2,14 @@
 `Requests <https://pypi.org/project/requests/>`_ integration
 """
 import opentracing
-from ..utils import HTTP_TRACE_ID, HTTP_SPAN_ID, HTTP_BAGGAGE_PREFIX
 
 
 def requests_baggage(scope, method, url, **kwargs):
     r"""
     Function which injects opentracing into requests HTTP carrier.
     It takes same parameters as `requests.api.request`,
-    modify it and calls `requests.api.request` with modified parameters
+    modify it and calls `requests.api.request` with modified parameters.
+    Requests sent by sessions are not covered, `patch_requests_session` instruments all of them
 
     ::
 
@@ -42,13 +42,6 @@ def requests_baggage(scope, method, url, **kwargs):
     if kwargs.get('headers') is None:
         kwargs['headers'] = {}
 
-    baggage = {}
-
-    opentracing.tracer.inject(scope.span, opentracing.propagation.Format.TEXT_MAP, baggage)
-
-    kwargs['headers'][HTTP_TRACE_ID] = hex(int(baggage['trace_id']))[2:]  # strip '0x'
-    kwargs['headers'][HTTP_SPAN_ID] = hex(int(baggage['span_id']))[2:]
-    for key, value in baggage['baggage'].items():
-        kwargs['headers']['{}{}'.format(HTTP_BAGGAGE_PREFIX, key)] = value
+    opentracing.tracer.inject(scope.span, opentracing.propagation.Format.HTTP_HEADERS, kwargs['headers'])
 
     return (method, url), kwargs
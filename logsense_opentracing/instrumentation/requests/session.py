@@ -0,0 +1,109 @@
+"""
+`Requests <https://pypi.org/project/requests/>`_ session instrumentation
+
+`requests_baggage` covers only module level functions (`requests.get`, ...), which create new session
+and connection pool for every call. Every request, including requests sent by long living sessions,
+goes through `requests.Session.send`, so it's instrumented instead::
+
+    import requests
+    import opentracing
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation import patch_requests_session
+
+    setup_tracer(component='Requests')
+    patch_requests_session()
+
+    session = requests.Session()
+    with opentracing.tracer.start_active_span('parent-span'):
+        session.get('http://localhost:8888/')
+
+Every sent request (and every redirect) gets client span with `http.method`, `http.url`, `http.status_code`,
+`http.request_bytes`, `http.response_bytes` and `http.retries` tags. Span context is injected into
+prepared request's headers in place, so sessions and their keep-alive connection pools are reused as they are
+"""
+import opentracing
+
+from ..functions import patch_single
+from ..general import remove_instrumentation
+
+
+SEND_PATH = 'requests.sessions.Session.send'
+
+
+def _body_length(body):
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    return None
+
+
+def requests_send_before(scope, session, request, **kwargs):
+    """
+    Tag client span with request information and inject span context into request's headers.
+    It takes same parameters as `requests.Session.send`
+
+    :param scope: Opentracing's scope
+    :type scope: ``opentracing.Scope``
+    :param session: Session which sends the request
+    :type session: ``requests.Session``
+    :param request: Prepared request
+    :type request: ``requests.PreparedRequest``
+    """
+    span = scope.span
+    span.set_tag('operation_name', 'HTTP {}'.format(request.method))
+    span.set_tag('span.kind', 'client')
+    span.set_tag('http.method', request.method)
+    span.set_tag('http.url', request.url)
+
+    request_bytes = _body_length(request.body)
+    if request_bytes is not None:
+        span.set_tag('http.request_bytes', request_bytes)
+
+    opentracing.tracer.inject(span, opentracing.propagation.Format.HTTP_HEADERS, request.headers)
+
+    return (session, request), kwargs
+
+
+def requests_send_after(scope, response, *args, error=False, **kwargs):  # pylint: disable=unused-argument
+    """
+    Tag client span with response information
+
+    :param scope: Opentracing's scope
+    :type scope: ``opentracing.Scope``
+    :param response: Received response, None if sending failed
+    :type response: ``requests.Response``
+    """
+    if response is None:
+        return
+
+    span = scope.span
+    span.set_tag('http.status_code', response.status_code)
+    if response.status_code >= 500:
+        span.set_tag('error', True)
+
+    # Streamed content isn't read here, only its declared length is reported
+    response_bytes = response.headers.get('Content-Length')
+    if response_bytes is not None and response_bytes.isdigit():
+        span.set_tag('http.response_bytes', int(response_bytes))
+    elif response._content_consumed:  # pylint: disable=protected-access
+        span.set_tag('http.response_bytes', _body_length(response._content) or 0)  # pylint: disable=protected-access
+
+    # Retries done by urllib3 (`HTTPAdapter(max_retries=...)`)
+    retries = getattr(getattr(response.raw, 'retries', None), 'history', None)
+    span.set_tag('http.retries', len(retries) if retries else 0)
+
+
+def patch_requests_session():
+    """
+    Instrument `requests.Session.send`
+    """
+    # Generic wrapper guesses if the first argument is `self` by number of arguments, which fails
+    # for `send(request, timeout=...)`. Signature-exact wrapper always binds `self` as the session
+    return patch_single(SEND_PATH, before=requests_send_before, after=requests_send_after, exact_signature=True)
+
+
+def unpatch_requests_session():
+    """
+    Remove instrumentation of `requests.Session.send`
+    """
+    return remove_instrumentation(SEND_PATH)
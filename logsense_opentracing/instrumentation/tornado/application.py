@@ -0,0 +1,150 @@
+"""
+`Tornado <https://www.tornadoweb.org/>`_ application integration
+
+Unlike `tornado_route`, handlers don't have to be patched one by one. Span is started in `prepare`
+and finished in `on_finish`, so it measures whole request including asynchronous handlers,
+`async def prepare` and errors::
+
+    import logging
+    import tornado.ioloop
+    import tornado.web
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation import TornadoTracing
+
+
+    setup_tracer(component='tornado server')
+
+
+    class MainHandler(tornado.web.RequestHandler):
+        async def get(self):
+            logging.info('Hello, world')
+            self.write('Hello, world')
+
+
+    if __name__ == "__main__":
+        app = tornado.web.Application([(r"/", MainHandler)])
+        TornadoTracing(app)
+        app.listen(8889)
+        tornado.ioloop.IOLoop.current().start()
+
+Span is activated in context of the request (see `ScopeManager.activate_context`), which Tornado's IOLoop
+propagates to coroutines and callbacks of the handler. Operation name is request method with handler's class
+name, e.g. ``GET MainHandler``. Span gets `span.kind`, `http.method`, `http.url`, `peer.ipv4`,
+`http.status_code` and `http.response_bytes` tags
+"""
+import logging
+
+import opentracing
+
+from ..wsgi import finish_server_span
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+
+class TracingRequestHandlerMixin:
+    """
+    Mixin of `tornado.web.RequestHandler`, which traces requests of the handler.
+    It should precede `RequestHandler` in base classes, `TornadoTracing` applies it to all handlers
+    """
+    _logsense_span = None
+    _logsense_token = None
+    _logsense_exception = None
+    _logsense_bytes = 0
+
+    def prepare(self):
+        """
+        Start and activate span of the request
+        """
+        request = self.request
+        try:
+            context = opentracing.tracer.extract(opentracing.propagation.Format.HTTP_HEADERS, request.headers)
+        except Exception as exception:  # pylint: disable=broad-except
+            log.warning(exception)
+            context = None
+
+        self._logsense_span = opentracing.tracer.start_span(
+            '{} {}'.format(request.method, type(self).__name__), child_of=context, ignore_active_span=True, tags={
+                'span.kind': 'server',
+                'http.method': request.method,
+                'http.url': request.full_url(),
+                'peer.ipv4': request.remote_ip
+            })
+        self._logsense_span.set_tag('error', False)
+        self._logsense_token = opentracing.tracer.scope_manager.activate_context(self._logsense_span)
+
+        # Result of asynchronous `prepare` is awaited by Tornado
+        return super().prepare()
+
+    def flush(self, *args, **kwargs):  # pylint: disable=missing-docstring
+        self._logsense_bytes += sum(len(part) for part in self._write_buffer)  # pylint: disable=no-member
+        return super().flush(*args, **kwargs)
+
+    def log_exception(self, typ, value, tb):  # pylint: disable=missing-docstring
+        from tornado.web import HTTPError  # Optional import, not everyone is going to install tornado module
+
+        # HTTP errors are reflected by status code
+        if not isinstance(value, HTTPError):
+            self._logsense_exception = value
+        return super().log_exception(typ, value, tb)
+
+    def on_finish(self):
+        """
+        Tag span with response status and size and finish it
+        """
+        try:
+            return super().on_finish()
+        finally:
+            # Requests rejected before `prepare` (e.g. unsupported method) have no span
+            if self._logsense_span is not None:
+                finish_server_span(self._logsense_span, self.get_status(), self._logsense_bytes,
+                                   self._logsense_exception)
+                opentracing.tracer.scope_manager.deactivate_context(self._logsense_token)
+                self._logsense_span = None
+
+
+class TornadoTracing:
+    """
+    Trace every request of Tornado application. Handlers get `TracingRequestHandlerMixin`
+    when the request is dispatched, so they can be added to the application at any time
+
+    :param app: Tornado application, it can be also passed later to `init_app`
+    :type app: ``tornado.web.Application``
+    """
+
+    def __init__(self, app=None):
+        self._handlers = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Replace `get_handler_delegate` of `app` with version which traces handlers
+
+        :param app: Tornado application
+        :type app: ``tornado.web.Application``
+        """
+        get_handler_delegate = app.get_handler_delegate
+
+        def traced_get_handler_delegate(request, target_class, *args, **kwargs):
+            return get_handler_delegate(request, self.traced_handler(target_class), *args, **kwargs)
+
+        app.get_handler_delegate = traced_get_handler_delegate
+
+    def traced_handler(self, handler_class):
+        """
+        Get subclass of `handler_class` with `TracingRequestHandlerMixin`, it's created once per class
+
+        :param handler_class: Request handler
+        :type handler_class: ``type``
+        """
+        if issubclass(handler_class, TracingRequestHandlerMixin):
+            return handler_class
+
+        traced = self._handlers.get(handler_class)
+        if traced is None:
+            traced = type(handler_class.__name__, (TracingRequestHandlerMixin, handler_class),
+                          {'__module__': handler_class.__module__, '__qualname__': handler_class.__qualname__})
+            self._handlers[handler_class] = traced
+        return traced
@@ -7,6 +7,9 @@ from ..utils import extract_http_carrier
 
 def tornado_route(scope, *args, **kwargs):
     """
+    Extract information from tornado request and put into opentracing scope.
+    `TornadoTracing`, which measures whole request of any handler, is preferred
+
     ::
 
         \"\"\"
@@ -50,7 +53,7 @@ def tornado_route(scope, *args, **kwargs):
     """
     handler = args[0]
 
-    extract_http_carrier(handler.request.headers)
+    extract_http_carrier(handler.request.headers, scope.span)
 
     # Extract request information
     scope.span.set_tag('http.url', handler.request.full_url())
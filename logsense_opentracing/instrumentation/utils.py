@@ -2,17 +2,17 @@
 Logsense opentracing utils. Helpers for manipulating modules paths
 """
 import os
+import sys
 import logging
 import importlib
 import opentracing
 
+# Header names are kept here for backward compatibility
+from ..propagation import (HTTP_SPAN_ID, HTTP_TRACE_ID,  # pylint: disable=unused-import
+                           HTTP_BAGGAGE_PREFIX, HTTP_BAGGAGE_PREFIX_LEN)
 
-ALL_ARGS = object()
 
-HTTP_SPAN_ID = 'ot-tracer-spanid'
-HTTP_TRACE_ID = 'ot-tracer-traceid'
-HTTP_BAGGAGE_PREFIX = 'ot-baggage-'
-HTTP_BAGGAGE_PREFIX_LEN = len(HTTP_BAGGAGE_PREFIX)
+ALL_ARGS = object()
 
 
 log = logging.getLogger('logsense.opentracing')  # pylint: disable=invalid-name
@@ -31,47 +31,38 @@ def get_obj_from_path(module):
     mod = importlib.import_module(paths[0])
 
     for i in range(1, len(paths)-1):
+        # Module which is being imported is not yet an attribute of its parent
+        if not hasattr(mod, paths[i]) and '.'.join(paths[:i+1]) in sys.modules:
+            mod = sys.modules['.'.join(paths[:i+1])]
+            continue
         mod = getattr(mod, paths[i])
 
     return mod, paths[-1], getattr(mod, paths[-1])
 
 
-def extract_http_carrier(headers):
+def extract_http_carrier(headers, span=None):
     """
-    Extract baggage from given dictionary of HTTP headers
+    Extract span context from given HTTP headers and make it remote parent of `span`
 
     :param headers: HTTP headers container
     :type headers: ``dict``
+    :param span: Span of the request, the active span is used if None
+    :type span: ``opentracing.Span``
 
-    :returns: Carrier dictionary
+    :returns: Extracted span context or None
     """
-    # Extract trace if available
-    carrier = {
-        'baggage': {}
-    }
-
-    if headers.get(HTTP_TRACE_ID):
-        try:
-            carrier['trace_id'] = int(headers[HTTP_TRACE_ID], 16)
-        except ValueError:
-            log.warning('Incorrect header value: %s', headers[HTTP_TRACE_ID])
-
-    if headers.get(HTTP_SPAN_ID):
-        try:
-            carrier['span_id'] = int(headers[HTTP_SPAN_ID], 16)
-        except ValueError:
-            log.warning('Incorrect header value: %s', headers[HTTP_SPAN_ID])
-
-    for name, value in headers.items():
-        if name.startswith(HTTP_BAGGAGE_PREFIX) and name != HTTP_BAGGAGE_PREFIX:
-            carrier[name[HTTP_BAGGAGE_PREFIX_LEN:]] = value
-
     try:
-        opentracing.tracer.extract(opentracing.propagation.Format.TEXT_MAP, carrier)
+        context = opentracing.tracer.extract(opentracing.propagation.Format.HTTP_HEADERS, headers)
     except Exception as exception:  # pylint: disable=broad-except
         log.warning(exception)
+        return None
+
+    span = opentracing.tracer.active_span if span is None else span
+    if context is not None and span is not None:
+        span.context.set_remote_parent(context)
+
+    return context
 
-    return carrier
 
 def install_bootstrap():
     """
@@ -0,0 +1,196 @@
+"""
+`WSGI <https://peps.python.org/pep-3333/>`_ middleware
+
+Every request gets one server span, which is started before the application is called and finished when
+the server closes the response iterable, so streamed responses are measured until their last chunk::
+
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.instrumentation import TracingMiddleware
+
+    setup_tracer(component='wsgi')
+    application = TracingMiddleware(application)
+
+Span context is extracted from ``HTTP_*`` keys of propagation headers in the environ. Span gets `span.kind`, `http.method`,
+`http.url`, `peer.ipv4`, `http.status_code` and `http.response_bytes` tags. It's active while the application
+is called and while the response is iterated, so logs of the request (and of streaming generators)
+are attached to it. The span is kept in the environ under `ENVIRON_SPAN` key, so frameworks can rename it
+"""
+import logging
+from wsgiref.util import request_uri
+
+import opentracing
+
+from ..exception_capture import log_exception
+from ..propagation import HTTP_BAGGAGE_PREFIX, HTTP_SPAN_ID, HTTP_TRACE_ID, TRACEPARENT, TRACESTATE, B3_SINGLE, \
+    B3_TRACE_ID, B3_SPAN_ID, B3_SAMPLED
+from ..scope import Scope
+
+
+ENVIRON_SPAN = 'logsense_opentracing.span'
+
+
+def _environ_key(header):
+    return 'HTTP_' + header.upper().replace('-', '_')
+
+
+# Environ keys of headers used by HTTP propagators, looked up directly instead of scanning whole environ
+PROPAGATION_KEYS = tuple((_environ_key(header), header) for header in (
+    HTTP_TRACE_ID, HTTP_SPAN_ID, TRACEPARENT, TRACESTATE, B3_SINGLE, B3_TRACE_ID, B3_SPAN_ID, B3_SAMPLED))
+BAGGAGE_KEY_PREFIX = _environ_key(HTTP_BAGGAGE_PREFIX)
+BAGGAGE_KEY_PREFIX_LEN = len(BAGGAGE_KEY_PREFIX)
+
+
+log = logging.getLogger('logsense.opentracing.instrumentation')  # pylint: disable=invalid-name
+
+
+def environ_headers(environ):
+    """
+    Get propagation headers of the request from WSGI environ, e.g. ``HTTP_OT_TRACER_TRACEID`` as
+    ``ot-tracer-traceid``. Baggage headers are looked for only if the request carries trace of `ot` format,
+    other propagators don't read them
+
+    :param environ: WSGI environ
+    :type environ: ``dict``
+
+    :returns: Dictionary with lower case header names, None if there are no propagation headers
+    """
+    carrier = None
+    for key, header in PROPAGATION_KEYS:
+        value = environ.get(key)
+        if value is not None:
+            if carrier is None:
+                carrier = {}
+            carrier[header] = value
+
+    if carrier is not None and HTTP_TRACE_ID in carrier:
+        for key, value in environ.items():
+            if key.startswith(BAGGAGE_KEY_PREFIX):
+                carrier[HTTP_BAGGAGE_PREFIX + key[BAGGAGE_KEY_PREFIX_LEN:].replace('_', '-').lower()] = value
+    return carrier
+
+
+def start_server_span(environ):
+    """
+    Start (not activated) server span of the request, which continues trace of the caller
+
+    :param environ: WSGI environ
+    :type environ: ``dict``
+
+    :returns: Started span
+    """
+    carrier = environ_headers(environ)
+    context = None
+    # Requests without propagation headers (most of them) don't need extraction
+    if carrier is not None:
+        try:
+            context = opentracing.tracer.extract(opentracing.propagation.Format.HTTP_HEADERS, carrier)
+        except Exception as exception:  # pylint: disable=broad-except
+            log.warning(exception)
+
+    method = environ.get('REQUEST_METHOD', 'GET')
+    span = opentracing.tracer.start_span('HTTP {}'.format(method), child_of=context, ignore_active_span=True, tags={
+        'span.kind': 'server',
+        'http.method': method,
+        'http.url': request_uri(environ),
+        'peer.ipv4': environ.get('REMOTE_ADDR')
+    })
+    span.set_tag('error', False)
+    environ[ENVIRON_SPAN] = span
+    return span
+
+
+def finish_server_span(span, status_code=None, response_bytes=None, exception=None):
+    """
+    Tag server span with response information and finish it
+
+    :param span: Server span
+    :type span: ``opentracing.Span``
+    :param status_code: Response status, None if response wasn't started
+    :type status_code: ``int``
+    :param response_bytes: Length of sent response body
+    :type response_bytes: ``int``
+    :param exception: Exception raised by the application
+    :type exception: ``BaseException``
+    """
+    if exception is not None:
+        log_exception(span, exception)
+    if status_code is not None:
+        span.set_tag('http.status_code', status_code)
+        if status_code >= 500:
+            span.set_tag('error', True)
+    if response_bytes is not None:
+        span.set_tag('http.response_bytes', response_bytes)
+    span.finish()
+
+
+def _status_code(status):
+    try:
+        return int(status.split(' ', 1)[0])
+    except ValueError:
+        return None
+
+
+class _ResponseIterable:
+    """
+    Response of the application, which counts sent bytes and finishes span when it's closed
+    """
+    __slots__ = ['_iterable', '_span', '_response', '_bytes', '_exception']
+
+    def __init__(self, iterable, span, response):
+        self._iterable = iterable
+        self._span = span
+        self._response = response
+        self._bytes = 0
+        self._exception = None
+
+    def __iter__(self):
+        # Local variable with name of `SCOPE_VARIABLE` makes span active for the iterated application
+        scope = Scope(opentracing.tracer.scope_manager, self._span)
+        logsense_opentracing_scope = scope  # pylint: disable=unused-variable
+        try:
+            for chunk in self._iterable:
+                self._bytes += len(chunk)
+                yield chunk
+        except Exception as exception:
+            self._exception = exception
+            raise
+
+    def close(self):
+        """
+        Close application's iterable and finish span
+        """
+        try:
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+        finally:
+            finish_server_span(self._span, self._response.get('status_code'), self._bytes, self._exception)
+
+
+class TracingMiddleware:
+    """
+    WSGI middleware which traces every request of wrapped application
+
+    :param application: WSGI application
+    :type application: ``callable``
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        span = start_server_span(environ)
+        response = {}
+
+        def traced_start_response(status, headers, exc_info=None):
+            response['status_code'] = _status_code(status)
+            return start_response(status, headers, exc_info)
+
+        # Local variable with name of `SCOPE_VARIABLE` makes span active for the application
+        logsense_opentracing_scope = Scope(opentracing.tracer.scope_manager, span)  # pylint: disable=unused-variable
+        try:
+            iterable = self.application(environ, traced_start_response)
+        except Exception as exception:
+            finish_server_span(span, response.get('status_code'), exception=exception)
+            raise
+
+        return _ResponseIterable(iterable, span, response)
@@ -0,0 +1,50 @@
+"""
+Lazy tag values
+
+Formatting some tag values is expensive and doesn't have to be done on the thread which creates the span.
+Such values can be wrapped in `Lazy` subclass. They are resolved by `Span.get_data`, which runs on the tracer's
+processing thread::
+
+    from logsense_opentracing.lazy import Lazy
+
+    class Hex(Lazy):
+        __slots__ = ['value']
+
+        def __init__(self, value):
+            self.value = value
+
+        def resolve(self):
+            return hex(self.value)
+
+    scope.span.set_tag('address', Hex(id(obj)))
+
+Only values which don't change after setting the tag (e.g. immutable objects) should be deferred
+"""
+
+# Values of these types can't change after capturing, so formatting them can be deferred
+IMMUTABLE_TYPES = frozenset([type(None), bool, int, float, complex, str, bytes])
+
+
+class Lazy:  # pylint: disable=too-few-public-methods
+    """
+    Tag value resolved on the export thread
+    """
+    __slots__ = ()
+
+    def resolve(self):
+        """
+        :returns: Value which is sent instead of this object
+        """
+        raise NotImplementedError
+
+
+def resolve_all(values):
+    """
+    Resolve all `Lazy` values of dictionary
+
+    :param values: Dictionary with lazy and regular values
+    :type values: ``dict``
+
+    :returns: New dictionary with resolved values
+    """
+    return {key: value.resolve() if isinstance(value, Lazy) else value for key, value in values.items()}
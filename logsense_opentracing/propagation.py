@@ -0,0 +1,376 @@
+"""
+Span context propagation formats
+
+`Tracer.inject` and `Tracer.extract` support three formats of `opentracing.propagation.Format`:
+
+    * ``TEXT_MAP`` - dictionary with `trace_id`, `span_id` (decimal strings) and `baggage` dictionary
+    * ``HTTP_HEADERS`` - `ot-tracer-traceid` and `ot-tracer-spanid` headers with hexadecimal identifiers
+      and `ot-baggage-<key>` header per baggage item. Identifiers are read by direct lookups,
+      so header containers of web frameworks (which are case insensitive) should be passed as they are
+    * ``BINARY`` - fixed layout `bytearray`, suitable for message queues. Context is appended to the carrier::
+
+        # Version, flags, trace identifier (high and low 64 bits), span identifier, number of baggage items
+        struct.pack('>BBQQQH', ...)
+        # Every baggage item: key and value as UTF-8 strings prefixed by their length
+        struct.pack('>H', ...)
+
+Services which use other tracers can be joined by other HTTP formats:
+
+    * ``tracecontext`` - W3C Trace Context `traceparent` and `tracestate` headers
+    * ``b3`` - Zipkin B3 single `b3` header
+    * ``b3multi`` - Zipkin B3 `x-b3-*` headers
+    * ``ot`` - `ot-tracer-*` headers described above, the default one
+
+`CompositePropagator` injects context in all given formats and extracts it from the first one found.
+HTTP formats are selected by `setup_tracer(propagation=...)` (or `LOGSENSE_PROPAGATION` environmental variable
+with comma separated names). Propagator of any format can be also registered directly::
+
+    import opentracing
+    from logsense_opentracing.propagation import http_propagator
+
+    opentracing.tracer.register_propagator(opentracing.propagation.Format.HTTP_HEADERS,
+                                           http_propagator(['tracecontext', 'b3multi', 'ot']))
+
+Propagator is an object with `inject(span_context, carrier)` and `extract(carrier)` methods.
+`extract` returns new `SpanContext` or None if carrier doesn't contain span context
+"""
+import struct
+import logging
+
+import opentracing
+
+from .span_context import SpanContext
+
+
+log = logging.getLogger('logsense.opentracing')  # pylint: disable=invalid-name
+
+HTTP_SPAN_ID = 'ot-tracer-spanid'
+HTTP_TRACE_ID = 'ot-tracer-traceid'
+HTTP_BAGGAGE_PREFIX = 'ot-baggage-'
+HTTP_BAGGAGE_PREFIX_LEN = len(HTTP_BAGGAGE_PREFIX)
+
+BINARY_VERSION = 1
+
+_BINARY_HEADER = struct.Struct('>BBQQQH')
+_BINARY_LENGTH = struct.Struct('>H')
+_MASK_64 = (1 << 64) - 1
+_MASK_128 = (1 << 128) - 1
+_MAX_LENGTH = (1 << 16) - 1
+
+TRACEPARENT = 'traceparent'
+TRACESTATE = 'tracestate'
+_TRACEPARENT_LENGTH = 55
+
+B3_SINGLE = 'b3'
+B3_TRACE_ID = 'x-b3-traceid'
+B3_SPAN_ID = 'x-b3-spanid'
+B3_SAMPLED = 'x-b3-sampled'
+
+_HEX_DIGITS = frozenset('0123456789abcdef')
+
+
+def to_int(identifier):
+    """
+    Convert trace or span identifier to integer. Identifiers extracted by older versions are decimal strings
+    """
+    return identifier if type(identifier) is int else int(identifier)  # pylint: disable=unidiomatic-typecheck
+
+
+def _parse_hex(value, widths):
+    """
+    Parse lower case hexadecimal identifier of one of the allowed `widths`
+
+    :returns: Integer or None if the value isn't valid or it's zero
+    """
+    if len(value) not in widths or not _HEX_DIGITS.issuperset(value):
+        return None
+    return int(value, 16) or None
+
+
+class TextMapPropagator:
+    """
+    `TEXT_MAP` format with `trace_id`, `span_id` and `baggage` keys
+    """
+
+    @staticmethod
+    def inject(span_context, carrier):  # pylint: disable=missing-docstring
+        carrier['trace_id'] = str(span_context.trace_id)
+        carrier['span_id'] = str(span_context.span_id)
+        carrier['baggage'] = dict(span_context.baggage)
+
+    @staticmethod
+    def extract(carrier):  # pylint: disable=missing-docstring
+        trace_id = carrier.get('trace_id')
+        span_id = carrier.get('span_id')
+        if trace_id is None or span_id is None:
+            return None
+
+        try:
+            trace_id, span_id = to_int(trace_id), to_int(span_id)
+        except ValueError:
+            log.warning('Incorrect span context: %s, %s', trace_id, span_id)
+            return None
+
+        return SpanContext(trace_id=trace_id, span_id=span_id, baggage=dict(carrier.get('baggage') or {}))
+
+
+class HTTPHeadersPropagator:
+    """
+    `HTTP_HEADERS` format with `ot-tracer-*` and `ot-baggage-*` headers
+    """
+
+    @staticmethod
+    def inject(span_context, carrier):  # pylint: disable=missing-docstring
+        carrier[HTTP_TRACE_ID] = '%x' % to_int(span_context.trace_id)
+        carrier[HTTP_SPAN_ID] = '%x' % to_int(span_context.span_id)
+        for key, value in span_context.baggage.items():
+            carrier[HTTP_BAGGAGE_PREFIX + key] = value
+
+    @staticmethod
+    def extract(carrier):  # pylint: disable=missing-docstring
+        trace_id = carrier.get(HTTP_TRACE_ID)
+        span_id = carrier.get(HTTP_SPAN_ID)
+        if not trace_id or not span_id:
+            return None
+
+        try:
+            trace_id, span_id = int(trace_id, 16), int(span_id, 16)
+        except ValueError:
+            log.warning('Incorrect header value: %s, %s', trace_id, span_id)
+            return None
+
+        # Header names can be normalized by web framework, e.g. `Ot-Baggage-Key`
+        baggage = {}
+        for name, value in carrier.items():
+            if len(name) > HTTP_BAGGAGE_PREFIX_LEN and name[:HTTP_BAGGAGE_PREFIX_LEN].lower() == HTTP_BAGGAGE_PREFIX:
+                baggage[name[HTTP_BAGGAGE_PREFIX_LEN:].lower()] = value
+
+        return SpanContext(trace_id=trace_id, span_id=span_id, baggage=baggage)
+
+
+class BinaryPropagator:
+    """
+    `BINARY` format, `struct` packed span context appended to `bytearray`
+    """
+
+    @staticmethod
+    def inject(span_context, carrier):  # pylint: disable=missing-docstring
+        if not isinstance(carrier, bytearray):
+            raise opentracing.InvalidCarrierException('Binary carrier should be bytearray')
+
+        trace_id = to_int(span_context.trace_id)
+        items = [(key.encode('utf-8'), str(value).encode('utf-8')) for key, value in span_context.baggage.items()]
+        for key, value in items:
+            if len(key) > _MAX_LENGTH or len(value) > _MAX_LENGTH:
+                raise ValueError('Baggage item {} is too long'.format(key.decode('utf-8')))
+
+        carrier += _BINARY_HEADER.pack(BINARY_VERSION, 0, (trace_id >> 64) & _MASK_64, trace_id & _MASK_64,
+                                       to_int(span_context.span_id) & _MASK_64, len(items))
+        for key, value in items:
+            carrier += _BINARY_LENGTH.pack(len(key))
+            carrier += key
+            carrier += _BINARY_LENGTH.pack(len(value))
+            carrier += value
+
+    @staticmethod
+    def extract(carrier):  # pylint: disable=missing-docstring
+        if not isinstance(carrier, (bytes, bytearray, memoryview)):
+            raise opentracing.InvalidCarrierException('Binary carrier should be bytes-like object')
+
+        if not carrier:
+            return None
+
+        try:
+            version, _, trace_high, trace_low, span_id, items = _BINARY_HEADER.unpack_from(carrier)
+            if version != BINARY_VERSION:
+                raise opentracing.SpanContextCorruptedException('Unsupported version {}'.format(version))
+
+            view = memoryview(carrier)
+            offset = _BINARY_HEADER.size
+            baggage = {}
+            for _ in range(items):
+                key_length, = _BINARY_LENGTH.unpack_from(view, offset)
+                offset += _BINARY_LENGTH.size
+                key = str(view[offset:offset + key_length], 'utf-8')
+                offset += key_length
+
+                value_length, = _BINARY_LENGTH.unpack_from(view, offset)
+                offset += _BINARY_LENGTH.size
+                value = str(view[offset:offset + value_length], 'utf-8')
+                offset += value_length
+
+                if offset > len(view):
+                    raise opentracing.SpanContextCorruptedException('Truncated baggage')
+                baggage[key] = value
+        except (struct.error, UnicodeDecodeError) as exception:
+            raise opentracing.SpanContextCorruptedException(str(exception))
+
+        return SpanContext(trace_id=(trace_high << 64) | trace_low, span_id=span_id, baggage=baggage)
+
+
+class TraceContextPropagator:
+    """
+    W3C Trace Context (https://www.w3.org/TR/trace-context/) `traceparent` and `tracestate` headers
+    """
+
+    @staticmethod
+    def inject(span_context, carrier):  # pylint: disable=missing-docstring
+        carrier[TRACEPARENT] = '00-%032x-%016x-01' % (to_int(span_context.trace_id) & _MASK_128,
+                                                     to_int(span_context.span_id) & _MASK_64)
+        if span_context.trace_state:
+            carrier[TRACESTATE] = span_context.trace_state
+
+    @staticmethod
+    def extract(carrier):  # pylint: disable=missing-docstring
+        value = carrier.get(TRACEPARENT)
+        if not value:
+            return None
+
+        # Fixed width fields: version, trace identifier, parent identifier and flags
+        value = value.strip()
+        if len(value) < _TRACEPARENT_LENGTH or value[2] != '-' or value[35] != '-' or value[52] != '-':
+            return None
+
+        version = value[:2]
+        if version == 'ff' or not _HEX_DIGITS.issuperset(version) or not _HEX_DIGITS.issuperset(value[53:55]):
+            return None
+        # Future versions can append fields
+        if len(value) > _TRACEPARENT_LENGTH and (version == '00' or value[_TRACEPARENT_LENGTH] != '-'):
+            return None
+
+        trace_id = _parse_hex(value[3:35], (32,))
+        span_id = _parse_hex(value[36:52], (16,))
+        if trace_id is None or span_id is None:
+            return None
+
+        return SpanContext(trace_id=trace_id, span_id=span_id, baggage={}, trace_state=carrier.get(TRACESTATE))
+
+
+class B3Propagator:
+    """
+    Zipkin B3 (https://github.com/openzipkin/b3-propagation) single `b3` header
+    """
+
+    @staticmethod
+    def inject(span_context, carrier):  # pylint: disable=missing-docstring
+        carrier[B3_SINGLE] = '%s-%016x-1' % (_b3_trace_id(span_context.trace_id),
+                                             to_int(span_context.span_id) & _MASK_64)
+
+    @staticmethod
+    def extract(carrier):  # pylint: disable=missing-docstring
+        value = carrier.get(B3_SINGLE)
+        if not value:
+            return None
+
+        # `{trace_id}-{span_id}-{sampled}-{parent_span_id}`, the last two are optional.
+        # Single `0` (or other sampling decision) doesn't contain context
+        fields = value.strip().lower().split('-')
+        if len(fields) < 2 or len(fields) > 4:
+            return None
+        if len(fields) > 2 and fields[2] not in ('0', '1', 'd'):
+            return None
+        if len(fields) == 4 and _parse_hex(fields[3], (16,)) is None:
+            return None
+
+        trace_id = _parse_hex(fields[0], (16, 32))
+        span_id = _parse_hex(fields[1], (16,))
+        if trace_id is None or span_id is None:
+            return None
+
+        return SpanContext(trace_id=trace_id, span_id=span_id, baggage={})
+
+
+class B3MultiPropagator:
+    """
+    Zipkin B3 (https://github.com/openzipkin/b3-propagation) `x-b3-*` headers
+    """
+
+    @staticmethod
+    def inject(span_context, carrier):  # pylint: disable=missing-docstring
+        carrier[B3_TRACE_ID] = _b3_trace_id(span_context.trace_id)
+        carrier[B3_SPAN_ID] = '%016x' % (to_int(span_context.span_id) & _MASK_64)
+        carrier[B3_SAMPLED] = '1'
+
+    @staticmethod
+    def extract(carrier):  # pylint: disable=missing-docstring
+        trace_id = carrier.get(B3_TRACE_ID)
+        span_id = carrier.get(B3_SPAN_ID)
+        if not trace_id or not span_id:
+            return None
+
+        trace_id = _parse_hex(trace_id.strip().lower(), (16, 32))
+        span_id = _parse_hex(span_id.strip().lower(), (16,))
+        if trace_id is None or span_id is None:
+            return None
+
+        return SpanContext(trace_id=trace_id, span_id=span_id, baggage={})
+
+
+def _b3_trace_id(trace_id):
+    # 64 bit identifiers are sent as 16 characters, longer ones as 32
+    trace_id = to_int(trace_id) & _MASK_128
+    return '%016x' % trace_id if trace_id <= _MASK_64 else '%032x' % trace_id
+
+
+class CompositePropagator:
+    """
+    Propagator which injects span context in all formats and extracts it from the first one which is found
+
+    :param propagators: Propagators in order of precedence
+    :type propagators: ``list``
+    """
+
+    def __init__(self, propagators):
+        self.propagators = list(propagators)
+
+    def inject(self, span_context, carrier):  # pylint: disable=missing-docstring
+        for propagator in self.propagators:
+            propagator.inject(span_context, carrier)
+
+    def extract(self, carrier):  # pylint: disable=missing-docstring
+        for propagator in self.propagators:
+            try:
+                span_context = propagator.extract(carrier)
+            except opentracing.SpanContextCorruptedException as exception:
+                log.debug('Corrupted span context for %s: %s', propagator, exception)
+                continue
+
+            if span_context is not None:
+                return span_context
+
+        return None
+
+
+HTTP_PROPAGATORS = {
+    'ot': HTTPHeadersPropagator,
+    'tracecontext': TraceContextPropagator,
+    'b3': B3Propagator,
+    'b3multi': B3MultiPropagator,
+}
+
+
+def http_propagator(names):
+    """
+    Create propagator of HTTP formats
+
+    :param names: Names of formats (see `HTTP_PROPAGATORS`) in order of precedence
+    :type names: ``list``
+
+    :returns: Propagator of single format or `CompositePropagator`
+    """
+    try:
+        propagators = [HTTP_PROPAGATORS[name.strip().lower()]() for name in names]
+    except KeyError as exception:
+        raise ValueError('Unknown propagation format: {}'.format(exception))
+
+    if not propagators:
+        raise ValueError('No propagation format given')
+
+    return propagators[0] if len(propagators) == 1 else CompositePropagator(propagators)
+
+
+PROPAGATORS = {
+    opentracing.propagation.Format.TEXT_MAP: TextMapPropagator(),
+    opentracing.propagation.Format.HTTP_HEADERS: HTTPHeadersPropagator(),
+    opentracing.propagation.Format.BINARY: BinaryPropagator(),
+}
@@ -0,0 +1,240 @@
+"""
+Statistical stack sampling
+
+Spans tell which operation was slow, but not where inside it the time went. Stack sampler is a background thread,
+which periodically takes stacks of all threads (``sys._current_frames()``), finds active span of every thread
+and counts folded stacks (``module.function;module.function``, root first) per span and per operation::
+
+    import opentracing
+    from logsense_opentracing.utils import setup_tracer
+    from logsense_opentracing.sampler import StackSampler
+
+    setup_tracer(component='sampled')
+
+    sampler = StackSampler(interval=0.01)
+    sampler.start()
+    ...
+    sampler.stop()
+    print(sampler.stats())
+
+When span is finished, its samples are attached to it as single log record with `profile.samples`
+(number of samples) and `profile.stacks` (folded stacks with their counts, one per line, the most common first).
+Totals per operation are available by `StackSampler.operation_profiles`.
+
+Only spans activated in frames (``start_active_span``, patched functions, WSGI and ASGI middlewares) are found.
+Spans activated in context by `ScopeManager.activate_context` (e.g. by `TornadoTracing`) live in ``ContextVar``
+of the running task, which can't be read from another thread, so samples of such requests are counted as
+unattributed unless the handler starts an active span of its own
+
+Sampler measures its own time. If it takes more than `max_overhead` of wall time, sampling interval is increased.
+Number of rounds, samples, busy time, overhead and current interval are returned by `StackSampler.stats`
+"""
+import sys
+import time
+import logging
+import threading
+import collections
+import weakref
+
+import opentracing
+
+
+log = logging.getLogger('logsense.opentracing.sampler')  # pylint: disable=invalid-name
+
+# Name of local variable which is used by `ScopeManager` to find active scope
+SCOPE_VARIABLE = 'logsense_opentracing_scope'
+
+# Frames of this package are not reported in stacks
+_OWN_PACKAGE = 'logsense_opentracing'
+
+
+class StackSampler:  # pylint: disable=too-many-instance-attributes
+    """
+    Sampler thread
+
+    :param interval: Sampling interval in seconds
+    :type interval: ``float``
+    :param max_depth: Maximal number of frames walked per thread
+    :type max_depth: ``int``
+    :param max_stacks: Maximal number of distinct stacks reported per span and kept per operation
+    :type max_stacks: ``int``
+    :param max_overhead: Maximal fraction of wall time spent by sampler. Interval is increased if it's exceeded
+    :type max_overhead: ``float``
+    :param tracer: Tracer which spans are sampled. `opentracing.tracer` is used if None
+    :type tracer: ``Tracer``
+    """
+
+    def __init__(self, interval=0.01, max_depth=64, max_stacks=50,  # pylint: disable=too-many-arguments
+                 max_overhead=0.05, tracer=None):
+        self.interval = interval
+        self.min_interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.max_overhead = max_overhead
+        self._tracer = tracer
+
+        self._spans = weakref.WeakKeyDictionary()
+        self._operations = {}
+        self._names = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.rounds = 0
+        self.samples = 0
+        self.unattributed = 0
+        self.busy_time = 0.0
+        self._started = None
+
+    @property
+    def tracer(self):
+        """
+        Sampled tracer
+        """
+        return self._tracer if self._tracer is not None else opentracing.tracer
+
+    def start(self):
+        """
+        Start sampler thread
+        """
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._started = time.perf_counter()
+        self.tracer.add_finish_callback(self._on_finish)
+        self._thread = threading.Thread(target=self._run, name='logsense-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop sampler thread. Samples of spans which are still running are dropped
+        """
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self.tracer.remove_finish_callback(self._on_finish)
+        with self._lock:
+            self._spans.clear()
+        stats = self.stats()
+        log.info('Sampler stopped: %d samples in %d rounds, overhead %.2f%%',
+                 stats['samples'], stats['rounds'], stats['overhead'] * 100)
+
+    def _run(self):
+        own_thread = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            started = time.perf_counter()
+            self.sample(exclude=own_thread)
+            busy = time.perf_counter() - started
+            self.busy_time += busy
+
+            # Keep sampler's own cost bounded
+            if busy > self.interval * self.max_overhead:
+                self.interval = busy / self.max_overhead
+            elif self.interval > self.min_interval:
+                self.interval = max(self.min_interval, self.interval / 2)
+
+    def sample(self, exclude=None):
+        """
+        Take single sample of all threads
+
+        :param exclude: Thread identifier which shouldn't be sampled
+        :type exclude: ``int``
+        """
+        self.rounds += 1
+        for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+            if thread_id == exclude:
+                continue
+
+            span, stack = self._walk(frame)
+            if span is None:
+                self.unattributed += 1
+                continue
+
+            self.samples += 1
+            folded = ';'.join(reversed(stack))
+            with self._lock:
+                counter = self._spans.get(span)
+                if counter is None:
+                    counter = self._spans[span] = collections.Counter()
+                if folded in counter or len(counter) < self.max_stacks:
+                    counter[folded] += 1
+
+    def _walk(self, frame):
+        """
+        Walk frames from the innermost one until frame with active scope. Scopes activated in context aren't
+        visible here, see module documentation
+
+        :returns: Span and list of frame names (innermost first) or (None, None) if there is no active span
+        """
+        stack = []
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            scope = frame.f_locals.get(SCOPE_VARIABLE)
+
+            name = self._name(frame)
+            if name is not None:
+                stack.append(name)
+
+            if scope is not None:
+                return scope.span, stack
+
+            frame = frame.f_back
+            depth += 1
+
+        return None, None
+
+    def _name(self, frame):
+        code = frame.f_code
+        name = self._names.get(code, False)
+        if name is False:
+            module = frame.f_globals.get('__name__', '')
+            name = None if module.startswith(_OWN_PACKAGE) else \
+                '{}.{}'.format(module, getattr(code, 'co_qualname', code.co_name))
+            self._names[code] = name
+        return name
+
+    def _on_finish(self, span):
+        with self._lock:
+            counter = self._spans.pop(span, None)
+            if not counter:
+                return
+
+            operation_name = span._tags.get('operation_name')  # pylint: disable=protected-access
+            totals = self._operations.get(operation_name)
+            if totals is None:
+                totals = self._operations[operation_name] = collections.Counter()
+            for folded, count in counter.items():
+                if folded in totals or len(totals) < self.max_stacks:
+                    totals[folded] += count
+
+        span.log_kv({
+            'event': 'profile',
+            'profile.samples': sum(counter.values()),
+            'profile.stacks': '\n'.join('{} {}'.format(folded, count) for folded, count in counter.most_common())
+        })
+
+    def operation_profiles(self):
+        """
+        :returns: Dictionary of operation name and dictionary of folded stack and its number of samples
+        """
+        with self._lock:
+            return {name: dict(counter) for name, counter in self._operations.items()}
+
+    def stats(self):
+        """
+        :returns: Sampler statistics: rounds, samples, unattributed samples, busy time in seconds,
+            overhead (fraction of wall time) and current interval
+        """
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+        return {
+            'rounds': self.rounds,
+            'samples': self.samples,
+            'unattributed': self.unattributed,
+            'busy_time': self.busy_time,
+            'overhead': self.busy_time / elapsed if elapsed > 0 else 0.0,
+            'interval': self.interval
+        }
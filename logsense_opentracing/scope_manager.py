@@ -3,14 +3,28 @@ Opentracing's ScopeManager implementation.
 
 More details:
 https://opentracing-python.readthedocs.io/en/latest/api.html#opentracing.ScopeManager
+
+Active scope is stored as local variable of the frame which activated it. Frames are accessed
+by ``sys._getframe``, which doesn't build `inspect` frame records (source lines, contexts) for the whole stack.
+
+Frameworks which run single request in several callbacks of event loop (e.g. Tornado's `prepare` and `on_finish`)
+activate span in context (`contextvars`) instead. It's used when no frame keeps a scope, and it's propagated
+to coroutines and tasks of the request by the event loop
 """
 
-import inspect
+import sys
+import contextvars
 import opentracing
 
 from .scope import Scope
 
 
+# Name of local variable which keeps active scope
+SCOPE_VARIABLE = 'logsense_opentracing_scope'
+
+_context_scope = contextvars.ContextVar(SCOPE_VARIABLE, default=None)  # pylint: disable=invalid-name
+
+
 class ScopeManager(opentracing.ScopeManager):
     """
     Implements opentracing.ScopeManager
@@ -29,22 +43,64 @@ class ScopeManager(opentracing.ScopeManager):
             *span*. It is a programming error to neglect to call
             :meth:`Scope.close()` on the returned instance.
         """
-        parent_frame = inspect.stack()[2][0]
+        parent_frame = sys._getframe(2)  # pylint: disable=protected-access
         scope = Scope(self, span)
-        parent_frame.f_locals['logsense_opentracing_scope'] = scope
+        parent_frame.f_locals[SCOPE_VARIABLE] = scope
         return scope
 
+    def activate_context(self, span):
+        """
+        Make `span` active in current context, until `deactivate_context` is called.
+        Span isn't finished on deactivation
 
-    @property
-    def active(self):
-        stack = inspect.stack()
-        old_scope = None
-        for frame in range(2, min(len(stack), self.STACK_DEPTH)):
-            local_variables = stack[frame][0].f_locals
-            old_scope = local_variables.get('logsense_opentracing_scope', None)
-            if old_scope is None:
-                continue
+        :param span: Activated span
+        :type span: ``opentracing.Span``
+
+        :returns: Token for `deactivate_context`
+        """
+        return _context_scope.set(Scope(self, span))
+
+    @staticmethod
+    def deactivate_context(token):
+        """
+        Restore scope which was active in context before `activate_context`
+
+        :param token: Token returned by `activate_context`
+        :type token: ``contextvars.Token``
+        """
+        try:
+            _context_scope.reset(token)
+        except ValueError:
+            # Token was created in another context, which is going to be dropped with its scope
+            pass
 
-            return old_scope
+    @staticmethod
+    def find(frame, depth=STACK_DEPTH):
+        """
+        Find scope stored in `frame` or its callers
+
+        :param frame: The innermost searched frame
+        :type frame: ``frame``
+        :param depth: Maximal number of searched frames
+        :type depth: ``int``
+
+        :returns: Scope or None if there is no active scope
+        """
+        while frame is not None and depth > 0:
+            scope = frame.f_locals.get(SCOPE_VARIABLE)
+            if scope is not None:
+                return scope
+            frame = frame.f_back
+            depth -= 1
 
         return None
+
+    @property
+    def active(self):
+        try:
+            frame = sys._getframe(2)  # pylint: disable=protected-access
+        except ValueError:
+            return _context_scope.get()
+
+        scope = self.find(frame, self.STACK_DEPTH - 2)
+        return scope if scope is not None else _context_scope.get()
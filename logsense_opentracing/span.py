@@ -23,23 +23,33 @@ so should be as meaningful for you as possible
 import time
 import opentracing
 
+from .lazy import Lazy, resolve_all
+
+
+# Behaviour of span which reached `Tracer.max_logs_per_span`
+DROP_NEWEST = 'drop'
+DROP_OLDEST = 'ring'
+
 
 class Span(opentracing.Span):
     """
     Implements `opentracing.Span <https://opentracing-python.readthedocs.io/en/latest/api.html#opentracing.Span>`_
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, start_time=None, **kwargs):
         super().__init__(*args, **kwargs)
 
         self._tags = {}
-        self._start_timestamp = time.time()
+        self._start_timestamp = time.time() if start_time is None else start_time
         self._logs = [{
             'timestamp': self._start_timestamp,
             'log': {}
         }]  # Initialize logs with empty log (for span purposes)
         self._end_timestamp = None
         self._duration = None
+        self._logs_dropped = 0
+        # Number of children sent to the server, they reference this span as their parent
+        self._exported_children = 0
 
     @property
     def _duration_us(self):
@@ -64,9 +74,22 @@ class Span(opentracing.Span):
         """
         Send structured logs from this span via logger
 
-        :param key_values: dictionary, which is treated as structured log
+        Number of logs per span is limited by `Tracer.max_logs_per_span`. Logs over the limit are dropped
+        (or the oldest ones are, see `Tracer.set_log_limit`) and counted in `logs_dropped` tag
+
+        :param key_values: dictionary, which is treated as structured log. It can be also `Lazy` object,
+            which is resolved to dictionary on the processing thread
         :param timestamp: time which is used to stamp log (None means current timestamp)
         """
+        max_logs = self.tracer.max_logs_per_span
+        # The first log is span itself
+        if max_logs is not None and len(self._logs) > max_logs:
+            self._logs_dropped += 1
+            self._tags['logs_dropped'] = self._logs_dropped
+            if self.tracer.log_overflow != DROP_OLDEST or max_logs == 0:
+                return
+            del self._logs[1]
+
         timestamp = time.time() if timestamp is None else timestamp
         self._logs.append({
             'timestamp': timestamp,
@@ -82,8 +105,40 @@ class Span(opentracing.Span):
         self._end_timestamp = time.time()
         self._duration = self._end_timestamp - self._start_timestamp
 
+        self.tracer.on_finish(self)
+
+        # Skip spans shorter than configured threshold, parent span keeps them as aggregates
+        min_duration_us = self.tracer.min_duration_us(self._tags.get('operation_name'))
+        if min_duration_us is not None and self._duration_us < min_duration_us and self._collapse():
+            return
+
+        parent = self.context.parent_span
+        if parent is not None:
+            parent._exported_children += 1  # pylint: disable=protected-access
         self.tracer.put_to_queue(self)
 
+    def _collapse(self):
+        """
+        Fold span into its parent as `collapsed_children` and `collapsed_time_us` tags.
+        Spans with errors, logs (including buffered ones) or exported children are never collapsed,
+        neither are root spans
+
+        :returns: True if span has been collapsed, False otherwise
+        """
+        parent = self.context.parent_span
+        if parent is None or parent._end_timestamp is not None:  # pylint: disable=protected-access
+            return False
+
+        if self._tags.get('error') or len(self._logs) > 1 or self._logs_dropped or self._exported_children or \
+                self._tags.get('logs_buffered'):
+            return False
+
+        parent_tags = parent._tags  # pylint: disable=protected-access
+        parent_tags['collapsed_children'] = parent_tags.get('collapsed_children', 0) + \
+            self._tags.get('collapsed_children', 0) + 1
+        parent_tags['collapsed_time_us'] = parent_tags.get('collapsed_time_us', 0) + self._duration_us
+        return True
+
     @staticmethod
     def _prefix_keys(data):
         """
@@ -93,18 +148,27 @@ class Span(opentracing.Span):
         """
         return {'ot.{}'.format(key): value for key, value in data.items()}
 
-    def get_data(self) -> dict:
+    def get_data(self, logs=None) -> dict:
         """
         Data which should be send to the logsense client
 
         Data is already prefixed and structured as ready to send dictionary
+
+        :param logs: Logs to be sent instead of span's logs, e.g. records attached after span was sent
+        :type logs: ``list``
         """
         return_value = []
 
-        for log in self._logs:
+        # Lazy tags are formatted here, on the processing thread, and only once for all logs
+        tags = self._prefix_keys(resolve_all(self._tags))
+
+        for log in self._logs if logs is None else logs:
             data = log['log']
-            _type = 'trace' if log['log'] == {} else 'python'
-            data.update(self._prefix_keys(self._tags))
+            if isinstance(data, Lazy):
+                data = data.resolve()
+            _type = 'trace' if data == {} else 'python'
+            data = resolve_all(data)
+            data.update(tags)
             data.update(self._prefix_keys(self.context.data))
             data.update(self._prefix_keys({
                 'duration_us': self._duration_us,
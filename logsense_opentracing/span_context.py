@@ -3,6 +3,9 @@ Opentracing's SpanContext implementation.
 
 More details:
 https://opentracing-python.readthedocs.io/en/latest/api.html#opentracing.SpanContext
+
+Span context of remote span (returned by `Tracer.extract`) keeps only identifiers and baggage.
+It can be passed to `Tracer.start_active_span` as `child_of` to continue remote trace
 """
 
 import opentracing
@@ -11,19 +14,31 @@ import opentracing
 class SpanContext(opentracing.SpanContext):
     """
     Implements opentracing.SpanContext
+
+    :param trace_id: Trace identifier
+    :param span_id: Span identifier
+    :param baggage: Baggage dictionary. It's shared until the first `set_baggage`
+    :param parent: Local parent span or None
+    :param trace_state: W3C `tracestate` of remote parent
+    :param parent_id: Identifier of parent span. Identifier of `parent` is used if None
     """
 
-    __slots__ = ['trace_id', 'span_id']
+    __slots__ = ['trace_id', 'span_id', 'trace_state', 'parent_id', '_baggage', '_parent']
 
-    def __init__(self,
+    def __init__(self,  # pylint: disable=too-many-arguments
                  trace_id,
                  span_id,
                  baggage=None,
-                 parent=None):
+                 parent=None,
+                 trace_state=None,
+                 parent_id=None):
         self.trace_id = trace_id
         self.span_id = span_id
-        self._baggage = baggage or opentracing.SpanContext.EMPTY_BAGGAGE
+        # W3C `tracestate` header of remote parent, it's forwarded to downstream services
+        self.trace_state = trace_state
+        self._baggage = baggage if baggage is not None else opentracing.SpanContext.EMPTY_BAGGAGE
         self._parent = parent
+        self.parent_id = parent.context.span_id if parent_id is None and parent is not None else parent_id
 
     @property
     def baggage(self):
@@ -33,8 +48,32 @@ class SpanContext(opentracing.SpanContext):
         """
         Set baggage `key` as `value`
         """
+        # Baggage is shared with parent context (or it's the empty one), so it's copied on write
+        self._baggage = dict(self._baggage)
         self._baggage[key] = value
 
+    def set_remote_parent(self, remote_context):
+        """
+        Continue remote trace, e.g. span of server request which was created before headers were extracted.
+        Trace identifier is taken from `remote_context` and its baggage is added to this context
+
+        :param remote_context: Context returned by `Tracer.extract`
+        :type remote_context: ``SpanContext``
+        """
+        self.trace_id = remote_context.trace_id
+        self.parent_id = remote_context.span_id
+        self.trace_state = remote_context.trace_state
+        self._parent = None
+        if remote_context.baggage:
+            self._baggage = {**remote_context.baggage, **self._baggage}
+
+    @property
+    def parent_span(self):
+        """
+        Local parent span or None for root spans and spans with remote parents
+        """
+        return self._parent
+
     @property
     def data(self) -> dict:
         """
@@ -45,7 +84,7 @@ class SpanContext(opentracing.SpanContext):
             'span_id': self.span_id
         }
 
-        if self._parent is not None:
-            return_value['parent_span_id'] = self._parent.span.context.span_id
+        if self.parent_id is not None:
+            return_value['parent_span_id'] = self.parent_id
 
         return return_value
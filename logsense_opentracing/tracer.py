@@ -15,10 +15,11 @@ from queue import Queue, Empty
 from threading import Lock, Thread
 import opentracing
 
-from .span import Span
+from .span import Span, DROP_NEWEST, DROP_OLDEST
 from .scope import Scope
 from .span_context import SpanContext
 from .scope_manager import ScopeManager
+from .propagation import PROPAGATORS
 
 
 log = logging.getLogger('logsense.opentracing.tracer')  # pylint: disable=invalid-name
@@ -39,9 +40,27 @@ class Tracer(opentracing.Tracer):
     """
     Implements opentracing.Tracer
     """
-    _supported_formats = [opentracing.propagation.Format.TEXT_MAP]
+    _supported_formats = list(PROPAGATORS)
 
-    def __init__(self, scope_manager=None, sender=None, component=None):
+    def __init__(self, scope_manager=None, sender=None, component=None,  # pylint: disable=too-many-arguments
+                 min_duration_us=None, operation_min_duration_us=None, max_logs_per_span=None,
+                 log_overflow=DROP_NEWEST):
+        """
+        :param scope_manager: Scope manager. `ScopeManager` is used if None
+        :param sender: Sender used to send finished spans
+        :param component: Default component name
+        :param min_duration_us: Spans shorter than this (in microseconds) aren't sent.
+            Their count and total time are added to parent span as `collapsed_children`
+            and `collapsed_time_us` tags. None disables filtering
+        :type min_duration_us: ``int``
+        :param operation_min_duration_us: Per operation name thresholds which override `min_duration_us`
+        :type operation_min_duration_us: ``dict``
+        :param max_logs_per_span: Maximal number of logs of single span. None disables the limit
+        :type max_logs_per_span: ``int``
+        :param log_overflow: `DROP_NEWEST` (``'drop'``) drops logs over the limit,
+            `DROP_OLDEST` (``'ring'``) keeps the newest ones
+        :type log_overflow: ``str``
+        """
         super().__init__(scope_manager=scope_manager)
 
         self._scope_manager = ScopeManager()  if scope_manager is None else scope_manager
@@ -56,6 +75,68 @@ class Tracer(opentracing.Tracer):
         self._thread.start()
         self._component = component
 
+        self._min_duration_us = min_duration_us
+        self._operation_min_duration_us = dict(operation_min_duration_us or {})
+
+        self._finish_callbacks = []
+        self._propagators = dict(PROPAGATORS)
+
+        self.max_logs_per_span = None
+        self.log_overflow = DROP_NEWEST
+        self.set_log_limit(max_logs_per_span, log_overflow)
+
+    def start_span(self,  # pylint: disable=too-many-arguments,arguments-differ
+                   operation_name=None,
+                   child_of=None,
+                   references=None,
+                   tags=None,
+                   start_time=None,
+                   ignore_active_span=False,
+                   component=None):
+        """
+        Start span without activating it. Parent is `child_of` (`Scope`, `Span` or `SpanContext`, e.g. returned
+        by `extract`), the first of `references` or the active span. Spans with remote parent (`SpanContext`
+        which doesn't belong to local span) continue its trace
+        """
+        if child_of is None and references:
+            child_of = references[0].referenced_context
+
+        # Get parent from arguments or by scope manager otherwise
+        if child_of is None and not ignore_active_span:
+            child_of = self._scope_manager.active
+
+        if isinstance(child_of, opentracing.Scope):
+            child_of = child_of.span
+
+        if isinstance(child_of, opentracing.Span):
+            parent_span, parent_context = child_of, child_of.context
+        else:
+            parent_span, parent_context = None, child_of
+
+        if parent_context is not None:
+            context = SpanContext(
+                span_id=self._random_id(),
+                trace_id=parent_context.trace_id,
+                baggage=parent_context.baggage,
+                parent=parent_span,
+                trace_state=parent_context.trace_state,
+                parent_id=parent_context.span_id
+                )
+        else:
+            # Assign new trace_id if there is no parent
+            context = SpanContext(span_id=self._random_id(), trace_id=self._random_id())
+
+        span = Span(tracer=self, context=context, start_time=start_time)
+        span.set_tag('operation_name', operation_name)
+        span.set_tag('component', component if component is not None else \
+                                  self._component if self._component is not None else \
+                                  operation_name)
+        if tags:
+            for key, value in tags.items():
+                span.set_tag(key, value)
+
+        return span
+
     def start_active_span(self,  # pylint: disable=too-many-arguments,arguments-differ
                           operation_name,
                           child_of=None,
@@ -66,27 +147,86 @@ class Tracer(opentracing.Tracer):
                           finish_on_close=True,
                           component=None):
 
-        # Get parent's scope from arguments or by scope manager otherwise
-        parent = child_of if child_of is not None else self._scope_manager.active
-
-        # Assign trace_id from parent's scope or generate it if scope doesn't exist
-        trace_id = parent.span.context.trace_id if parent is not None else self._random_id()
-
-        span = Span(tracer=self, context=SpanContext(
-            span_id=self._random_id(),
-            trace_id=trace_id,
-            baggage=parent.span.context.baggage if parent is not None else None,
-            parent=parent
-            ))
-        span.set_tag('operation_name', operation_name)
-        span.set_tag('component', component if component is not None else \
-                                  self._component if self._component is not None else \
-                                  operation_name)
+        span = self.start_span(operation_name, child_of=child_of, references=references, tags=tags,
+                               start_time=start_time, ignore_active_span=ignore_active_span, component=component)
 
         self._scope_manager.activate(span, finish_on_close=True)
         scope = Scope(self._scope_manager, span)
         return scope
 
+    def set_min_duration(self, min_duration_us, operation_name=None):
+        """
+        Set minimal duration of sent spans
+
+        :param min_duration_us: Threshold in microseconds. None disables filtering
+        :type min_duration_us: ``int``
+        :param operation_name: Operation which threshold is set. Global threshold is set if None
+        :type operation_name: ``str``
+        """
+        if operation_name is None:
+            self._min_duration_us = min_duration_us
+        elif min_duration_us is None:
+            self._operation_min_duration_us.pop(operation_name, None)
+        else:
+            self._operation_min_duration_us[operation_name] = min_duration_us
+
+    def min_duration_us(self, operation_name):
+        """
+        Get minimal duration of sent spans for given operation
+
+        :param operation_name: Operation name
+        :type operation_name: ``str``
+
+        :returns: Threshold in microseconds or None if spans shouldn't be filtered
+        """
+        return self._operation_min_duration_us.get(operation_name, self._min_duration_us)
+
+    def set_log_limit(self, max_logs_per_span, log_overflow=DROP_NEWEST):
+        """
+        Limit number of logs per span. Dropped logs are counted in span's `logs_dropped` tag
+
+        :param max_logs_per_span: Maximal number of logs of single span. None disables the limit
+        :type max_logs_per_span: ``int``
+        :param log_overflow: `DROP_NEWEST` (``'drop'``) drops logs over the limit,
+            `DROP_OLDEST` (``'ring'``) keeps the newest ones
+        :type log_overflow: ``str``
+        """
+        if log_overflow not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError('Unknown log overflow policy: {}'.format(log_overflow))
+
+        self.max_logs_per_span = max_logs_per_span
+        self.log_overflow = log_overflow
+
+    def add_finish_callback(self, callback):
+        """
+        Register function called with every finished span, before it's filtered and queued.
+        It's called on the thread which finishes the span, so it should be cheap
+
+        :param callback: Function which takes finished span
+        :type callback: ``callable``
+        """
+        self._finish_callbacks.append(callback)
+
+    def remove_finish_callback(self, callback):
+        """
+        Unregister function registered by `add_finish_callback`
+
+        :param callback: Registered function
+        :type callback: ``callable``
+        """
+        if callback in self._finish_callbacks:
+            self._finish_callbacks.remove(callback)
+
+    def on_finish(self, span):
+        """
+        Call finish callbacks for `span`. Errors are logged and ignored
+        """
+        for callback in self._finish_callbacks:
+            try:
+                callback(span)
+            except Exception as exception:  # pylint: disable=broad-except
+                log.warning('Finish callback %s failed: %s', callback, exception)
+
     def _random_id(self):
         return self.random.getrandbits(64)
 
@@ -133,40 +273,33 @@ class Tracer(opentracing.Tracer):
         """
         self._queue.put(None)
 
-    def extract(self, format, carrier):  # pylint: disable=redefined-builtin
-        active_context = self.active_span.context
-
-        if format != opentracing.propagation.Format.TEXT_MAP:
-            raise opentracing.propagation.UnsupportedFormatException(format)
-
-        mandatory_keys = {'trace_id', 'baggage', 'span_id'}
-        keys_difference = mandatory_keys - set(carrier.keys())
-        if keys_difference:
-            log.debug('Carrier incomplete. Lack of few keys: %s', keys_difference)
-            return active_context
+    def register_propagator(self, format, propagator):  # pylint: disable=redefined-builtin
+        """
+        Register propagator used by `inject` and `extract` for given format. See `logsense_opentracing.propagation`
 
-        active_context.trace_id = str(carrier['trace_id'])
+        :param format: Format name, e.g. `opentracing.propagation.Format.HTTP_HEADERS`
+        :type format: ``str``
+        :param propagator: Object with `inject(span_context, carrier)` and `extract(carrier)` methods
+        """
+        self._propagators[format] = propagator
 
-        # Create fake scope just to be parent scope
-        # ToDO: Improve parent managing. Aim is to avoid this hack
-        active_context._parent = Scope(
-            self._scope_manager,
-            span=Span(
-                tracer=self,
-                context=SpanContext(
-                    span_id=str(carrier['span_id']),
-                    trace_id=active_context.trace_id,
-                    baggage=carrier['baggage'] or None
-                    )))
+    def _propagator(self, format):  # pylint: disable=redefined-builtin
+        propagator = self._propagators.get(format)
+        if propagator is None:
+            raise opentracing.propagation.UnsupportedFormatException(format)
+        return propagator
 
-        for key, value in carrier['baggage'].items():
-            active_context.set_baggage(key, value)
+    def extract(self, format, carrier):  # pylint: disable=redefined-builtin
+        """
+        Extract span context from `carrier`. It doesn't change active span, returned context should be passed
+        to `start_active_span` as `child_of`
 
-        return active_context
+        :returns: New `SpanContext` or None if carrier doesn't contain span context
+        """
+        return self._propagator(format).extract(carrier)
 
     def inject(self, span_context, format, carrier):  # pylint: disable=redefined-builtin
-        if format != opentracing.propagation.Format.TEXT_MAP:
-            raise opentracing.propagation.UnsupportedFormatException(format)
+        propagator = self._propagator(format)
 
         if isinstance(span_context, Span):
             # be flexible and allow Span as argument, not only SpanContext
@@ -175,11 +308,5 @@ class Tracer(opentracing.Tracer):
         if not isinstance(span_context, SpanContext):
             raise ValueError('Expecting SpanContext, not {}'.format(type(span_context)))
 
-        carrier['baggage'] = {}
-        carrier['trace_id'] = str(span_context.trace_id)
-        carrier['span_id'] = str(span_context.span_id)
-
-        for key, value in span_context.baggage.items():
-            carrier['baggage'][key] = value
-
+        propagator.inject(span_context, carrier)
         return span_context
@@ -40,8 +40,24 @@ import opentracing
 from logsense.sender import LogSenseSender
 from logsense_opentracing.tracer import Tracer
 from logsense_opentracing.handler import OpentracingLogsenseHandler
+from logsense_opentracing.span import DROP_NEWEST
+from logsense_opentracing.propagation import http_propagator
 
-def setup_tracer(logsense_token=None, logger=None, sender=None, component=None):
+
+def _level_from_env(name, default):
+    """
+    Get logging level from environmental variable `name`
+    """
+    level = os.getenv(name, '').upper()
+    if level in ('CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG'):
+        return getattr(logging, level)
+    return default
+
+
+def setup_tracer(logsense_token=None, logger=None, sender=None,  # pylint: disable=too-many-arguments,too-many-locals
+                 component=None, min_duration_us=None, level=logging.DEBUG, max_logs_per_span=None,
+                 log_overflow=DROP_NEWEST, coalesce_logs=False, log_rate=None, log_burst=None,
+                 buffer_level=None, buffer_size=1000, keep_duration_us=None, propagation=None):
     """
     Setups tracer with all required informations.
 
@@ -62,26 +78,49 @@ def setup_tracer(logsense_token=None, logger=None, sender=None, component=None):
         sender
     :param sender: You can use your own sender, but as it was mentioned before, it makes us a saaad pandaaa
     :param component: Component name. In other words, it's your application name. It's used to track source of logs
+    :param min_duration_us: Spans shorter than given number of microseconds are not sent,
+        but counted in their parent spans. See `Tracer` for details
+    :param level: Minimal level of logs attached to spans. Logger's level is lowered to it if needed,
+        but it's not raised, so other handlers of the logger still get the same logs
+    :param max_logs_per_span: Maximal number of logs of single span. None disables the limit.
+        See `Tracer.set_log_limit` for details
+    :param log_overflow: `'drop'` drops logs over the limit, `'ring'` keeps the newest ones
+    :param coalesce_logs: Attach only the first log of every message template per span,
+        with number of occurrences and first and last timestamps. See `OpentracingLogsenseHandler`
+    :param log_rate: Logs of single message template per second allowed per span. None disables rate limiting
+    :param log_burst: Logs of single message template allowed at once. `log_rate` is used if None
+    :param buffer_level: Logs below this level are buffered per trace and sent only if the trace is kept
+        (it has error or slow span). None disables buffering. See `OpentracingLogsenseHandler`
+    :param buffer_size: Maximal number of buffered logs per trace
+    :param keep_duration_us: Traces with span which took at least this number of microseconds are kept.
+        None keeps only traces with errors
+    :param propagation: Names of HTTP propagation formats in order of precedence, e.g. ``['tracecontext', 'ot']``.
+        Span context is injected in all of them. See `logsense_opentracing.propagation`
 
     Envs:
         * LOGSENSE_TOKEN - overrides `logsense_token`
         * LOGSENSE_LOG_LEVEL - logging level of logsense internal logs.
           It can take `critical`, `error`, `warning`, `info`, `debug` as value
+        * LOGSENSE_MIN_DURATION_US - overrides `min_duration_us`
+        * LOGSENSE_HANDLER_LEVEL - overrides `level`. It takes the same values as `LOGSENSE_LOG_LEVEL`
+        * LOGSENSE_MAX_LOGS_PER_SPAN - overrides `max_logs_per_span`
+        * LOGSENSE_PROPAGATION - overrides `propagation`, names are separated by commas
 
     :returns: `opentracing.Tracer` - tracer instantion. It's already saved as `opentracing.tracer`,
         so no need to use it directly
 
     """
-    log = logging.getLogger(logger)  # pylint: disable=invalid-name
-    log.addHandler(OpentracingLogsenseHandler())
-    log.setLevel(logging.DEBUG)
+    handler_level = _level_from_env('LOGSENSE_HANDLER_LEVEL', level)
 
-    level = os.getenv('LOGSENSE_LOG_LEVEL', 'INFO').upper()
+    log = logging.getLogger(logger)  # pylint: disable=invalid-name
+    handler = OpentracingLogsenseHandler(level=handler_level, coalesce=coalesce_logs, rate=log_rate, burst=log_burst,
+                                         buffer_level=buffer_level, buffer_size=buffer_size,
+                                         keep_duration_us=keep_duration_us)
+    log.addHandler(handler)
+    if log.getEffectiveLevel() > handler_level:
+        log.setLevel(handler_level)
 
-    if level in ('CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG'):
-        level = getattr(logging, level)
-    else:
-        level = logging.INFO
+    level = _level_from_env('LOGSENSE_LOG_LEVEL', logging.INFO)
 
     # Do not propagate logsense.opentracing logger
     logsense_log = logging.getLogger('logsense.opentracing')
@@ -97,7 +136,23 @@ def setup_tracer(logsense_token=None, logger=None, sender=None, component=None):
 
     sender = LogSenseSender(logsense_token) if sender is None else sender
 
-    tracer = Tracer(sender=sender, component=component)  # pylint: disable=invalid-name
+    min_duration_us = os.getenv('LOGSENSE_MIN_DURATION_US', min_duration_us)
+    min_duration_us = int(min_duration_us) if min_duration_us is not None else None
+
+    max_logs_per_span = os.getenv('LOGSENSE_MAX_LOGS_PER_SPAN', max_logs_per_span)
+    max_logs_per_span = int(max_logs_per_span) if max_logs_per_span is not None else None
+
+    tracer = Tracer(sender=sender, component=component, min_duration_us=min_duration_us,  # pylint: disable=invalid-name
+                    max_logs_per_span=max_logs_per_span, log_overflow=log_overflow)
+    if buffer_level is not None:
+        tracer.add_finish_callback(handler.on_finish)
+
+    propagation = os.getenv('LOGSENSE_PROPAGATION', propagation)
+    if isinstance(propagation, str):
+        propagation = propagation.split(',')
+    if propagation:
+        tracer.register_propagator(opentracing.propagation.Format.HTTP_HEADERS, http_propagator(propagation))
+
     opentracing.tracer = tracer
     return tracer
 
@@ -33,6 +33,18 @@ setup(
     extras_require={
         'flask': [
             'flask'
+        ],
+        'requests': [
+            'requests'
+        ],
+        'aiohttp': [
+            'aiohttp'
+        ],
+        'httpx': [
+            'httpx'
+        ],
+        'tornado': [
+            'tornado'
         ]
     }
 )
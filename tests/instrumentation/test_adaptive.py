@@ -0,0 +1,82 @@
+import time
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_single, instrumentation, unpatch_all
+from logsense_opentracing.instrumentation.adaptive import configure_adaptive, get_decisions, get_stats
+from logsense_opentracing.instrumentation.adaptive import UNPATCH, SAMPLE, BYPASS
+from logsense_opentracing.instrumentation.registry import Patch
+from tests.sender import MockSender
+from tests import resources
+
+from unittest import TestCase, mock
+
+
+def trivial(value):
+    return value
+
+
+class TestAdaptive(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        setup_tracer('test_token', sender=self.sender)
+        self.backup_regular_function = resources.regular_function
+        configure_adaptive(max_overhead_ratio=0.0, min_calls=10, min_call_rate=0.0, action=UNPATCH, sample_every=5)
+
+    def test_unpatch(self):
+        patched = patch_single('tests.resources.regular_function')
+
+        for _ in range(10):
+            resources.regular_function('a', 'b')
+
+        self.assertIs(resources.regular_function, self.backup_regular_function)
+        self.assertEqual(get_stats()['tests.resources.regular_function']['mode'], BYPASS)
+
+        decision = get_decisions()[-1]
+        self.assertEqual(decision.operation_name, 'tests.resources.regular_function')
+        self.assertEqual(decision.action, UNPATCH)
+
+        # Stale references to wrapper don't trace anymore
+        patched('a', 'b')
+        time.sleep(0.3)
+        self.assertEqual(len([record for record in self.sender.get_data() if record.data['_type'] == 'trace']), 10)
+
+    def test_failed_unpatch(self):
+        patched = patch_single('tests.resources.regular_function')
+
+        with mock.patch.object(Patch, 'restore', side_effect=TypeError('read-only owner')):
+            for _ in range(10):
+                resources.regular_function('a', 'b')
+
+        self.assertIs(resources.regular_function, patched)
+        self.assertEqual(get_stats()['tests.resources.regular_function']['mode'], BYPASS)
+
+    def test_sample(self):
+        configure_adaptive(action=SAMPLE)
+
+        for exact_signature in (False, True):
+            function = instrumentation(trivial, exact_signature=exact_signature)
+            for _ in range(60):
+                self.assertEqual(function(1), 1)
+
+        opentracing.tracer.finish()
+        opentracing.tracer._thread.join()  # pylint: disable=protected-access
+
+        # 10 calls before decision, then every 5th of remaining 50
+        self.assertEqual(len(self.sender.get_data()), 2 * (10 + 10))
+        self.assertEqual([decision.action for decision in get_decisions()[-2:]], [SAMPLE, SAMPLE])
+
+    def test_below_limit(self):
+        configure_adaptive(max_overhead_ratio=float('inf'))
+
+        function = instrumentation(trivial)
+        for _ in range(20):
+            function(1)
+
+        self.assertEqual(get_stats()['tests.instrumentation.test_adaptive.trivial']['mode'], 'trace')
+
+    def tearDown(self):
+        configure_adaptive(enabled=False, max_overhead_ratio=1.0, min_calls=1000, min_call_rate=100.0,
+                           action=UNPATCH, sample_every=100)
+        unpatch_all()
+        opentracing.tracer.finish()
+        resources.regular_function = self.backup_regular_function
@@ -0,0 +1,145 @@
+import asyncio
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import TracingASGIMiddleware
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+async def hello_app(scope, receive, send):
+    opentracing.tracer.active_span.log_kv({'event': 'hello'})
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': b'Hello'})
+
+
+async def streaming_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    for index in range(3):
+        opentracing.tracer.active_span.log_kv({'event': 'chunk', 'index': index})
+        await send({'type': 'http.response.body', 'body': b'chunk', 'more_body': index < 2})
+    # Work done after the final body isn't part of the span
+    opentracing.tracer.active_span.log_kv({'event': 'after'})
+
+
+async def failing_app(scope, receive, send):
+    raise ValueError('Application failed')
+
+
+async def websocket_app(scope, receive, send):
+    await receive()
+    await send({'type': 'websocket.accept'})
+    await send({'type': 'websocket.send', 'text': 'Hello'})
+    await send({'type': 'websocket.close', 'code': 1001})
+
+
+async def lifespan_app(scope, receive, send):
+    await send({'type': 'lifespan.startup.complete'})
+
+
+def request(application, scope_type='http', headers=(), messages=({'type': 'http.request'},)):
+    """
+    Call ASGI application in process and return sent messages
+    """
+    scope = {
+        'type': scope_type,
+        'method': 'GET',
+        'scheme': 'http',
+        'path': '/hello',
+        'query_string': b'name=john',
+        'root_path': '',
+        'headers': [(b'host', b'localhost:8000')] + list(headers),
+        'client': ('127.0.0.1', 12345),
+        'server': ('127.0.0.1', 8000)
+    }
+    received = list(messages)
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(TracingASGIMiddleware(application)(scope, receive, send))
+    return sent
+
+
+class TestTracingASGIMiddleware(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def test_server_span(self):
+        sent = request(hello_app)
+
+        self.assertEqual(sent[1]['body'], b'Hello')
+        server, log = self.get_data()
+        self.assertEqual(server['ot.operation_name'], 'HTTP GET')
+        self.assertEqual(server['ot.span.kind'], 'server')
+        self.assertEqual(server['ot.http.url'], 'http://localhost:8000/hello?name=john')
+        self.assertEqual(server['ot.peer.ipv4'], '127.0.0.1')
+        self.assertEqual(server['ot.http.status_code'], 200)
+        self.assertEqual(server['ot.http.response_bytes'], 5)
+        self.assertFalse(server['ot.error'])
+        self.assertNotIn('ot.parent_span_id', server)
+        self.assertEqual(log['event'], 'hello')
+
+    def test_extract(self):
+        request(hello_app, headers=[(b'ot-tracer-traceid', b'ff'), (b'ot-tracer-spanid', b'a'),
+                                    (b'ot-baggage-user', b'john')])
+
+        server = self.get_data()[0]
+        self.assertEqual(server['ot.trace_id'], 0xff)
+        self.assertEqual(server['ot.parent_span_id'], 0xa)
+
+    def test_scope_headers(self):
+        from logsense_opentracing.instrumentation.asgi import scope_headers
+
+        carrier, host = scope_headers([(b'host', b'example.com'), (b'accept', b'*/*'), (b'x-b3-traceid', b'ff'),
+                                       (b'traceparent', b'00-ff-a-01')])
+        self.assertEqual(carrier, {'x-b3-traceid': 'ff', 'traceparent': '00-ff-a-01'})
+        self.assertEqual(host, 'example.com')
+        self.assertEqual(scope_headers([(b'accept', b'*/*')]), (None, None))
+
+    def test_streaming(self):
+        request(streaming_app)
+
+        server, *logs = self.get_data()
+        self.assertEqual(server['ot.http.response_bytes'], 15)
+        self.assertEqual([log['event'] for log in logs], ['chunk', 'chunk', 'chunk', 'after'])
+        # Span is finished with the final body
+        self.assertGreaterEqual(logs[-1]['ot.time_position_us'], server['ot.duration_us'])
+
+    def test_application_error(self):
+        with self.assertRaises(ValueError):
+            request(failing_app)
+
+        server, log = self.get_data()
+        self.assertTrue(server['ot.error'])
+        self.assertNotIn('ot.http.status_code', server)
+        self.assertEqual(log['event'], 'error')
+
+    def test_websocket(self):
+        sent = request(websocket_app, scope_type='websocket', messages=[{'type': 'websocket.connect'}])
+
+        self.assertEqual(len(sent), 3)
+        server = self.get_data()[0]
+        self.assertEqual(server['ot.operation_name'], 'WebSocket')
+        self.assertEqual(server['ot.websocket.close_code'], 1001)
+        self.assertNotIn('ot.http.status_code', server)
+
+    def test_lifespan(self):
+        sent = request(lifespan_app, scope_type='lifespan')
+
+        self.assertEqual(sent, [{'type': 'lifespan.startup.complete'}])
+        self.assertEqual(self.get_data(), [])
+
+    def tearDown(self):
+        opentracing.tracer.finish()
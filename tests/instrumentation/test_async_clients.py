@@ -0,0 +1,154 @@
+import asyncio
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import aiohttp_trace_config, TracingAsyncTransport
+from tests.sender import MockSender
+from tests.server import LocalServer
+
+from unittest import TestCase, skipIf
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncClientTestCase(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def get_spans(self):
+        """
+        Span records and their logs by operation name
+        """
+        spans = {}
+        for item in self.get_data():
+            spans.setdefault(item['ot.span_id'], []).append(item)
+        return {records[0]['ot.operation_name']: records for records in spans.values()}
+
+    def assert_client_span(self, spans, server, parent_context, headers):
+        client, *logs = spans['HTTP GET']
+        events = {log['event']: log for log in logs}
+
+        self.assertEqual(client['ot.span.kind'], 'client')
+        self.assertEqual(client['ot.http.url'], server.url + '/echo')
+        self.assertEqual(client['ot.http.status_code'], 200)
+        self.assertFalse(client['ot.error'])
+        self.assertEqual(client['ot.parent_span_id'], parent_context.span_id)
+        self.assertEqual(client['ot.trace_id'], parent_context.trace_id)
+        self.assertIn('connection_acquire', events)
+        self.assertGreaterEqual(events['ttfb']['duration_us'], 0)
+
+        # Server received context of client span
+        headers = {key.lower(): value for key, value in headers.items()}
+        self.assertEqual(int(headers['ot-tracer-spanid'], 16), client['ot.span_id'])
+        return events
+
+    def tearDown(self):
+        opentracing.tracer.finish()
+
+
+@skipIf(aiohttp is None, 'aiohttp is not installed')
+class TestAiohttp(AsyncClientTestCase):
+    def test_client_span(self):
+        async def request(url):
+            async with aiohttp.ClientSession(trace_configs=[aiohttp_trace_config()]) as session:
+                with opentracing.tracer.start_active_span('parent') as scope:
+                    async with session.get(url) as response:
+                        return await response.json(), scope.span.context
+
+        with LocalServer() as server:
+            headers, parent_context = asyncio.run(request(server.url + '/echo'))
+
+        events = self.assert_client_span(self.get_spans(), server, parent_context, headers)
+        self.assertFalse(events['connection_acquire']['reused'])
+
+    def test_connection_error(self):
+        async def request(url):
+            async with aiohttp.ClientSession(trace_configs=[aiohttp_trace_config()]) as session:
+                async with session.get(url):
+                    pass
+
+        with LocalServer() as server:
+            url = server.url
+
+        with self.assertRaises(aiohttp.ClientConnectionError):
+            asyncio.run(request(url))
+
+        client, *logs = self.get_spans()['HTTP GET']
+        self.assertTrue(client['ot.error'])
+        self.assertIn('error', [log['event'] for log in logs])
+
+
+@skipIf(httpx is None, 'httpx is not installed')
+class TestHttpx(AsyncClientTestCase):
+    def test_client_span(self):
+        traced_events = []
+
+        async def trace(event_name, info):  # pylint: disable=unused-argument
+            traced_events.append(event_name)
+
+        async def request(url):
+            async with httpx.AsyncClient(transport=TracingAsyncTransport()) as client:
+                with opentracing.tracer.start_active_span('parent') as scope:
+                    response = await client.get(url, extensions={'trace': trace})
+                    return response.json(), scope.span.context
+
+        with LocalServer() as server:
+            headers, parent_context = asyncio.run(request(server.url + '/echo'))
+
+        self.assert_client_span(self.get_spans(), server, parent_context, headers)
+        # Trace callback of application is still called
+        self.assertTrue(traced_events)
+
+    def test_connection_reused(self):
+        async def request(url):
+            async with httpx.AsyncClient(transport=TracingAsyncTransport()) as client:
+                for _ in range(2):
+                    await client.get(url)
+
+        with LocalServer() as server:
+            asyncio.run(request(server.url + '/echo'))
+
+        data = self.get_data()
+        reused = [item['reused'] for item in data if item.get('event') == 'connection_acquire']
+        self.assertEqual(reused, [False, True])
+        self.assertEqual(len({client_address for _, _, client_address in server.requests}), 1)
+
+    def test_cancelled(self):
+        async def request(url):
+            async with httpx.AsyncClient(transport=TracingAsyncTransport()) as client:
+                await asyncio.wait_for(client.get(url), timeout=0.05)
+
+        with LocalServer() as server:
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(request(server.url + '/slow'))
+
+        client, *logs = self.get_spans()['HTTP GET']
+        self.assertTrue(client['ot.error'])
+        self.assertIn('error', [log['event'] for log in logs])
+
+    def test_server_error(self):
+        async def request(url):
+            async with httpx.AsyncClient(transport=TracingAsyncTransport()) as client:
+                return await client.get(url)
+
+        with LocalServer() as server:
+            response = asyncio.run(request(server.url + '/error'))
+
+        self.assertEqual(response.status_code, 500)
+        client = self.get_spans()['HTTP GET'][0]
+        self.assertEqual(client['ot.http.status_code'], 500)
+        self.assertTrue(client['ot.error'])
@@ -0,0 +1,58 @@
+import asyncio
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_async_decorator, unpatch_all
+from tests.sender import MockSender
+from tests import resources
+
+from unittest import TestCase
+
+
+async def hello(name):
+    return 'Hello {}'.format(name)
+
+
+class TestAsyncDecorator(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+        del resources.DECORATIONS[:]
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def run_twice(self, function):
+        async def main():
+            return [await function('a'), await function('b')]
+
+        return asyncio.run(main())
+
+    def test_only_decorated(self):
+        patch_async_decorator('tests.resources.async_decorator', flat=True, only_decorated=True)
+        function = resources.async_decorator(hello)
+
+        self.assertEqual(self.run_twice(function), ['Hello a', 'Hello b'])
+        # Decorator is applied once per decoration, not per call
+        self.assertEqual(len(resources.DECORATIONS), 1)
+        self.assertTrue(hasattr(resources.DECORATIONS[0], '_logsense_patched'))
+        self.assertEqual(resources.DECORATIONS[0].__name__, 'hello')
+
+        data = self.get_data()
+        self.assertEqual([item['ot.operation_name'] for item in data], ['tests.instrumentation.test_async_decorator.hello'] * 2)
+
+    def test_decorator(self):
+        patch_async_decorator('tests.resources.async_decorator', flat=True, only_decorated=False)
+        function = resources.async_decorator(hello)
+
+        self.assertEqual(self.run_twice(function), ['Hello a', 'Hello b'])
+        self.assertEqual(len(resources.DECORATIONS), 1)
+        self.assertIs(resources.DECORATIONS[0], hello)
+        self.assertTrue(hasattr(function, '_logsense_patched'))
+        self.assertEqual(len(self.get_data()), 2)
+
+    def tearDown(self):
+        unpatch_all()
+        opentracing.tracer.finish()
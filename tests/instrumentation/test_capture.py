@@ -0,0 +1,148 @@
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import instrumentation, ALL_ARGS
+from logsense_opentracing.instrumentation.capture import CapturePolicy, LazyString, TRUNCATION_MARK
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+class Frame:
+    shape = (1000, 3)
+    dtype = 'float64'
+
+    def __str__(self):
+        raise AssertionError('Array-like objects should be summarized')
+
+
+class Shaped:
+    """
+    Shape isn't array's shape here, the object is formatted as usual
+    """
+    def shape(self):
+        return 'circle'
+
+    def __str__(self):
+        return 'Shaped'
+
+
+class Sized:
+    shape = 5
+
+    def __str__(self):
+        return 'Sized'
+
+
+class User:
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+
+def function(data, name='default', **kwargs):
+    return data
+
+
+class FakeSpan:
+    def __init__(self):
+        self.tags = {}
+
+    def set_tag(self, key, value):
+        self.tags[key] = value
+
+
+class TestCapturePolicy(TestCase):
+    def capture(self, policy, **arguments):
+        span = FakeSpan()
+        policy.capture(span, arguments)
+        return span.tags
+
+    def test_truncate(self):
+        tags = self.capture(CapturePolicy(max_length=5, defer=False), text='a' * 100, items=['b' * 100])
+
+        self.assertEqual(tags['kwarg.text'], 'aaaaa' + TRUNCATION_MARK)
+        self.assertEqual(len(tags['kwarg.items']), 5 + len(TRUNCATION_MARK))
+
+    def test_defer_immutable(self):
+        tags = self.capture(CapturePolicy(max_length=5), text='a' * 100, number=12, items=[1])
+
+        self.assertIsInstance(tags['kwarg.text'], LazyString)
+        self.assertEqual(tags['kwarg.text'].resolve(), 'aaaaa' + TRUNCATION_MARK)
+        self.assertEqual(tags['kwarg.number'].resolve(), '12')
+        # Mutable values are formatted immediately
+        self.assertEqual(tags['kwarg.items'], '[1]')
+
+    def test_summarize(self):
+        tags = self.capture(CapturePolicy(max_items=10), data={index: index for index in range(100)}, frame=Frame())
+
+        self.assertEqual(tags['kwarg.data'], '<dict len=100>')
+        self.assertEqual(tags['kwarg.frame'], '<Frame shape=(1000, 3) dtype=float64>')
+
+    def test_custom_summarizer(self):
+        policy = CapturePolicy()
+        policy.register_summarizer(User, lambda user: '<User {}>'.format(user.user_id))
+
+        self.assertEqual(self.capture(policy, user=User(7))['kwarg.user'], '<User 7>')
+
+    def test_not_array(self):
+        tags = self.capture(CapturePolicy(), method=Shaped(), number=Sized())
+
+        self.assertEqual(tags['kwarg.method'], 'Shaped')
+        self.assertEqual(tags['kwarg.number'], 'Sized')
+
+    def test_failing_summarizer(self):
+        policy = CapturePolicy()
+        policy.register_summarizer(User, lambda user: user.missing)
+
+        self.assertEqual(self.capture(policy, user=User(7))['kwarg.user'], '<unprintable User>')
+
+    def test_budget(self):
+        tags = self.capture(CapturePolicy(max_bytes=10, defer=False), first='a' * 6, second='b' * 6, third='c')
+
+        self.assertEqual(tags['kwarg.first'], 'a' * 6)
+        self.assertNotIn('kwarg.second', tags)
+        self.assertEqual(tags['kwarg.third'], 'c')
+        self.assertEqual(tags['dropped_arguments'], 1)
+
+
+class TestCaptureInstrumentation(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def test_generic(self):
+        wrapped = instrumentation(function, arguments=ALL_ARGS, capture=CapturePolicy(max_length=4, max_items=2))
+        wrapped([1, 2, 3], 'logsense')
+
+        data = self.get_data()[0]
+        self.assertEqual(data['ot.kwarg.data'], '<list len=3>')
+        self.assertEqual(data['ot.kwarg.name'], 'logs' + TRUNCATION_MARK)
+
+    def test_exact_signature(self):
+        wrapped = instrumentation(function, arguments=['name', 'extra'], exact_signature=True,
+                                  capture=CapturePolicy(max_length=4))
+        wrapped([1, 2, 3], name='logsense', extra=5, other=6)
+
+        data = self.get_data()[0]
+        self.assertNotIn('ot.kwarg.data', data)
+        self.assertNotIn('ot.kwarg.other', data)
+        self.assertEqual(data['ot.kwarg.name'], 'logs' + TRUNCATION_MARK)
+        self.assertEqual(data['ot.kwarg.extra'], '5')
+
+    def test_failing_capture(self):
+        policy = CapturePolicy()
+        policy.register_summarizer(User, lambda user: user.missing)
+        wrapped = instrumentation(function, arguments=ALL_ARGS, capture=policy)
+
+        self.assertEqual(wrapped(Shaped(), User(7)).shape(), 'circle')
+        data = self.get_data()[0]
+        self.assertEqual(data['ot.kwarg.data'], 'Shaped')
+        self.assertEqual(data['ot.kwarg.name'], '<unprintable User>')
+
+    def tearDown(self):
+        opentracing.tracer.finish()
@@ -13,9 +13,9 @@ class TestRegularClass(TestCase):
     def setUp(self):
         self.sender = MockSender()
         setup_tracer('test_token', sender=self.sender)
-        self.backup_regular_method = resources.RegularClass.regular_method
-        self.backup_static_method = resources.RegularClass.static_method
-        self.backup_class_method = resources.RegularClass.class_method
+        self.backup_regular_method = resources.RegularClass.__dict__['regular_method']
+        self.backup_static_method = resources.RegularClass.__dict__['static_method']
+        self.backup_class_method = resources.RegularClass.__dict__['class_method']
 
     def test_regular_method(self):
         patch_single('tests.resources.RegularClass.regular_method', arguments=ALL_ARGS)
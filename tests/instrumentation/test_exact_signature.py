@@ -0,0 +1,121 @@
+import inspect
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_single, instrumentation, remove_instrumentation, ALL_ARGS
+from logsense_opentracing.instrumentation.codegen import supports_exact_signature
+from tests.sender import MockSender
+from tests import resources
+
+from unittest import TestCase
+
+
+def keyword_function(foo, bar='default', *args, baz, qux=3, **kwargs):
+    return foo, bar, args, baz, qux, kwargs
+
+
+class TestExactSignature(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        setup_tracer('test_token', sender=self.sender)
+        self.backup_regular_function = resources.regular_function
+        self.backup_static_method = resources.RegularClass.__dict__['static_method']
+        self.backup_class_method = resources.RegularClass.__dict__['class_method']
+
+    def test_function(self):
+        regular_function = patch_single('tests.resources.regular_function', arguments=ALL_ARGS, exact_signature=True)
+
+        self.assertEqual(inspect.signature(regular_function), inspect.signature(self.backup_regular_function))
+        self.assertEqual(regular_function.__name__, 'regular_function')
+
+        regular_function('a', bar='b')
+        self.sender.wait_on_data()
+
+        data = [record.data for record in self.sender.get_data()]
+
+        self.assertEqual(data[0]['ot.operation_name'], 'tests.resources.regular_function')
+        self.assertEqual(data[0].get('ot.kwarg.foo'), 'a')
+        self.assertEqual(data[0].get('ot.kwarg.bar'), 'b')
+        self.assertEqual(data[1]['message'], 'This is a b')
+
+    def test_missing_argument(self):
+        regular_function = patch_single('tests.resources.regular_function', exact_signature=True)
+
+        with self.assertRaises(TypeError):
+            regular_function('a')  # pylint: disable=no-value-for-parameter
+
+    def test_keywords_and_defaults(self):
+        function = instrumentation(keyword_function, arguments=ALL_ARGS, exact_signature=True)
+
+        self.assertEqual(inspect.signature(function), inspect.signature(keyword_function))
+        self.assertEqual(function(1, 2, 3, baz=4, extra=5), (1, 2, (3,), 4, 3, {'extra': 5}))
+        self.sender.wait_on_data()
+
+        data = self.sender.get_data()[0].data
+        self.assertEqual(data.get('ot.kwarg.foo'), '1')
+        self.assertEqual(data.get('ot.kwarg.bar'), '2')
+        self.assertEqual(data.get('ot.kwarg.qux'), '3')
+        self.assertEqual(data.get('ot.kwarg.extra'), '5')
+        self.assertIsNone(data.get('ot.kwarg.args'))
+
+    def test_static_method(self):
+        patch_single('tests.resources.RegularClass.static_method', arguments=ALL_ARGS, exact_signature=True)
+
+        self.assertIsInstance(resources.RegularClass.__dict__['static_method'], staticmethod)
+        resources.RegularClass().static_method('a', 'b')
+        resources.RegularClass.static_method('a', 'b')
+        self.sender.wait_on_data()
+
+        data = [record.data for record in self.sender.get_data()]
+
+        self.assertEqual(data[0].get('ot.kwarg.foo'), 'a')
+        self.assertEqual(data[0].get('ot.kwarg.bar'), 'b')
+        self.assertEqual(data[1]['message'], 'Here is a and b')
+
+    def test_class_method(self):
+        patch_single('tests.resources.RegularClass.class_method', arguments=ALL_ARGS, exact_signature=True)
+
+        resources.RegularClass().class_method('a', 'b')
+        self.sender.wait_on_data()
+
+        data = [record.data for record in self.sender.get_data()]
+
+        self.assertEqual(data[0].get('ot.kwarg.cls'), str(resources.RegularClass))
+        self.assertEqual(data[0].get('ot.kwarg.foo'), 'a')
+        self.assertEqual(data[1]['message'], 'Here is a and b for RegularClass')
+
+        remove_instrumentation('tests.resources.RegularClass.class_method')
+        self.assertIsInstance(resources.RegularClass.__dict__['class_method'], classmethod)
+        self.assertFalse(hasattr(resources.RegularClass.class_method, '_logsense_patched'))
+
+    def test_before_hook(self):
+        def before(scope, *args, **kwargs):  # pylint: disable=unused-argument
+            return ('c', 'd'), kwargs
+
+        regular_function = patch_single('tests.resources.regular_function', before=before, exact_signature=True)
+
+        regular_function('a', 'b')
+        self.sender.wait_on_data()
+
+        data = [record.data for record in self.sender.get_data()]
+        self.assertEqual(data[1]['message'], 'This is c d')
+
+    def test_cached_per_code_object(self):
+        first = instrumentation(keyword_function, arguments=['foo'], exact_signature=True)
+        second = instrumentation(keyword_function, arguments=['foo'], exact_signature=True)
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.__code__, second.__code__)
+
+    def test_unsupported_function(self):
+        def reserved(_logsense_scope):
+            return _logsense_scope
+
+        self.assertFalse(supports_exact_signature(reserved))
+        self.assertFalse(supports_exact_signature(len))
+        self.assertEqual(instrumentation(reserved, exact_signature=True)(1), 1)
+
+    def tearDown(self):
+        opentracing.tracer.finish()
+        resources.regular_function = self.backup_regular_function
+        resources.RegularClass.static_method = self.backup_static_method
+        resources.RegularClass.class_method = self.backup_class_method
@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import unpatch_all
+from logsense_opentracing.instrumentation.import_hook import install_import_hook, uninstall_import_hook
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+class TestImportHook(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        setup_tracer('test_token', sender=self.sender)
+        self.unload()
+
+    @staticmethod
+    def unload():
+        for name in [name for name in sys.modules if name.startswith('tests.lazy')]:
+            del sys.modules[name]
+
+    def test_lazy_patching(self):
+        finder = install_import_hook(include_paths=('tests.lazy',), exclude_paths=('tests.lazy.second',))
+        self.assertEqual(finder.timings, {})
+
+        import tests.lazy.first  # pylint: disable=import-outside-toplevel
+
+        self.assertTrue(hasattr(tests.lazy.package_function, '_logsense_patched'))
+        self.assertTrue(hasattr(tests.lazy.first.first_function, '_logsense_patched'))
+        self.assertFalse(hasattr(tests.lazy.second.second_function, '_logsense_patched'))
+        self.assertEqual(set(finder.timings), {'tests.lazy', 'tests.lazy.first'})
+
+        self.assertEqual(tests.lazy.first.first_function(), 'second')
+        self.sender.wait_on_data()
+        self.assertEqual(self.sender.get_data()[0].data['ot.operation_name'], 'tests.lazy.first.first_function')
+
+    def test_patch_loaded(self):
+        import tests.lazy.second  # pylint: disable=import-outside-toplevel
+
+        finder = install_import_hook(include_paths=('tests.lazy.second',))
+        self.assertEqual(set(finder.timings), {'tests.lazy.second'})
+        self.assertTrue(hasattr(tests.lazy.second.second_function, '_logsense_patched'))
+
+    def test_empty_include_paths(self):
+        finder = install_import_hook()
+
+        # Nothing is patched, neither standard library nor already imported modules
+        self.assertEqual(finder.timings, {})
+        self.assertFalse(finder.matches('json'))
+
+    def test_local_modules(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, 'local_package'))
+            with open(os.path.join(directory, 'local_package', '__init__.py'), 'w') as module:
+                module.write('def local_function():\n    return 1\n')
+
+            os.chdir(directory)
+            sys.path.insert(0, directory)
+            try:
+                finder = install_import_hook(include_paths=('tests.lazy',), local_modules=True)
+                import local_package  # pylint: disable=import-outside-toplevel,import-error
+
+                self.assertTrue(hasattr(local_package.local_function, '_logsense_patched'))
+                self.assertFalse(finder.matches('json'))
+            finally:
+                os.chdir(cwd)
+                sys.path.remove(directory)
+                sys.modules.pop('local_package', None)
+
+    def test_uninstall(self):
+        finder = install_import_hook(include_paths=('tests.lazy',))
+        uninstall_import_hook(finder)
+        self.assertNotIn(finder, sys.meta_path)
+
+        import tests.lazy  # pylint: disable=import-outside-toplevel
+        self.assertFalse(hasattr(tests.lazy.package_function, '_logsense_patched'))
+
+    def tearDown(self):
+        uninstall_import_hook()
+        unpatch_all()
+        self.unload()
+        opentracing.tracer.finish()
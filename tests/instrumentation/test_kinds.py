@@ -0,0 +1,152 @@
+import time
+import asyncio
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_module, patch_single, unpatch_all, instrumentation, generator_instrumentation, \
+    async_generator_instrumentation, coroutine_instrumentation, async_instrumentation, ALL_ARGS
+from logsense_opentracing.instrumentation.modules import build_plan
+from logsense_opentracing.instrumentation.plan import FUNCTION, COROUTINE, GENERATOR, ASYNC_GENERATOR
+from tests.sender import MockSender
+from tests.module import generators
+
+from unittest import TestCase
+
+
+MODULE = 'tests.module.generators'
+
+
+class TestFunctionKinds(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+        unpatch_all()
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data() if record.data.get('_type') == 'trace']
+
+    def test_build_plan(self):
+        patch_plan = build_plan(MODULE, exclude_paths=('logsense_opentracing',))
+
+        self.assertEqual(sorted(patch_plan.entries), [
+            ('tests.module.generators.async_numbers', ASYNC_GENERATOR, MODULE),
+            ('tests.module.generators.coroutine', COROUTINE, MODULE),
+            ('tests.module.generators.echo', GENERATOR, MODULE),
+            ('tests.module.generators.failing', GENERATOR, MODULE),
+            ('tests.module.generators.numbers', GENERATOR, MODULE),
+            ('tests.module.generators.slow_numbers', GENERATOR, MODULE),
+        ])
+        self.assertNotIn(FUNCTION, [entry[1] for entry in patch_plan.entries])
+
+    def test_patch_module_in_running_loop(self):
+        async def main():
+            patch_module(MODULE)
+            return [item async for item in generators.async_numbers(2)], await generators.coroutine(3)
+
+        self.assertEqual(asyncio.run(main()), ([0, 1], 3))
+        self.assertEqual(list(generators.numbers(2)), [0, 1])
+        self.assertEqual(
+            sorted(item['ot.operation_name'] for item in self.get_data()),
+            ['tests.module.generators.async_numbers', 'tests.module.generators.coroutine',
+             'tests.module.generators.numbers']
+        )
+
+    def test_generator(self):
+        numbers = generator_instrumentation(generators.numbers, arguments=ALL_ARGS)
+
+        generator = numbers(3)
+        self.assertEqual(list(generator), [0, 1, 2])
+
+        data = self.get_data()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['ot.kwarg.count'], '3')
+        self.assertEqual(data[0]['ot.yield_count'], 3)
+        self.assertIn('ot.time_to_first_item_us', data[0])
+        self.assertFalse(data[0]['ot.error'])
+
+    def test_span_covers_iteration(self):
+        slow_numbers = instrumentation(generators.slow_numbers)
+
+        generator = slow_numbers(2, 0.02)
+        # Nothing is traced until iteration starts
+        time.sleep(0.05)
+        self.assertEqual(self.sender.get_data(), [])
+        self.assertEqual(next(generator), 0)
+        self.assertEqual(next(generator), 1)
+        self.assertEqual(list(generator), [])
+
+        data = self.get_data()
+        self.assertEqual(data[0]['ot.yield_count'], 2)
+        self.assertGreaterEqual(data[0]['ot.time_to_first_item_us'], 20000)
+        self.assertLess(data[0]['ot.time_to_first_item_us'], 50000)
+        self.assertGreaterEqual(data[0]['ot.duration_us'], 40000)
+
+    def test_generator_exception(self):
+        failing = instrumentation(generators.failing)
+
+        with self.assertRaises(ValueError):
+            list(failing(2))
+
+        data = self.get_data()
+        self.assertTrue(data[0]['ot.error'])
+        self.assertEqual(data[0]['ot.yield_count'], 2)
+
+    def test_patch_single_generator(self):
+        numbers = patch_single('tests.module.generators.numbers')
+
+        self.assertIs(generators.numbers, numbers)
+        self.assertEqual(sum(generators.numbers(4)), 6)
+        self.assertEqual(self.get_data()[0]['ot.yield_count'], 4)
+
+    def test_generator_send(self):
+        echo = generator_instrumentation(generators.echo)
+
+        generator = echo()
+        next(generator)
+        generator.send('a')
+        with self.assertRaises(StopIteration) as context:
+            generator.send(None)
+
+        self.assertEqual(context.exception.value, ['a'])
+        self.assertEqual(len(self.get_data()), 1)
+
+    def test_generator_close(self):
+        numbers = generator_instrumentation(generators.numbers)
+
+        generator = numbers(3)
+        next(generator)
+        generator.close()
+
+        data = self.get_data()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['ot.yield_count'], 1)
+        self.assertFalse(data[0]['ot.error'])
+
+    def test_async_generator(self):
+        async_numbers = async_generator_instrumentation(generators.async_numbers, arguments=ALL_ARGS)
+
+        async def consume():
+            return [item async for item in async_numbers(3)]
+
+        self.assertEqual(asyncio.run(consume()), [0, 1, 2])
+
+        data = self.get_data()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['ot.kwarg.count'], '3')
+        self.assertEqual(data[0]['ot.yield_count'], 3)
+        self.assertIn('ot.time_to_first_item_us', data[0])
+
+    def test_async_shim(self):
+        async def main():
+            function = await async_instrumentation(generators.coroutine)
+            return await function(5)
+
+        self.assertEqual(asyncio.run(main()), 5)
+        self.assertIs(coroutine_instrumentation(generators.coroutine)._logsense_original_function,
+                      generators.coroutine)
+
+    def tearDown(self):
+        unpatch_all()
+        opentracing.tracer.finish()
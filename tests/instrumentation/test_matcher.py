@@ -0,0 +1,70 @@
+import re
+from logsense_opentracing.instrumentation.matcher import PathMatcher
+from logsense_opentracing.instrumentation import unpatch_all
+from logsense_opentracing.instrumentation.modules import build_plan
+from logsense_opentracing.instrumentation.plan import FUNCTION, COROUTINE
+
+from unittest import TestCase
+
+
+MODULE = 'tests.module.module_class.ModuleClass'
+
+
+class TestPathMatcher(TestCase):
+    def test_empty(self):
+        matcher = PathMatcher()
+        self.assertTrue(matcher.allows('anything.at.all'))
+
+    def test_prefixes(self):
+        matcher = PathMatcher(include_paths=('app.views', 'app.models'), exclude_paths=('app.views.admin',))
+
+        self.assertTrue(matcher.allows('app.views'))
+        self.assertTrue(matcher.allows('app.views.index'))
+        self.assertTrue(matcher.allows('app.models.User'))
+        self.assertFalse(matcher.allows('app.view'))
+        self.assertFalse(matcher.allows('app.forms'))
+        self.assertFalse(matcher.allows('app.views.admin.index'))
+
+    def test_globs(self):
+        matcher = PathMatcher(include_paths=('app.*.views',), exclude_paths=('app.[ab]*',))
+
+        self.assertTrue(matcher.allows('app.shop.views'))
+        self.assertFalse(matcher.allows('app.shop.views.index'))
+        self.assertFalse(matcher.allows('app.blog.views'))
+
+    def test_regexes(self):
+        matcher = PathMatcher(include_paths=('re:app\\.(views|models)\\.', re.compile('lib\\.[a-z]+$')))
+
+        self.assertTrue(matcher.allows('app.views.index'))
+        self.assertTrue(matcher.allows('app.models.User'))
+        self.assertTrue(matcher.allows('lib.utils'))
+        self.assertFalse(matcher.allows('lib.Utils'))
+        self.assertFalse(matcher.allows('app.forms.Form'))
+        # Regexes match from the beginning of path
+        self.assertFalse(matcher.allows('other.app.views.index'))
+
+    def test_mixed(self):
+        matcher = PathMatcher(include_paths=('app.views', 'app.*.models', 're:lib\\.'), exclude_paths=('app.views.x*',))
+
+        self.assertTrue(matcher.allows('app.views.index'))
+        self.assertTrue(matcher.allows('app.shop.models'))
+        self.assertTrue(matcher.allows('lib.utils'))
+        self.assertFalse(matcher.allows('app.views.xyz'))
+        self.assertFalse(matcher.allows('app.forms'))
+
+
+class TestBuildPlanFilters(TestCase):
+    def setUp(self):
+        unpatch_all()
+
+    def test_glob_exclude(self):
+        patch_plan = build_plan(MODULE, exclude_paths=('logsense_opentracing', '*.async_*'))
+
+        self.assertEqual(patch_plan.entries, [('tests.module.module_class.ModuleClass.function', FUNCTION, MODULE)])
+
+    def test_regex_include(self):
+        patch_plan = build_plan(MODULE, include_paths=(re.compile('.*async'),))
+
+        self.assertEqual(
+            patch_plan.entries, [('tests.module.module_class.ModuleClass.async_function', COROUTINE, MODULE)]
+        )
@@ -0,0 +1,68 @@
+import os
+import time
+import shutil
+import tempfile
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_module, unpatch_all
+from logsense_opentracing.instrumentation.modules import build_plan
+from logsense_opentracing.instrumentation.plan import plan_key, load_plan, FUNCTION, COROUTINE
+from tests.sender import MockSender
+from tests.module import module_class
+
+from unittest import TestCase
+
+
+MODULE = 'tests.module.module_class.ModuleClass'
+
+
+class TestPatchPlan(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        setup_tracer('test_token', sender=self.sender)
+        unpatch_all()
+        self.cache_dir = tempfile.mkdtemp()
+        self.key = plan_key(MODULE, True, (), ('logsense_opentracing',))
+
+    def test_build_plan(self):
+        patch_plan = build_plan(MODULE, exclude_paths=('logsense_opentracing',))
+
+        self.assertEqual(sorted(patch_plan.entries), [
+            ('tests.module.module_class.ModuleClass.async_function', COROUTINE, MODULE),
+            ('tests.module.module_class.ModuleClass.function', FUNCTION, MODULE),
+        ])
+        self.assertIn(module_class.__file__, patch_plan.files)
+
+    def test_cached_plan(self):
+        self.assertIsNone(load_plan(self.cache_dir, self.key))
+
+        patch_module(MODULE, plan_cache=self.cache_dir)
+        self.assertTrue(hasattr(module_class.ModuleClass.function, '_logsense_patched'))
+        self.assertEqual(len(load_plan(self.cache_dir, self.key)), 2)
+
+        # Cached plan is applied without walking the module
+        unpatch_all()
+        patch_module(MODULE, plan_cache=self.cache_dir)
+        self.assertTrue(hasattr(module_class.ModuleClass.function, '_logsense_patched'))
+        self.assertTrue(hasattr(module_class.ModuleClass.async_function, '_logsense_patched'))
+
+    def test_outdated_plan(self):
+        patch_module(MODULE, plan_cache=self.cache_dir)
+
+        stat = os.stat(module_class.__file__)
+        try:
+            os.utime(module_class.__file__, (stat.st_atime, stat.st_mtime + 10))
+            self.assertIsNone(load_plan(self.cache_dir, self.key))
+        finally:
+            os.utime(module_class.__file__, (stat.st_atime, stat.st_mtime))
+
+        self.assertIsNotNone(load_plan(self.cache_dir, self.key))
+
+    def test_different_config(self):
+        patch_module(MODULE, plan_cache=self.cache_dir)
+        self.assertIsNone(load_plan(self.cache_dir, plan_key(MODULE, False, (), ('logsense_opentracing',))))
+
+    def tearDown(self):
+        unpatch_all()
+        shutil.rmtree(self.cache_dir)
+        opentracing.tracer.finish()
@@ -0,0 +1,94 @@
+import sys
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import unpatch_all
+from logsense_opentracing.instrumentation.profile_hook import install_profile_hook, uninstall_profile_hook
+from tests.sender import MockSender
+# Referenced before installing the hook, so it can't be traced by patching
+from tests.module.calls import outer, failing
+
+from unittest import TestCase, skipIf
+
+
+class TestProfileHook(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+        unpatch_all()
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data() if record.data.get('_type') == 'trace']
+
+    def test_codes(self):
+        engine = install_profile_hook('tests.module.calls', exclude_paths=('tests.module.calls.failing',))
+        uninstall_profile_hook(engine)
+
+        self.assertEqual(sorted(engine.codes.values()), ['tests.module.calls.inner', 'tests.module.calls.outer'])
+
+    def test_nested_spans(self):
+        install_profile_hook('tests.module.calls')
+        result = outer(3)
+        uninstall_profile_hook()
+
+        self.assertEqual(result, 7)
+
+        data = self.get_data()
+        self.assertEqual([item['ot.operation_name'] for item in data],
+                         ['tests.module.calls.inner', 'tests.module.calls.outer'])
+        self.assertEqual(data[0]['ot.parent_span_id'], data[1]['ot.span_id'])
+        self.assertEqual(data[0]['ot.trace_id'], data[1]['ot.trace_id'])
+
+    def test_exception(self):
+        install_profile_hook('tests.module.calls')
+        with self.assertRaises(ValueError):
+            failing()
+        uninstall_profile_hook()
+
+        data = self.get_data()
+        self.assertEqual([item['ot.operation_name'] for item in data], ['tests.module.calls.failing'])
+
+    @skipIf(not hasattr(sys, 'monitoring'), 'sys.monitoring requires Python 3.12+')
+    def test_monitoring(self):
+        engine = install_profile_hook('tests.module.calls', use_monitoring=True)
+        outer(3)
+        with self.assertRaises(ValueError):
+            failing()
+        uninstall_profile_hook()
+
+        self.assertTrue(engine.use_monitoring)
+        data = self.get_data()
+        self.assertEqual([(item['ot.operation_name'], item['ot.error']) for item in data], [
+            ('tests.module.calls.inner', False),
+            ('tests.module.calls.outer', False),
+            ('tests.module.calls.failing', True)
+        ])
+        self.assertIsNone(sys.monitoring.get_tool(sys.monitoring.PROFILER_ID))  # pylint: disable=no-member
+
+    @skipIf(not hasattr(sys, 'monitoring'), 'sys.monitoring requires Python 3.12+')
+    def test_monitoring_used(self):
+        monitoring = sys.monitoring  # pylint: disable=no-member
+        monitoring.use_tool_id(monitoring.PROFILER_ID, 'other profiler')
+        try:
+            engine = install_profile_hook('tests.module.calls', use_monitoring=True)
+            outer(3)
+            uninstall_profile_hook()
+        finally:
+            monitoring.free_tool_id(monitoring.PROFILER_ID)
+
+        self.assertFalse(engine.use_monitoring)
+        self.assertEqual([item['ot.operation_name'] for item in self.get_data()],
+                         ['tests.module.calls.inner', 'tests.module.calls.outer'])
+
+    def test_uninstall(self):
+        install_profile_hook('tests.module.calls')
+        uninstall_profile_hook()
+        outer(1)
+
+        self.assertEqual(self.get_data(), [])
+
+    def tearDown(self):
+        uninstall_profile_hook()
+        opentracing.tracer.finish()
@@ -0,0 +1,79 @@
+import time
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_single, instrumentation, remove_instrumentation
+from logsense_opentracing.instrumentation import enable_tracing, disable_tracing, is_tracing_enabled
+from logsense_opentracing.instrumentation import unpatch_all, repatch_all
+from logsense_opentracing.instrumentation.registry import get_patches, forget_patch
+from tests.sender import MockSender
+from tests import resources
+
+from unittest import TestCase
+
+
+class TestRegistry(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        setup_tracer('test_token', sender=self.sender)
+        self.backup_regular_function = resources.regular_function
+        self.backup_static_method = resources.RegularClass.__dict__['static_method']
+        self.forget_patches()
+
+    @staticmethod
+    def forget_patches():
+        for patch in get_patches():
+            forget_patch(patch.owner, patch.attribute)
+
+    def test_disable_tracing(self):
+        regular_function = patch_single('tests.resources.regular_function')
+
+        disable_tracing()
+        self.assertFalse(is_tracing_enabled())
+        regular_function('a', 'b')
+        time.sleep(0.3)
+        self.assertEqual(self.sender.get_data(), [])
+
+        enable_tracing()
+        regular_function('a', 'b')
+        self.sender.wait_on_data()
+        self.assertEqual(self.sender.get_data()[0].data['ot.operation_name'], 'tests.resources.regular_function')
+
+    def test_disable_exact_signature(self):
+        def function(foo, bar=1):
+            return foo, bar
+
+        patched = instrumentation(function, exact_signature=True)
+        disable_tracing()
+        self.assertEqual(patched('a'), ('a', 1))
+        time.sleep(0.3)
+        self.assertEqual(self.sender.get_data(), [])
+
+    def test_unpatch_all(self):
+        patch_single('tests.resources.regular_function')
+        patch_single('tests.resources.RegularClass.static_method')
+
+        self.assertTrue(hasattr(resources.regular_function, '_logsense_patched'))
+        self.assertEqual(unpatch_all(), 2)
+
+        self.assertIs(resources.regular_function, self.backup_regular_function)
+        self.assertIs(resources.RegularClass.__dict__['static_method'], self.backup_static_method)
+
+        self.assertEqual(repatch_all(), 2)
+        self.assertTrue(hasattr(resources.regular_function, '_logsense_patched'))
+        self.assertTrue(hasattr(resources.RegularClass.static_method, '_logsense_patched'))
+
+    def test_remove_instrumentation(self):
+        patch_single('tests.resources.regular_function')
+        remove_instrumentation('tests.resources.regular_function')
+
+        self.assertNotIn(resources.regular_function, [patch.patched for patch in get_patches()])
+        repatch_all()
+        self.assertIs(resources.regular_function, self.backup_regular_function)
+
+    def tearDown(self):
+        enable_tracing()
+        unpatch_all()
+        self.forget_patches()
+        opentracing.tracer.finish()
+        resources.regular_function = self.backup_regular_function
+        resources.RegularClass.static_method = self.backup_static_method
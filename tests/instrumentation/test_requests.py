@@ -0,0 +1,105 @@
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import patch_requests_session, unpatch_requests_session
+from tests.sender import MockSender
+from tests.server import LocalServer
+
+from unittest import TestCase, skipIf
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+
+def get(session, url):
+    with opentracing.tracer.start_active_span('parent') as scope:
+        return session.get(url), scope.span.context
+
+
+@skipIf(requests is None, 'requests is not installed')
+class TestRequestsSession(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+        patch_requests_session()
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def test_client_span(self):
+        with LocalServer() as server, requests.Session() as session:
+            response, parent_context = get(session, server.url + '/echo')
+
+        headers = {key.lower(): value for key, value in response.json().items()}
+        data = self.get_data()
+        client = data[0]
+
+        self.assertEqual(client['ot.operation_name'], 'HTTP GET')
+        self.assertEqual(client['ot.span.kind'], 'client')
+        self.assertEqual(client['ot.http.url'], server.url + '/echo')
+        self.assertEqual(client['ot.http.status_code'], 200)
+        self.assertEqual(client['ot.http.response_bytes'], len(response.content))
+        self.assertEqual(client['ot.http.retries'], 0)
+        self.assertEqual(client['ot.parent_span_id'], parent_context.span_id)
+
+        # Server received context of client span
+        self.assertEqual(int(headers['ot-tracer-spanid'], 16), client['ot.span_id'])
+        self.assertEqual(int(headers['ot-tracer-traceid'], 16), parent_context.trace_id)
+
+    def test_send_with_keyword_arguments(self):
+        with LocalServer() as server, requests.Session() as session:
+            prepared = session.prepare_request(requests.Request('GET', server.url + '/echo'))
+            with opentracing.tracer.start_active_span('parent') as scope:
+                response = session.send(prepared, timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        client = self.get_data()[0]
+        self.assertEqual(client['ot.http.url'], server.url + '/echo')
+        self.assertEqual(client['ot.parent_span_id'], scope.span.context.span_id)
+
+    def test_connection_reused(self):
+        with LocalServer() as server, requests.Session() as session:
+            for _ in range(3):
+                get(session, server.url + '/echo')
+
+        self.assertEqual(len({client_address for _, _, client_address in server.requests}), 1)
+
+    def test_retries(self):
+        with LocalServer(failures=2) as server, requests.Session() as session:
+            session.mount('http://', HTTPAdapter(max_retries=Retry(total=3, status_forcelist=[503],
+                                                                   backoff_factor=0)))
+            response, _ = get(session, server.url + '/flaky')
+
+        self.assertEqual(response.status_code, 200)
+        client = self.get_data()[0]
+        self.assertEqual(client['ot.http.retries'], 2)
+        self.assertFalse(client['ot.error'])
+
+    def test_server_error(self):
+        with LocalServer() as server, requests.Session() as session:
+            get(session, server.url + '/error')
+
+        client = self.get_data()[0]
+        self.assertEqual(client['ot.http.status_code'], 500)
+        self.assertTrue(client['ot.error'])
+
+    def test_connection_error(self):
+        with LocalServer() as server:
+            url = server.url
+
+        with requests.Session() as session, self.assertRaises(requests.ConnectionError):
+            get(session, url)
+
+        client = self.get_data()[0]
+        self.assertTrue(client['ot.error'])
+        self.assertNotIn('ot.http.status_code', client)
+
+    def tearDown(self):
+        unpatch_requests_session()
+        opentracing.tracer.finish()
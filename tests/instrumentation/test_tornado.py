@@ -0,0 +1,123 @@
+import asyncio
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from tests.sender import MockSender
+
+from unittest import TestCase, skipIf
+
+try:
+    import tornado.web
+    from tornado.testing import AsyncHTTPTestCase
+    from logsense_opentracing.instrumentation import TornadoTracing
+except ImportError:
+    tornado = None
+    # Base class must be a TestCase, otherwise skipIf is ignored by pytest
+    AsyncHTTPTestCase = TestCase
+
+
+if tornado is not None:
+    class HelloHandler(tornado.web.RequestHandler):  # pylint: disable=abstract-method
+        def get(self, name):
+            opentracing.tracer.active_span.log_kv({'event': 'hello'})
+            self.write('Hello {}'.format(name))
+
+    class AsyncHandler(tornado.web.RequestHandler):  # pylint: disable=abstract-method
+        async def prepare(self):
+            await asyncio.sleep(0)
+            opentracing.tracer.active_span.log_kv({'event': 'prepare'})
+
+        async def get(self):
+            # Callback scheduled by IOLoop keeps context of the request
+            future = asyncio.get_running_loop().create_future()
+            tornado.ioloop.IOLoop.current().add_callback(
+                lambda: future.set_result(opentracing.tracer.active_span.log_kv({'event': 'callback'})))
+            await future
+
+            for _ in range(3):
+                self.write('chunk')
+                await self.flush()
+
+    class ErrorHandler(tornado.web.RequestHandler):  # pylint: disable=abstract-method
+        def get(self):
+            raise ValueError('Handler failed')
+
+
+@skipIf(tornado is None, 'tornado is not installed')
+class TestTornadoTracing(AsyncHTTPTestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+        super().setUp()
+
+    def get_app(self):
+        app = tornado.web.Application([
+            (r'/hello/(.*)', HelloHandler),
+            (r'/async', AsyncHandler),
+            (r'/error', ErrorHandler)
+        ])
+        TornadoTracing(app)
+        return app
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def get_events(self):
+        """
+        Span and its events, access log of Tornado is skipped
+        """
+        server, *logs = self.get_data()
+        return server, [log['event'] for log in logs if 'event' in log]
+
+    def test_server_span(self):
+        response = self.fetch('/hello/john', headers={'ot-tracer-traceid': 'ff', 'ot-tracer-spanid': 'a'})
+
+        self.assertEqual(response.body, b'Hello john')
+        server, events = self.get_events()
+        self.assertEqual(server['ot.operation_name'], 'GET HelloHandler')
+        self.assertEqual(server['ot.span.kind'], 'server')
+        self.assertEqual(server['ot.http.url'], self.get_url('/hello/john'))
+        self.assertEqual(server['ot.http.status_code'], 200)
+        self.assertEqual(server['ot.http.response_bytes'], 10)
+        self.assertEqual(server['ot.trace_id'], 0xff)
+        self.assertEqual(server['ot.parent_span_id'], 0xa)
+        self.assertFalse(server['ot.error'])
+        self.assertEqual(events, ['hello'])
+
+    def test_async_handler(self):
+        response = self.fetch('/async')
+
+        self.assertEqual(response.body, b'chunk' * 3)
+        server, events = self.get_events()
+        self.assertEqual(server['ot.operation_name'], 'GET AsyncHandler')
+        self.assertEqual(server['ot.http.response_bytes'], 15)
+        self.assertEqual(events, ['prepare', 'callback'])
+
+    def test_error(self):
+        response = self.fetch('/error')
+
+        self.assertEqual(response.code, 500)
+        server, events = self.get_events()
+        self.assertEqual(server['ot.http.status_code'], 500)
+        self.assertTrue(server['ot.error'])
+        self.assertEqual(events, ['error'])
+
+    def test_not_found(self):
+        response = self.fetch('/missing')
+
+        self.assertEqual(response.code, 404)
+        server = self.get_data()[0]
+        self.assertEqual(server['ot.http.status_code'], 404)
+        self.assertFalse(server['ot.error'])
+
+    def test_context_isolation(self):
+        self.fetch('/hello/john')
+
+        # Span isn't active after the request
+        self.assertIsNone(opentracing.tracer.active_span)
+
+    def tearDown(self):
+        super().tearDown()
+        opentracing.tracer.finish()
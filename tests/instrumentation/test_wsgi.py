@@ -0,0 +1,176 @@
+import opentracing
+from wsgiref.util import setup_testing_defaults
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import TracingMiddleware, FlaskTracing
+from logsense_opentracing.instrumentation.wsgi import environ_headers
+from tests.sender import MockSender
+
+from unittest import TestCase, skipIf
+
+try:
+    import flask
+except ImportError:
+    flask = None
+
+
+def hello_app(environ, start_response):
+    opentracing.tracer.active_span.log_kv({'event': 'hello'})
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'Hello']
+
+
+def streaming_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    for index in range(3):
+        opentracing.tracer.active_span.log_kv({'event': 'chunk', 'index': index})
+        yield b'chunk'
+
+
+def failing_app(environ, start_response):
+    raise ValueError('Application failed')
+
+
+class WSGITestCase(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def tearDown(self):
+        opentracing.tracer.finish()
+
+
+class TestTracingMiddleware(WSGITestCase):
+    def request(self, application, path='/hello', headers=None):
+        environ = {'PATH_INFO': path, 'REMOTE_ADDR': '127.0.0.1'}
+        environ.update(headers or {})
+        setup_testing_defaults(environ)
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        response = TracingMiddleware(application)(environ, start_response)
+        try:
+            body = b''.join(response)
+        finally:
+            response.close()
+        return statuses[0], body
+
+    def test_server_span(self):
+        status, body = self.request(hello_app)
+
+        self.assertEqual((status, body), ('200 OK', b'Hello'))
+        server, log = self.get_data()
+        self.assertEqual(server['ot.operation_name'], 'HTTP GET')
+        self.assertEqual(server['ot.span.kind'], 'server')
+        self.assertEqual(server['ot.http.method'], 'GET')
+        self.assertEqual(server['ot.http.url'], 'http://127.0.0.1/hello')
+        self.assertEqual(server['ot.peer.ipv4'], '127.0.0.1')
+        self.assertEqual(server['ot.http.status_code'], 200)
+        self.assertEqual(server['ot.http.response_bytes'], 5)
+        self.assertFalse(server['ot.error'])
+        self.assertNotIn('ot.parent_span_id', server)
+        self.assertEqual(log['event'], 'hello')
+
+    def test_extract(self):
+        self.request(hello_app, headers={
+            'HTTP_OT_TRACER_TRACEID': 'ff',
+            'HTTP_OT_TRACER_SPANID': 'a',
+            'HTTP_OT_BAGGAGE_USER': 'john'
+        })
+
+        server = self.get_data()[0]
+        self.assertEqual(server['ot.trace_id'], 0xff)
+        self.assertEqual(server['ot.parent_span_id'], 0xa)
+
+    def test_environ_headers(self):
+        environ = {'HTTP_HOST': 'localhost', 'HTTP_OT_BAGGAGE_USER': 'john', 'HTTP_X_B3_TRACEID': 'ff'}
+        self.assertEqual(environ_headers(environ), {'x-b3-traceid': 'ff'})
+
+        environ['HTTP_OT_TRACER_TRACEID'] = 'ff'
+        self.assertEqual(environ_headers(environ), {
+            'x-b3-traceid': 'ff', 'ot-tracer-traceid': 'ff', 'ot-baggage-user': 'john'})
+
+        self.assertIsNone(environ_headers({'HTTP_HOST': 'localhost', 'HTTP_OT_BAGGAGE_USER': 'john'}))
+
+    def test_streaming(self):
+        status, body = self.request(streaming_app)
+
+        self.assertEqual((status, body), ('200 OK', b'chunk' * 3))
+        server, *logs = self.get_data()
+        self.assertEqual(server['ot.http.response_bytes'], 15)
+        self.assertEqual([log['index'] for log in logs], [0, 1, 2])
+        # Span is finished after the last chunk
+        self.assertLessEqual(logs[-1]['ot.time_position_us'], server['ot.duration_us'])
+
+    def test_application_error(self):
+        with self.assertRaises(ValueError):
+            self.request(failing_app)
+
+        server, log = self.get_data()
+        self.assertTrue(server['ot.error'])
+        self.assertNotIn('ot.http.status_code', server)
+        self.assertEqual(log['event'], 'error')
+
+
+@skipIf(flask is None, 'flask is not installed')
+class TestFlaskTracing(WSGITestCase):
+    def setUp(self):
+        super().setUp()
+        self.app = flask.Flask('tests')
+        FlaskTracing(self.app)
+
+        @self.app.before_request
+        def before_request():
+            opentracing.tracer.active_span.log_kv({'event': 'before_request'})
+
+        @self.app.route('/hello/<name>')
+        def hello(name):
+            return 'Hello {}'.format(name)
+
+        @self.app.route('/stream')
+        def stream():
+            def generate():
+                for _ in range(3):
+                    yield 'chunk'
+            return flask.Response(generate())
+
+        @self.app.route('/error')
+        def error():
+            raise ValueError('View failed')
+
+    def test_route(self):
+        # Buffered response is closed by the test client, like by WSGI server
+        response = self.app.test_client().get('/hello/john', buffered=True,
+                                              headers={'ot-tracer-traceid': 'ff', 'ot-tracer-spanid': 'a'})
+
+        self.assertEqual(response.data, b'Hello john')
+        server, log = self.get_data()
+        self.assertEqual(server['ot.operation_name'], 'GET /hello/<name>')
+        self.assertEqual(server['ot.http.route'], '/hello/<name>')
+        self.assertEqual(server['ot.http.status_code'], 200)
+        self.assertEqual(server['ot.http.response_bytes'], 10)
+        self.assertEqual(server['ot.trace_id'], 0xff)
+        self.assertEqual(server['ot.parent_span_id'], 0xa)
+        self.assertEqual(log['event'], 'before_request')
+
+    def test_streaming(self):
+        response = self.app.test_client().get('/stream', buffered=True)
+
+        self.assertEqual(response.data, b'chunk' * 3)
+        server = self.get_data()[0]
+        self.assertEqual(server['ot.http.response_bytes'], 15)
+
+    def test_error(self):
+        response = self.app.test_client().get('/error', buffered=True)
+
+        self.assertEqual(response.status_code, 500)
+        server = self.get_data()[0]
+        self.assertEqual(server['ot.http.status_code'], 500)
+        self.assertTrue(server['ot.error'])
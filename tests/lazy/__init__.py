@@ -0,0 +1,2 @@
+def package_function():
+    return 'package'
@@ -0,0 +1,5 @@
+from . import second
+
+
+def first_function():
+    return second.second_function()
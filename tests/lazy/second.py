@@ -0,0 +1,5 @@
+from . import first  # pylint: disable=cyclic-import
+
+
+def second_function():
+    return 'second'
@@ -0,0 +1,10 @@
+def outer(value):
+    return inner(value) + 1
+
+
+def inner(value):
+    return value * 2
+
+
+def failing():
+    raise ValueError('failed')
@@ -0,0 +1,39 @@
+import time
+import asyncio
+
+
+def numbers(count):
+    for number in range(count):
+        yield number
+
+
+def echo():
+    received = []
+    while True:
+        value = yield received
+        if value is None:
+            return received
+        received.append(value)
+
+
+async def async_numbers(count):
+    for number in range(count):
+        await asyncio.sleep(0)
+        yield number
+
+
+async def coroutine(value):
+    await asyncio.sleep(0)
+    return value
+
+
+def slow_numbers(count, delay):
+    for number in range(count):
+        time.sleep(delay)
+        yield number
+
+
+def failing(count):
+    for number in range(count):
+        yield number
+    raise ValueError('failed')
@@ -17,4 +17,16 @@ class RegularClass:
 
     @staticmethod
     def static_method(foo, bar):
-        logging.info('Here is %s and %s', foo, bar)
\ No newline at end of file
+        logging.info('Here is %s and %s', foo, bar)
+
+# Decorators
+DECORATIONS = []
+
+
+def async_decorator(function):
+    DECORATIONS.append(function)
+
+    async def decorated_function(*args, **kwargs):
+        return await function(*args, **kwargs)
+
+    return decorated_function
@@ -0,0 +1,62 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep-alive connections
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requests.append((self.path, dict(self.headers), self.client_address))
+
+        if self.path == '/flaky' and self.server.failures > 0:
+            self.server.failures -= 1
+            self.respond(503, b'')
+        elif self.path == '/error':
+            self.respond(500, b'error')
+        elif self.path == '/slow':
+            time.sleep(0.5)
+            self.respond(200, b'slow')
+        else:
+            self.respond(200, json.dumps(dict(self.headers)).encode('utf-8'))
+
+    def respond(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class LocalServer:
+    """
+    HTTP server on random local port, run in background thread.
+    `/flaky` fails with 503 `failures` times, `/error` responds with 500, `/slow` responds after 0.5s,
+    other paths echo request headers
+    """
+    def __init__(self, failures=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.requests = []
+        self.server.failures = failures
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,97 @@
+import logging
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.instrumentation import instrumentation
+from logsense_opentracing.exception_capture import CapturedException, configure_exception_capture, \
+    DEFAULT_MAX_DEPTH
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+def failing(depth=0):
+    if depth:
+        return failing(depth - 1)
+    raise ValueError('failed')
+
+
+def capture(depth=0):
+    try:
+        failing(depth)
+    except ValueError as exception:
+        return CapturedException.capture(exception)
+
+
+class TestCapturedException(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def test_format(self):
+        captured = capture()
+
+        self.assertEqual(captured.kind, 'ValueError')
+        self.assertEqual(captured.message, 'failed')
+        self.assertEqual([location[2] for location in captured.locations], ['capture', 'failing'])
+
+        formatted = captured.resolve()
+        self.assertTrue(formatted.startswith('Traceback (most recent call last):'))
+        self.assertIn("raise ValueError('failed')", formatted)
+        self.assertTrue(formatted.endswith('ValueError: failed'))
+
+    def test_max_depth(self):
+        configure_exception_capture(max_depth=3)
+        try:
+            captured = capture(depth=10)
+        finally:
+            configure_exception_capture(max_depth=DEFAULT_MAX_DEPTH)
+
+        self.assertEqual(len(captured.locations), 3)
+        self.assertIn('... 9 frames omitted', captured.resolve())
+
+    def test_deduplication(self):
+        first, second = capture(), capture()
+
+        self.assertIs(first.signature, second.signature)
+        formatted = first.resolve()
+        self.assertEqual(second.resolve(), formatted)
+
+    def test_instrumentation(self):
+        results = []
+
+        def after(scope, result, *args, error=None, **kwargs):
+            results.append((result, error))
+
+        function = instrumentation(failing, after=after)
+        with self.assertRaises(ValueError):
+            function(1)
+
+        data = self.get_data()
+        self.assertEqual(results, [(None, True)])
+        self.assertTrue(data[0]['ot.error'])
+
+        error = [item for item in data if item.get('event') == 'error'][0]
+        self.assertEqual(error['error.kind'], 'ValueError')
+        self.assertEqual(error['message'], 'failed')
+        self.assertIsInstance(error['stack'], str)
+        self.assertIn('in failing', error['stack'])
+
+    def test_handler(self):
+        logger = logging.getLogger('tests.exception_capture')
+        with opentracing.tracer.start_active_span('logged'):
+            try:
+                failing()
+            except ValueError:
+                logger.exception('Something failed')
+
+        record = [item for item in self.get_data() if item.get('message') == 'Something failed'][0]
+        self.assertTrue(record['logger.exc_info'].endswith('ValueError: failed'))
+
+    def tearDown(self):
+        opentracing.tracer.finish()
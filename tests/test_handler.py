@@ -0,0 +1,249 @@
+import time
+import logging
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.handler import LazyRecord
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+LOGGER = 'tests.handler'
+
+
+class TestHandler(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.logger = logging.getLogger(LOGGER)
+        self.logger.setLevel(logging.NOTSET)
+        # Handlers added to the root logger by other tests would duplicate records
+        self.logger.propagate = False
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def get_messages(self):
+        return [item['message'] for item in self.get_data() if item['_type'] == 'python']
+
+    def test_lazy_message(self):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender)
+        items = [1, 2]
+
+        with opentracing.tracer.start_active_span('logging') as scope:
+            self.logger.info('Deferred %s %d', 'message', 1)
+            self.logger.info('Formatted %s', items)
+            self.logger.info({'event': 'structured'})
+            logs = [log['log'] for log in scope.span._logs[1:]]  # pylint: disable=protected-access
+            items.append(3)
+
+        self.assertTrue(all(isinstance(log, LazyRecord) for log in logs))
+        self.assertEqual(logs[0].args, ('message', 1))
+        self.assertIsNone(logs[1].args)
+
+        data = [item for item in self.get_data() if item['_type'] == 'python']
+        self.assertEqual([item.get('message') for item in data], ['Deferred message 1', 'Formatted [1, 2]', None])
+        self.assertEqual(data[2]['event'], 'structured')
+        self.assertEqual(data[0]['logger.name'], LOGGER)
+        self.assertEqual(data[0]['logger.func'], 'test_lazy_message')
+
+    def test_level(self):
+        self.logger.setLevel(logging.INFO)
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender, level=logging.WARNING)
+
+        # Logger's level isn't raised to handler's level
+        self.assertEqual(self.logger.level, logging.INFO)
+
+        with opentracing.tracer.start_active_span('logging'):
+            self.logger.info('Ignored')
+            self.logger.warning('Sent')
+
+        self.assertEqual(self.get_messages(), ['Sent'])
+
+    def test_drop_newest(self):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender, max_logs_per_span=2)
+
+        with opentracing.tracer.start_active_span('logging'):
+            for number in range(5):
+                self.logger.info('Log %d', number)
+
+        data = self.get_data()
+        self.assertEqual([item.get('message') for item in data[1:]], ['Log 0', 'Log 1'])
+        self.assertEqual(data[0]['ot.logs_dropped'], 3)
+
+    def test_drop_oldest(self):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender, max_logs_per_span=2,
+                                   log_overflow='ring')
+
+        with opentracing.tracer.start_active_span('logging'):
+            for number in range(5):
+                self.logger.info('Log %d', number)
+
+        data = self.get_data()
+        self.assertEqual(data[0]['_type'], 'trace')
+        self.assertEqual([item.get('message') for item in data[1:]], ['Log 3', 'Log 4'])
+        self.assertEqual(data[0]['ot.logs_dropped'], 3)
+
+    def test_no_active_span(self):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender)
+        self.logger.info('Without span')
+
+        self.assertEqual(self.get_data(), [])
+
+    def tearDown(self):
+        opentracing.tracer.finish()
+        self.logger.handlers.clear()
+        self.logger.setLevel(logging.NOTSET)
+        self.logger.propagate = True
+
+
+class TestCoalescing(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.logger = logging.getLogger(LOGGER)
+        self.logger.propagate = False
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def test_coalesce(self):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender, coalesce_logs=True)
+
+        with opentracing.tracer.start_active_span('logging'):
+            for number in range(5):
+                self.logger.info('Item %d', number)
+            self.logger.warning('Item %d', 5)
+            self.logger.info('Done')
+
+        data = self.get_data()[1:]
+        self.assertEqual([item['message'] for item in data], ['Item 0', 'Item 5', 'Done'])
+        self.assertEqual(data[0]['logger.count'], 5)
+        self.assertLessEqual(data[0]['logger.first_timestamp'], data[0]['logger.last_timestamp'])
+        self.assertNotIn('logger.count', data[1])
+
+    def test_coalesce_per_span(self):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender, coalesce_logs=True)
+
+        for _ in range(2):
+            with opentracing.tracer.start_active_span('logging'):
+                self.logger.info('Message')
+                self.logger.info('Message')
+
+        data = [item for item in self.get_data() if item['_type'] == 'python']
+        self.assertEqual([item['logger.count'] for item in data], [2, 2])
+
+    def test_rate_limit(self):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender, log_rate=0.001, log_burst=3)
+
+        with opentracing.tracer.start_active_span('logging'):
+            for number in range(10):
+                self.logger.info('Item %d', number)
+            self.logger.info('Other')
+
+        data = self.get_data()
+        self.assertEqual([item.get('message') for item in data[1:]], ['Item 0', 'Item 1', 'Item 2', 'Other'])
+        self.assertEqual(data[0]['ot.logs_suppressed'], 7)
+
+    def tearDown(self):
+        opentracing.tracer.finish()
+        self.logger.handlers.clear()
+        self.logger.propagate = True
+
+
+def buffered_child(logger, error=False):
+    with opentracing.tracer.start_active_span('child') as scope:
+        logger.debug('Child debug')
+        if error:
+            scope.span.set_tag('error', True)
+
+
+class TestBuffer(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.logger = logging.getLogger(LOGGER)
+        self.logger.propagate = False
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def get_messages(self):
+        return [item['message'] for item in self.get_data() if item['_type'] == 'python']
+
+    def setup_handler(self, **kwargs):
+        self.tracer = setup_tracer('test_token', logger=LOGGER, sender=self.sender, buffer_level=logging.INFO,
+                                   **kwargs)
+
+    def test_drop(self):
+        self.setup_handler()
+
+        with opentracing.tracer.start_active_span('parent'):
+            self.logger.debug('Parent debug')
+            buffered_child(self.logger)
+            self.logger.info('Parent info')
+
+        self.assertEqual(self.get_messages(), ['Parent info'])
+
+    def test_keep_error(self):
+        self.setup_handler()
+
+        with opentracing.tracer.start_active_span('parent'):
+            self.logger.debug('Parent debug')
+            buffered_child(self.logger, error=True)
+            self.logger.debug('Parent after child')
+
+        self.assertEqual(sorted(self.get_messages()), ['Child debug', 'Parent after child', 'Parent debug'])
+
+    def test_keep_slow(self):
+        self.setup_handler(keep_duration_us=10000)
+
+        with opentracing.tracer.start_active_span('parent'):
+            self.logger.debug('Parent debug')
+            time.sleep(0.02)
+
+        self.assertEqual(self.get_messages(), ['Parent debug'])
+
+    def test_keep_finished_children(self):
+        self.setup_handler(keep_duration_us=50000)
+
+        with opentracing.tracer.start_active_span('parent'):
+            buffered_child(self.logger)
+            time.sleep(0.1)
+
+        data = self.get_data()
+        child = next(item for item in data if item['ot.operation_name'] == 'child' and item['_type'] == 'trace')
+        record = next(item for item in data if item['_type'] == 'python')
+        self.assertEqual(record['message'], 'Child debug')
+        self.assertEqual(record['ot.span_id'], child['ot.span_id'])
+        self.assertEqual(child['ot.logs_buffered'], 1)
+
+    def test_keep_finished_children_of_failed_root(self):
+        self.setup_handler()
+
+        with opentracing.tracer.start_active_span('parent') as scope:
+            buffered_child(self.logger)
+            scope.span.set_tag('error', True)
+
+        self.assertEqual(self.get_messages(), ['Child debug'])
+
+    def test_buffer_size(self):
+        self.setup_handler(buffer_size=2)
+
+        with opentracing.tracer.start_active_span('parent') as scope:
+            for number in range(5):
+                self.logger.debug('Debug %d', number)
+            scope.span.set_tag('error', True)
+
+        self.assertEqual(self.get_messages(), ['Debug 3', 'Debug 4'])
+
+    def tearDown(self):
+        opentracing.tracer.finish()
+        self.logger.handlers.clear()
+        self.logger.propagate = True
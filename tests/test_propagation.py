@@ -0,0 +1,228 @@
+import random
+import opentracing
+from opentracing.propagation import Format
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.span_context import SpanContext
+from logsense_opentracing.propagation import TraceContextPropagator, B3Propagator, B3MultiPropagator, \
+    HTTPHeadersPropagator, BinaryPropagator, CompositePropagator, http_propagator
+from logsense_opentracing.instrumentation import requests_baggage
+from logsense_opentracing.instrumentation.utils import extract_http_carrier
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+def context():
+    return SpanContext(trace_id=(1 << 100) + 5, span_id=(1 << 63) + 7, baggage={'user': 'logsense', 'zażółć': 'gęślą'})
+
+
+class TestPropagation(TestCase):
+    def setUp(self):
+        self.tracer = setup_tracer('test_token', sender=MockSender())
+
+    def assertContextEqual(self, first, second):  # pylint: disable=invalid-name
+        self.assertEqual((first.trace_id, first.span_id, first.baggage),
+                         (second.trace_id, second.span_id, second.baggage))
+
+    def test_round_trip(self):
+        for format, carrier in ((Format.TEXT_MAP, {}), (Format.HTTP_HEADERS, {}), (Format.BINARY, bytearray())):
+            with self.subTest(format=format):
+                self.tracer.inject(context(), format, carrier)
+                propagator = self.tracer._propagators[format]  # pylint: disable=protected-access
+                self.assertContextEqual(propagator.extract(carrier), context())
+
+    def test_http_headers(self):
+        carrier = {}
+        self.tracer.inject(context(), Format.HTTP_HEADERS, carrier)
+
+        self.assertEqual(carrier['ot-tracer-spanid'], '8000000000000007')
+        self.assertEqual(carrier['ot-baggage-user'], 'logsense')
+
+        # Web frameworks normalize header names
+        carrier = {'ot-tracer-traceid': 'ff', 'ot-tracer-spanid': 'a', 'Ot-Baggage-User': 'logsense'}
+        extracted = self.tracer._propagators[Format.HTTP_HEADERS].extract(carrier)  # pylint: disable=protected-access
+        self.assertEqual((extracted.trace_id, extracted.span_id, extracted.baggage), (255, 10, {'user': 'logsense'}))
+
+    def test_missing_context(self):
+        for format, carrier in ((Format.TEXT_MAP, {}), (Format.HTTP_HEADERS, {'ot-tracer-traceid': 'xyz'}),
+                                (Format.BINARY, b'')):
+            with self.subTest(format=format):
+                self.assertIsNone(self.tracer._propagators[format].extract(carrier))  # pylint: disable=protected-access
+
+    def test_corrupted_binary(self):
+        carrier = bytearray()
+        self.tracer.inject(context(), Format.BINARY, carrier)
+        propagator = self.tracer._propagators[Format.BINARY]  # pylint: disable=protected-access
+
+        for corrupted in (carrier[:10], carrier[:-3], b'\x02' + carrier[1:]):
+            with self.assertRaises(opentracing.SpanContextCorruptedException):
+                propagator.extract(corrupted)
+
+        with self.assertRaises(opentracing.InvalidCarrierException):
+            self.tracer.inject(context(), Format.BINARY, {})
+
+    def test_unsupported_format(self):
+        with self.assertRaises(opentracing.UnsupportedFormatException):
+            self.tracer.inject(context(), 'unknown', {})
+
+    def test_http_integration(self):
+        def client():
+            with opentracing.tracer.start_active_span('client') as scope:
+                scope.span.set_baggage_item('suitcase', 'documents')
+                return requests_baggage(scope, 'GET', 'http://localhost/')[1]['headers'], scope.span.context
+
+        def server(headers):
+            with opentracing.tracer.start_active_span('server') as scope:
+                extract_http_carrier(headers, scope.span)
+                return scope.span.context
+
+        headers, client_context = client()
+        server_context = server(headers)
+
+        self.assertEqual(server_context.trace_id, client_context.trace_id)
+        self.assertEqual(server_context.parent_id, client_context.span_id)
+        self.assertIsNone(server_context.parent_span)
+        self.assertEqual(server_context.baggage['suitcase'], 'documents')
+
+    def tearDown(self):
+        opentracing.tracer.finish()
+
+
+TRACEPARENT = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+B3 = '80f198ee56343ba864fe8b2a57d3eff7-e457b5a2e4d86bd1-1-05e3ac9a4f6e3b90'
+HTTP_PROPAGATORS = (TraceContextPropagator(), B3Propagator(), B3MultiPropagator(), HTTPHeadersPropagator())
+
+
+class TestHTTPFormats(TestCase):
+    def test_trace_context(self):
+        extracted = TraceContextPropagator.extract({'traceparent': TRACEPARENT, 'tracestate': 'congo=t61rcWkgMzE'})
+
+        self.assertEqual(extracted.trace_id, 0x4bf92f3577b34da6a3ce929d0e0e4736)
+        self.assertEqual(extracted.span_id, 0x00f067aa0ba902b7)
+        self.assertEqual(extracted.trace_state, 'congo=t61rcWkgMzE')
+
+        carrier = {}
+        TraceContextPropagator.inject(extracted, carrier)
+        self.assertEqual(carrier, {'traceparent': TRACEPARENT, 'tracestate': 'congo=t61rcWkgMzE'})
+
+    def test_invalid_trace_context(self):
+        for value in ('ff' + TRACEPARENT[2:],  # forbidden version
+                      TRACEPARENT + '-extra',  # version 00 can't have more fields
+                      TRACEPARENT.upper(),
+                      '00-00000000000000000000000000000000-00f067aa0ba902b7-01',
+                      '00-4bf92f3577b34da6a3ce929d0e0e4736-0000000000000000-01',
+                      '00-4bf92f3577b34da6a3ce929d0e0e473-600f067aa0ba902b7-01',
+                      '00-+bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01',
+                      TRACEPARENT[:-1]):
+            with self.subTest(value=value):
+                self.assertIsNone(TraceContextPropagator.extract({'traceparent': value}))
+
+        # Future versions can have more fields
+        self.assertIsNotNone(TraceContextPropagator.extract({'traceparent': 'cc' + TRACEPARENT[2:] + '-extra'}))
+
+    def test_b3(self):
+        extracted = B3Propagator.extract({'b3': B3})
+        self.assertEqual(extracted.trace_id, 0x80f198ee56343ba864fe8b2a57d3eff7)
+        self.assertEqual(extracted.span_id, 0xe457b5a2e4d86bd1)
+
+        carrier = {}
+        B3Propagator.inject(extracted, carrier)
+        self.assertEqual(carrier['b3'], '80f198ee56343ba864fe8b2a57d3eff7-e457b5a2e4d86bd1-1')
+
+        for value in ('0', 'd', B3.replace('-1-', '-x-'), '{}-{}'.format('a' * 20, 'e457b5a2e4d86bd1')):
+            with self.subTest(value=value):
+                self.assertIsNone(B3Propagator.extract({'b3': value}))
+
+    def test_b3_multi(self):
+        carrier = {}
+        B3MultiPropagator.inject(SpanContext(trace_id=10, span_id=11), carrier)
+
+        self.assertEqual(carrier, {'x-b3-traceid': '000000000000000a', 'x-b3-spanid': '000000000000000b',
+                                   'x-b3-sampled': '1'})
+        extracted = B3MultiPropagator.extract(carrier)
+        self.assertEqual((extracted.trace_id, extracted.span_id), (10, 11))
+
+    def test_composite(self):
+        propagator = http_propagator(['tracecontext', 'b3', 'ot'])
+        self.assertIsInstance(propagator, CompositePropagator)
+
+        carrier = {}
+        propagator.inject(context(), carrier)
+        self.assertTrue({'traceparent', 'b3', 'ot-tracer-traceid'}.issubset(carrier))
+
+        # The first format found wins
+        carrier = {'b3': B3, 'ot-tracer-traceid': 'a', 'ot-tracer-spanid': 'b'}
+        self.assertEqual(propagator.extract(carrier).span_id, 0xe457b5a2e4d86bd1)
+        self.assertEqual(propagator.extract({'ot-tracer-traceid': 'a', 'ot-tracer-spanid': 'b'}).span_id, 11)
+        self.assertIsNone(propagator.extract({}))
+
+        with self.assertRaises(ValueError):
+            http_propagator(['unknown'])
+
+    def test_setup_tracer(self):
+        setup_tracer('test_token', sender=MockSender(), propagation='tracecontext,b3multi')
+        with opentracing.tracer.start_active_span('client') as scope:
+            _, kwargs = requests_baggage(scope, 'GET', 'http://localhost/')
+
+        self.assertIn('traceparent', kwargs['headers'])
+        self.assertIn('x-b3-traceid', kwargs['headers'])
+        self.assertNotIn('ot-tracer-traceid', kwargs['headers'])
+        opentracing.tracer.finish()
+
+
+class TestFuzz(TestCase):
+    def setUp(self):
+        self.random = random.Random(1234)
+
+    def test_random_identifiers(self):
+        for _ in range(500):
+            trace_id = self.random.getrandbits(self.random.choice((64, 128))) or 1
+            span_id = self.random.getrandbits(64) or 1
+            for propagator in HTTP_PROPAGATORS:
+                carrier = {}
+                propagator.inject(SpanContext(trace_id=trace_id, span_id=span_id), carrier)
+                extracted = propagator.extract(carrier)
+                self.assertEqual((extracted.trace_id, extracted.span_id), (trace_id, span_id))
+
+    def mutate(self, value):
+        value = list(value)
+        for _ in range(self.random.randint(1, 3)):
+            operation = self.random.randint(0, 2)
+            position = self.random.randrange(len(value) + 1)
+            character = self.random.choice('0123456789abcdefABCDEF-_ +x\u0100')
+            if operation == 0 and position < len(value):
+                value[position] = character
+            elif operation == 1:
+                value.insert(position, character)
+            elif position < len(value):
+                del value[position]
+        return ''.join(value)
+
+    def test_mutated_headers(self):
+        headers = {
+            'traceparent': TRACEPARENT,
+            'b3': B3,
+            'x-b3-traceid': B3[:32],
+            'ot-tracer-traceid': B3[:32],
+        }
+        for _ in range(2000):
+            name = self.random.choice(list(headers))
+            carrier = {'x-b3-spanid': B3[33:49], 'ot-tracer-spanid': B3[33:49], name: self.mutate(headers[name])}
+            for propagator in HTTP_PROPAGATORS:
+                extracted = propagator.extract(carrier)
+                if extracted is not None:
+                    self.assertGreater(extracted.trace_id, 0)
+                    self.assertGreater(extracted.span_id, 0)
+
+    def test_mutated_binary(self):
+        carrier = bytearray()
+        BinaryPropagator.inject(context(), carrier)
+        for _ in range(2000):
+            mutated = bytearray(carrier)
+            for _ in range(self.random.randint(1, 3)):
+                mutated[self.random.randrange(len(mutated))] = self.random.randrange(256)
+            del mutated[self.random.randrange(len(mutated) + 1):]
+            try:
+                BinaryPropagator.extract(mutated)
+            except opentracing.SpanContextCorruptedException:
+                pass
@@ -0,0 +1,74 @@
+import time
+import threading
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from logsense_opentracing.sampler import StackSampler
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+def wait_for(event):
+    event.wait(5)
+
+
+def traced(started, event):
+    with opentracing.tracer.start_active_span('sampled'):
+        started.set()
+        wait_for(event)
+
+
+class TestStackSampler(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def run_traced(self, sample):
+        started, event = threading.Event(), threading.Event()
+        thread = threading.Thread(target=traced, args=(started, event))
+        thread.start()
+        started.wait(5)
+        sample()
+        event.set()
+        thread.join()
+
+    def test_samples_attached_to_span(self):
+        sampler = StackSampler(tracer=self.tracer)
+        self.tracer.add_finish_callback(sampler._on_finish)  # pylint: disable=protected-access
+
+        def sample():
+            for _ in range(3):
+                sampler.sample(exclude=threading.get_ident())
+
+        self.run_traced(sample)
+
+        profile = [item for item in self.get_data() if item.get('event') == 'profile']
+        self.assertEqual(len(profile), 1)
+        self.assertEqual(profile[0]['profile.samples'], 3)
+        self.assertEqual(profile[0]['ot.operation_name'], 'sampled')
+
+        stack, count = profile[0]['profile.stacks'].rsplit(' ', 1)
+        self.assertEqual(count, '3')
+        self.assertTrue(stack.startswith('tests.test_sampler.traced;tests.test_sampler.wait_for'))
+        self.assertIn('sampled', sampler.operation_profiles())
+
+    def test_thread(self):
+        sampler = StackSampler(interval=0.005, tracer=self.tracer)
+        sampler.start()
+        self.run_traced(lambda: time.sleep(0.1))
+        sampler.stop()
+
+        stats = sampler.stats()
+        self.assertGreater(stats['rounds'], 0)
+        self.assertGreater(stats['samples'], 0)
+        self.assertLess(stats['overhead'], 1)
+        self.assertTrue(any(item.get('event') == 'profile' for item in self.get_data()))
+
+    def tearDown(self):
+        opentracing.tracer.finish()
@@ -0,0 +1,89 @@
+import time
+import opentracing
+from logsense_opentracing.utils import setup_tracer
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+def child(operation_name='child', duration=0, error=False):
+    with opentracing.tracer.start_active_span(operation_name) as scope:
+        if error:
+            scope.span.set_tag('error', True)
+        time.sleep(duration)
+
+
+class TestMinDuration(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender, min_duration_us=10000)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def test_collapse_short_children(self):
+        with opentracing.tracer.start_active_span('parent'):
+            for _ in range(3):
+                child()
+            time.sleep(0.02)
+
+        data = self.get_data()
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['ot.operation_name'], 'parent')
+        self.assertEqual(data[0]['ot.collapsed_children'], 3)
+        self.assertGreaterEqual(data[0]['ot.collapsed_time_us'], 0)
+
+    def test_keep_long_children(self):
+        with opentracing.tracer.start_active_span('parent'):
+            child(duration=0.02)
+
+        data = self.get_data()
+
+        self.assertEqual([item['ot.operation_name'] for item in data], ['child', 'parent'])
+        self.assertNotIn('ot.collapsed_children', data[1])
+
+    def test_keep_children_with_errors(self):
+        with opentracing.tracer.start_active_span('parent'):
+            child(error=True)
+
+        data = self.get_data()
+
+        self.assertEqual([item['ot.operation_name'] for item in data], ['child', 'parent'])
+
+    def test_keep_parents_of_exported_children(self):
+        with opentracing.tracer.start_active_span('root'):
+            with opentracing.tracer.start_active_span('mid') as mid:
+                child('leaf', error=True)
+            time.sleep(0.02)
+
+        data = self.get_data()
+
+        self.assertEqual([item['ot.operation_name'] for item in data], ['leaf', 'mid', 'root'])
+        self.assertEqual(data[0]['ot.parent_span_id'], mid.span.context.span_id)
+        self.assertNotIn('ot.collapsed_children', data[2])
+
+    def test_keep_root_span(self):
+        with opentracing.tracer.start_active_span('parent'):
+            pass
+
+        self.assertEqual(self.get_data()[0]['ot.operation_name'], 'parent')
+
+    def test_operation_threshold(self):
+        self.tracer.set_min_duration(None)
+        self.tracer.set_min_duration(10000, operation_name='short')
+
+        with opentracing.tracer.start_active_span('parent'):
+            child('short')
+            child('other')
+
+        data = self.get_data()
+
+        self.assertEqual([item['ot.operation_name'] for item in data], ['other', 'parent'])
+        self.assertEqual(data[1]['ot.collapsed_children'], 1)
+
+    def tearDown(self):
+        opentracing.tracer.finish()
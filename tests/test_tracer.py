@@ -0,0 +1,104 @@
+import asyncio
+import opentracing
+from opentracing.propagation import Format
+from logsense_opentracing.utils import setup_tracer
+from tests.sender import MockSender
+
+from unittest import TestCase
+
+
+def child(**kwargs):
+    with opentracing.tracer.start_active_span('child', **kwargs) as scope:
+        return scope.span
+
+
+class TestTracer(TestCase):
+    def setUp(self):
+        self.sender = MockSender()
+        self.tracer = setup_tracer('test_token', sender=self.sender)
+
+    def get_data(self):
+        # Wait until all spans are processed
+        self.tracer.finish()
+        self.tracer._thread.join()  # pylint: disable=protected-access
+        return [record.data for record in self.sender.get_data()]
+
+    def test_extract(self):
+        carrier = {'ot-tracer-traceid': 'a', 'ot-tracer-spanid': 'b', 'ot-baggage-user': 'logsense'}
+
+        # There is no active span
+        context = opentracing.tracer.extract(Format.HTTP_HEADERS, carrier)
+
+        self.assertEqual((context.trace_id, context.span_id, context.baggage), (10, 11, {'user': 'logsense'}))
+        self.assertIsNone(context.parent_span)
+        self.assertIsNone(opentracing.tracer.extract(Format.HTTP_HEADERS, {}))
+
+    def test_remote_parent(self):
+        context = opentracing.tracer.extract(Format.HTTP_HEADERS, {'ot-tracer-traceid': 'a', 'ot-tracer-spanid': 'b'})
+        span = child(child_of=context)
+
+        self.assertEqual(span.context.trace_id, 10)
+        self.assertIsNone(span.context.parent_span)
+
+        data = self.get_data()
+        self.assertEqual(data[0]['ot.parent_span_id'], 11)
+
+    def test_child_of(self):
+        with opentracing.tracer.start_active_span('parent') as scope:
+            for parent in (scope, scope.span, scope.span.context):
+                span = child(child_of=parent)
+                self.assertEqual(span.context.trace_id, scope.span.context.trace_id)
+                self.assertEqual(span.context.parent_id, scope.span.context.span_id)
+
+            # Local parent span is known only if span or scope is given
+            self.assertIsNone(span.context.parent_span)
+            self.assertIs(child(child_of=scope).context.parent_span, scope.span)
+
+    def test_ignore_active_span(self):
+        with opentracing.tracer.start_active_span('parent') as scope:
+            span = child(ignore_active_span=True, tags={'custom': 'tag'})
+
+        self.assertNotEqual(span.context.trace_id, scope.span.context.trace_id)
+        self.assertIsNone(span.context.parent_id)
+        self.assertEqual(span._tags['custom'], 'tag')  # pylint: disable=protected-access
+
+    def test_start_span(self):
+        span = opentracing.tracer.start_span('manual', start_time=100.0)
+        self.assertIsNone(opentracing.tracer.active_span)
+        span.finish()
+
+        data = self.get_data()
+        self.assertEqual(data[0]['ot.operation_name'], 'manual')
+        self.assertGreater(data[0]['ot.duration_us'], 1e6)
+
+    def test_baggage_isolation(self):
+        with opentracing.tracer.start_active_span('parent') as scope:
+            scope.span.set_baggage_item('parent', 'value')
+            span = child()
+            span.set_baggage_item('child', 'value')
+
+            self.assertEqual(scope.span.context.baggage, {'parent': 'value'})
+            self.assertEqual(span.context.baggage, {'parent': 'value', 'child': 'value'})
+
+        self.assertEqual(opentracing.SpanContext.EMPTY_BAGGAGE, {})
+
+    def test_context_scope(self):
+        span = opentracing.tracer.start_span('request')
+
+        async def task():
+            await asyncio.sleep(0)
+            return opentracing.tracer.active_span, child().context.parent_span
+
+        async def request():
+            token = opentracing.tracer.scope_manager.activate_context(span)
+            try:
+                # Task is run by event loop, without frames of the request
+                return await asyncio.get_running_loop().create_task(task())
+            finally:
+                opentracing.tracer.scope_manager.deactivate_context(token)
+
+        self.assertEqual(asyncio.run(request()), (span, span))
+        self.assertIsNone(opentracing.tracer.active_span)
+
+    def tearDown(self):
+        opentracing.tracer.finish()